@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_manager import DatabaseManager
+from db.analytics import AnalyticsEngine, np
+from db.availability import DEFAULT_DURATION_MINUTES
+
+"""
+BA = Benchmark Analytics: مؤشرات لوحة التحكم عبر AnalyticsEngine مقابل استعلام SQL لكل مؤشر.
+- "sql": استعلام GROUP BY منفصل لكل مؤشر (كما في دوال القسم 4 من database_manager.py).
+- "numpy" / "python": AnalyticsEngine مع/بدون NumPy؛ cold = قراءة الأعمدة + الحساب، warm = من الذاكرة.
+- يتحقق أيضاً من أن الطريقتين تعطيان نفس النتائج.
+
+التشغيل:
+    python benchmarks/bench_analytics.py --appointments 100000 --repeat 5
+"""
+
+START_DATE, END_DATE = '2024-01-01', '2024-12-31'
+STATUSES = ['Confirmed', 'Attended', 'Attended', 'Attended', 'Absent', 'Cancelled']
+
+
+def seed(db: DatabaseManager, appointments: int):
+    """مواعيد عشوائية (ثابتة بـ seed) على سنة 2024، ثلثها بفاتورة"""
+    rng = random.Random(42)
+    user_id = db.add_user({'username': 'bench', 'password_hash': 'x'})
+    client_id = db.add_client({'full_name': 'Bench Client', 'phone_number': '000'})
+    services = [db.add_service({'name_ar': f'خدمة {i}', 'duration_minutes': 15 * (i + 1), 'price': 50.0 * (i + 1)})
+                for i in range(5)]
+    rows = []
+    for _ in range(appointments):
+        day = 1 + rng.randrange(366)
+        rows.append({'client_id': client_id, 'user_id': user_id, 'service_id': rng.choice(services + [None]),
+                     'date': time.strftime('%Y-%m-%d', time.strptime(f'2024 {day}', '%Y %j')),
+                     'start_time': f"{rng.randint(8, 17):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+                     'duration_minutes': rng.choice((None, 30, 45)), 'status': rng.choice(STATUSES),
+                     'created_at': f"2023-12-{rng.randint(1, 28):02d}T09:00:00"})
+    ids = db.bulk_add_appointments(rows)['inserted_ids']
+    with db.transaction():
+        for number, appointment_id in enumerate(ids[::3], start=1):
+            db.execute_query("INSERT INTO Invoices (invoice_number, appointment_id, created_by_user_id, issue_date, "
+                             "total_amount, payment_status) VALUES (?, ?, ?, ?, ?, 'paid')",
+                             (number, appointment_id, user_id, '2024-01-01', float(rng.randint(20, 200))), commit=True)
+
+
+def kpis_sql(db: DatabaseManager) -> Dict[str, Any]:
+    """نفس المؤشرات باستعلام منفصل لكل مؤشر (ساعات العمل الافتراضية كل الأيام)"""
+    params = (START_DATE, END_DATE)
+    hours = db.availability.working_hours(START_DATE)
+    work_start, work_end = hours
+    by_status = {row[0]: row[1] for row in db.execute_query(
+        "SELECT status, COUNT(*) FROM Appointments WHERE date BETWEEN ? AND ? GROUP BY status", params)}
+    attended, absent = by_status.get('Attended', 0), by_status.get('Absent', 0)
+    weekday = {int(row[0]): row[1:] for row in db.execute_query(
+        """SELECT (CAST(STRFTIME('%w', date) AS INTEGER) + 6) % 7, SUM(status = 'Attended'), SUM(status = 'Absent')
+           FROM Appointments WHERE date BETWEEN ? AND ? GROUP BY 1""", params)}
+    revenue = {row[0]: row[1] for row in db.execute_query(
+        """SELECT COALESCE(A.service_id, 0), SUM(I.total_amount) FROM Appointments A
+           JOIN Invoices I ON I.appointment_id = A.appointment_id
+           WHERE A.date BETWEEN ? AND ? GROUP BY 1""", params)}
+    lead = db.execute_query(
+        """SELECT AVG(JULIANDAY(date) - JULIANDAY(SUBSTR(created_at, 1, 10))) FROM Appointments
+           WHERE date BETWEEN ? AND ? AND created_at IS NOT NULL""", params, fetch_one=True)[0]
+    booked = db.execute_query(
+        f"""SELECT SUM(MAX(0, MIN(M + D, ?) - MAX(M, ?))) FROM (
+                SELECT CAST(SUBSTR(A.start_time, 1, 2) AS INTEGER) * 60 + CAST(SUBSTR(A.start_time, 4, 2) AS INTEGER) AS M,
+                       COALESCE(A.duration_minutes, S.duration_minutes, {DEFAULT_DURATION_MINUTES}) AS D
+                FROM Appointments A LEFT JOIN Services S ON S.service_id = A.service_id
+                WHERE A.date BETWEEN ? AND ? AND LOWER(A.status) NOT IN ('cancelled', 'canceled'))""",
+        (work_end, work_start) + params, fetch_one=True)[0] or 0
+    days = db.execute_query("SELECT JULIANDAY(?) - JULIANDAY(?) + 1", (END_DATE, START_DATE), fetch_one=True)[0]
+    available = int(days) * (work_end - work_start)
+    return {
+        'appointments': sum(by_status.values()),
+        'attendance_rate': round(attended / (attended + absent), 4) if attended + absent else None,
+        'no_show_rate_by_weekday': {d: round(weekday[d][1] / sum(weekday[d]), 4) if d in weekday and sum(weekday[d])
+                                    else None for d in range(7)},
+        'revenue_total': round(sum(revenue.values()), 2),
+        'avg_lead_time_days': round(lead, 2) if lead is not None else None,
+        'utilization': round(booked / available, 4) if available else None,
+    }
+
+
+def timed(function: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """أفضل زمن ومتوسطه بالمللي ثانية"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+    return {'best_ms': min(times), 'mean_ms': sum(times) / len(times)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard KPIs: AnalyticsEngine vs one SQL query per KPI")
+    parser.add_argument('--appointments', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db-dir', default=None, help="directory for the benchmark database (default: temp dir)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(args.db_dir or tempfile.mkdtemp(prefix='bench_analytics_'), 'bench_analytics.db')
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    db = DatabaseManager(db_path, collect_stats=False, slow_query_ms=None)
+    started = time.perf_counter()
+    seed(db, args.appointments)
+    print(f"seeded {args.appointments} appointments in {time.perf_counter() - started:.1f} s "
+          f"(numpy {'available' if np is not None else 'not installed'})")
+
+    reference = kpis_sql(db)
+    results = {'sql': timed(lambda: kpis_sql(db), args.repeat)}
+    for name, use_numpy in (('numpy', True), ('python', False)):
+        if use_numpy and np is None:
+            continue
+        engine = AnalyticsEngine(db, use_numpy=use_numpy)
+
+        def cold():
+            engine.invalidate()
+            return engine.kpis(START_DATE, END_DATE)
+
+        kpis = cold()
+        mismatched = [key for key in reference if reference[key] != kpis[key]]
+        if mismatched:
+            print(f"⚠️ {name}: results differ from SQL for {mismatched}")
+        results[f'{name} cold'] = timed(cold, args.repeat)
+        results[f'{name} warm'] = timed(lambda: engine.kpis(START_DATE, END_DATE), args.repeat)
+    db.close()
+
+    print(f"{'method':>13} {'best_ms':>10} {'mean_ms':>10}")
+    for name, result in results.items():
+        print(f"{name:>13} {result['best_ms']:>10.2f} {result['mean_ms']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
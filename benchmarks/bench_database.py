@@ -0,0 +1,408 @@
+import argparse
+import inspect
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db.database_manager import DatabaseManager
+from benchmarks.bench_startup import compare
+from benchmarks.data_generator import DEFAULT_SEED, DEFAULT_YEARS, DEFAULT_END_DATE, generate, parse_scale
+
+"""
+BD = Benchmark Database: زمن كل دالة عامة في DatabaseManager على بيانات اصطناعية (data_generator.py).
+- لكل دالة حالة واحدة أو أكثر، e.g. "search_clients[ar]" و "get_appointments_page[deep]"؛ الحالات "cold"
+  تفرغ ذاكرة AvailabilityEngine / AnalyticsEngine قبل كل استدعاء.
+- مثل pytest-benchmark: استدعاء تمهيدي، ثم جولات (rounds) حتى --rounds أو --max-time لكل حالة؛ الدوال
+  السريعة تُكرر عدة مرات في الجولة (iterations) حتى تبلغ الجولة --min-round-ms. الإحصائيات لكل استدعاء:
+  min / median / mean / stddev / iqr بالمللي ثانية و ops (استدعاء في الثانية).
+- دوال القراءة أولاً ثم الكتابة (كل كتابة ببيانات جديدة)، فالكتابات لا تغير قياسات القراءة.
+- الدوال العامة بدون حالة تُطبع في النهاية (وفي JSON تحت "uncovered")؛ close فقط مستثناة عمداً.
+- --json / --baseline / --threshold كما في bench_startup.py (المقارنة على الوسيط، الخروج بالرمز 1 عند التراجع).
+
+التشغيل:
+    python benchmarks/bench_database.py --scale 100k --json db.json
+    python benchmarks/bench_database.py --scale 100k --db /tmp/bench_100k.db --baseline db.json
+    python benchmarks/bench_database.py --scale 1m --only search_clients --only get_appointments_page
+"""
+
+DEFAULT_ROUNDS = 30
+DEFAULT_MAX_TIME = 1.0
+DEFAULT_MIN_ROUND_MS = 0.5
+DEFAULT_MIN_DELTA_MS = 0.05  # أصغر من هذا ضجيج قياس
+MIN_ROUNDS = 5
+MAX_ITERATIONS = 1000
+BULK_ROWS = 50  # صفوف كل استدعاء bulk_add_* في الجولة
+SKIPPED = {'close': "lifecycle: closes the pool used by every other case"}
+
+
+class Case:
+    """حالة قياس: دالة بدون معاملات، و setup اختياري قبل كل استدعاء (خارج التوقيت)"""
+
+    def __init__(self, name: str, function: Callable[[], Any], setup: Optional[Callable[[], None]] = None,
+                 write: bool = False):
+        self.name = name
+        self.method = name.split('[', 1)[0]
+        self.function = function
+        self.setup = setup
+        self.write = write
+
+
+def run_case(case: Case, rounds: int, max_time: float, min_round_ms: float) -> Dict[str, Any]:
+    """
+    Returns:
+        Dict[str, Any]: {'min_ms': .., 'max_ms': .., 'mean_ms': .., 'median_ms': .., 'stddev_ms': .., 'iqr_ms': ..,
+            'ops': .., 'rounds': 30, 'iterations': 12}
+    """
+    def call() -> float:
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        case.function()
+        return (time.perf_counter() - started) * 1000
+
+    try:
+        call()  # تمهيد (ذاكرة مؤقتة، statement cache)
+    except StopIteration:
+        return {'error': 'no test data left'}
+    # الكتابات والحالات مع setup: استدعاء واحد لكل جولة (بيانات جديدة كل مرة)
+    iterations = 1
+    if not case.write and case.setup is None:
+        probe = call()
+        if probe < min_round_ms:
+            iterations = min(MAX_ITERATIONS, max(1, math.ceil(min_round_ms / max(probe, 1e-4))))
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + max_time
+    try:
+        while len(samples) < rounds and (len(samples) < MIN_ROUNDS or time.perf_counter() < deadline):
+            if iterations == 1:
+                samples.append(call())
+                continue
+            started = time.perf_counter()
+            for _ in range(iterations):
+                case.function()
+            samples.append((time.perf_counter() - started) * 1000 / iterations)
+    except StopIteration:
+        pass  # نفدت بيانات حالة كتابة: النتيجة من الجولات المنجزة
+    if not samples:
+        return {'error': 'no test data left'}
+
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    mean = statistics.fmean(samples)
+    return {'min_ms': min(samples), 'max_ms': max(samples), 'mean_ms': mean, 'median_ms': statistics.median(samples),
+            'stddev_ms': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'iqr_ms': quartiles[2] - quartiles[0], 'ops': 1000 / mean if mean else None,
+            'rounds': len(samples), 'iterations': iterations}
+
+
+def public_methods() -> List[str]:
+    return sorted(name for name, member in inspect.getmembers(DatabaseManager, inspect.isfunction)
+                  if not name.startswith('_'))
+
+
+# --- بيانات الحالات ---
+
+def fixtures(db: DatabaseManager, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """معرفات وتواريخ حقيقية من البيانات المولدة"""
+    def one(query: str, params: Tuple = ()) -> Any:
+        row = db.execute_query(query, params, fetch_one=True)
+        return row[0] if row else None
+
+    end = date.fromisoformat(summary['end_date'])
+    year_start = (end - timedelta(days=364)).isoformat()
+    middle = one("SELECT date FROM Appointments ORDER BY appointment_id LIMIT 1 OFFSET "
+                 "(SELECT COUNT(*) / 2 FROM Appointments)") or end.isoformat()
+    week_start = date.fromisoformat(middle) - timedelta(days=date.fromisoformat(middle).weekday())
+    cursor = db.execute_query("SELECT date, start_time, appointment_id FROM Appointments WHERE date >= ? "
+                              "ORDER BY date, start_time, appointment_id LIMIT 1", (middle,), fetch_one=True)
+    client_id = one("SELECT client_id FROM Appointments GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1")
+    return {
+        'day': middle,
+        'week': (week_start.isoformat(), (week_start + timedelta(days=6)).isoformat()),
+        'month': (middle[:8] + '01', middle[:8] + '28'),
+        'year': (year_start, end.isoformat()),
+        'deep_cursor': tuple(cursor) if cursor else None,
+        'client_id': client_id,
+        'client_cursor': tuple(db.get_client_appointments_page(client_id, limit=50)['next_cursor'] or ())
+        if client_id else None,
+        'client_name': one("SELECT full_name FROM Clients WHERE client_id = ?", (client_id,)),
+        'user_id': one("SELECT user_id FROM Users ORDER BY user_id LIMIT 1"),
+        'username': one("SELECT username FROM Users ORDER BY user_id LIMIT 1"),
+        'service_id': one("SELECT service_id FROM Services WHERE is_active = 1 ORDER BY service_id LIMIT 1"),
+        'appointment_id': one("SELECT appointment_id FROM Appointments WHERE date = ? LIMIT 1", (middle,)),
+        'invoiced_appointment_id': one("SELECT appointment_id FROM Invoices ORDER BY invoice_id DESC LIMIT 1"),
+        'theme_id': db.get_default_theme(),
+        'future_day': end + timedelta(days=400),
+    }
+
+
+def _unique_slots(first_day: date) -> Callable[[], Tuple[str, str]]:
+    """(date, start_time) جديد في كل استدعاء، بعد نهاية البيانات (بدون تداخل)"""
+    numbers = count()
+
+    def next_slot() -> Tuple[str, str]:
+        n = next(numbers)
+        day, slot = divmod(n, 32)  # 32 × 15 دقيقة = 08:00 - 16:00
+        minutes = 8 * 60 + slot * 15
+        return (first_day + timedelta(days=day)).isoformat(), f"{minutes // 60:02d}:{minutes % 60:02d}"
+    return next_slot
+
+
+def _pool(db: DatabaseManager, query: str, size: int) -> Callable[[], Any]:
+    """قيم مستهلكة مرة واحدة (e.g. مواعيد بدون فاتورة)؛ StopIteration عند النفاد"""
+    values = iter([row[0] for row in db.execute_query(f"{query} LIMIT ?", (size,)) or []])
+    return lambda: next(values)
+
+
+def build_cases(db: DatabaseManager, data: Dict[str, Any], workdir: str, rounds: int) -> List[Case]:
+    drain = deque(maxlen=0).extend  # استهلاك المولدات iter_* بالكامل
+    serial = count(1)
+    week, month, year = data['week'], data['month'], data['year']
+    client_id, user_id, service_id = data['client_id'], data['user_id'], data['service_id']
+    fr_name = db.execute_query("SELECT full_name FROM Clients WHERE full_name GLOB '[A-Z]*' LIMIT 1", fetch_one=True)
+    fr_term = fr_name[0].split()[-1].lower() if fr_name else 'martin'
+    ar_term = (data['client_name'] or 'محمد').split()[0]
+    theme_file = os.path.join(workdir, 'theme_export.json')
+    db.export_theme_to_json(data['theme_id'], theme_file)
+    license_info, device_info = db.get_license_info(), db.get_device_info()
+    languages = iter(['fr', 'en', 'ar'] * (rounds + 10))
+    theme_values = iter(['#F44336', '#E53935'] * (rounds + 10))
+    appointment_slot = _unique_slots(data['future_day'])
+    booking_slot = _unique_slots(data['future_day'] + timedelta(days=2000))
+    needed = rounds + 2
+    # مواعيد بدون فاتورة (invoices فريدة لكل موعد)
+    uninvoiced = _pool(db, "SELECT A.appointment_id FROM Appointments A LEFT JOIN Invoices I "
+                           "ON I.appointment_id = A.appointment_id WHERE I.invoice_id IS NULL "
+                           "ORDER BY A.appointment_id DESC", needed * (BULK_ROWS + 1))
+    next_invoice = count((db.execute_query("SELECT COALESCE(MAX(invoice_number), 1000) + 1 FROM Invoices",
+                                           fetch_one=True) or [1001])[0] + 1_000_000)
+
+    def appointment(slot: Tuple[str, str]) -> Dict:
+        return {'client_id': client_id, 'user_id': user_id, 'service_id': None, 'date': slot[0],
+                'start_time': slot[1], 'duration_minutes': 15, 'status': 'Confirmed'}
+
+    def client(n: int) -> Dict:
+        return {'full_name': f"Bench Client {n}", 'phone_number': f"09{n:09d}", 'email': None, 'notes': None}
+
+    def theme_element(n: int) -> Dict:
+        return {'category': 'color', 'subcategory': 'bench', 'element_name': f'bench_{n}', 'property_name': 'hex',
+                'property_value': '#123456', 'language': '', 'font_weight': '', 'font_size': ''}
+
+    reads = [
+        # --- أدوات عامة ---
+        Case('execute_query', lambda: db.execute_query("SELECT COUNT(*) FROM Clients", fetch_one=True)),
+        Case('iter_query', lambda: drain(db.iter_query("SELECT * FROM Appointments WHERE date BETWEEN ? AND ?",
+                                                       week))),
+        Case('explain_query_plan', lambda: db.explain_query_plan(
+            "SELECT * FROM Appointments WHERE date BETWEEN ? AND ?", week)),
+        Case('get_schema_version', db.get_schema_version),
+        Case('initialize_db', db.initialize_db),
+        Case('stats', db.stats),
+        # --- الإعدادات والترخيص والثيم ---
+        Case('get_settings', db.get_settings),
+        Case('get_device_info', db.get_device_info),
+        Case('get_license_info', db.get_license_info),
+        Case('get_default_theme', db.get_default_theme),
+        Case('get_last_theme', db.get_last_theme),
+        Case('get_theme_data', lambda: db.get_theme_data(data['theme_id'])),
+        Case('get_current_theme', db.get_current_theme),
+        Case('get_theme_by_category', lambda: db.get_theme_by_category('color')),
+        Case('get_theme_index', db.get_theme_index),
+        Case('get_color', lambda: db.get_color('primary')),
+        Case('get_font_style', lambda: db.get_font_style('ar', 'main_title')),
+        Case('get_translations', db.get_translations),
+        # --- المستخدمون والعملاء ---
+        Case('get_user_by_username', lambda: db.get_user_by_username(data['username'])),
+        Case('get_client_details', lambda: db.get_client_details(client_id)),
+        Case('search_clients[ar]', lambda: db.search_clients(ar_term)),
+        Case('search_clients[fr]', lambda: db.search_clients(fr_term)),
+        Case('search_clients[phone]', lambda: db.search_clients('0612')),
+        Case('search_clients_ranked[ar]', lambda: db.search_clients_ranked(ar_term)),
+        Case('search_clients_ranked[fr]', lambda: db.search_clients_ranked(fr_term)),
+        Case('iter_search_clients', lambda: drain(db.iter_search_clients(fr_term))),
+        Case('get_client_appointments_history', lambda: db.get_client_appointments_history(client_id)),
+        Case('iter_client_appointments_history', lambda: drain(db.iter_client_appointments_history(client_id))),
+        Case('get_client_appointments_page[first]', lambda: db.get_client_appointments_page(client_id)),
+        Case('get_client_appointments_page[next]', lambda: db.get_client_appointments_page(
+            client_id, after=data['client_cursor'] or None)),
+        # --- المواعيد ---
+        Case('get_all_services', db.get_all_services),
+        Case('get_daily_appointments', lambda: db.get_daily_appointments(data['day'])),
+        Case('get_weekly_appointments', lambda: db.get_weekly_appointments(*week)),
+        Case('iter_weekly_appointments', lambda: drain(db.iter_weekly_appointments(*week))),
+        Case('get_appointments_page[first]', lambda: db.get_appointments_page(*year)),
+        Case('get_appointments_page[deep]', lambda: db.get_appointments_page(*year, after=data['deep_cursor'])),
+        Case('has_conflict', lambda: db.has_conflict(data['day'], '10:00', 30)),
+        Case('has_conflict[cold]', lambda: db.has_conflict(data['day'], '10:00', 30),
+             setup=db.availability.invalidate),
+        Case('find_free_slots', lambda: db.find_free_slots(data['day'], 30)),
+        Case('find_free_slots[cold]', lambda: db.find_free_slots(data['day'], 30),
+             setup=db.availability.invalidate),
+        Case('get_invoice_by_appointment', lambda: db.get_invoice_by_appointment(data['invoiced_appointment_id'])),
+        # --- الإحصائيات ---
+        Case('get_attendance_stats[month]', lambda: db.get_attendance_stats(*month)),
+        Case('get_attendance_stats[year]', lambda: db.get_attendance_stats(*year)),
+        Case('get_peak_hours_stats[year]', lambda: db.get_peak_hours_stats(*year)),
+        Case('get_revenue_stats[year]', lambda: db.get_revenue_stats(*year)),
+        Case('get_dashboard_kpis[year]', lambda: db.get_dashboard_kpis(*year)),
+        Case('get_dashboard_kpis[year,cold]', lambda: db.get_dashboard_kpis(*year), setup=db.analytics.invalidate),
+    ]
+
+    writes = [
+        Case('transaction[empty]', lambda: _empty_transaction(db), write=True),
+        Case('apply_migrations', db.apply_migrations, write=True),
+        Case('set_default_settings', db.set_default_settings, write=True),
+        Case('set_default_license_info', db.set_default_license_info, write=True),
+        Case('update_settings', lambda: db.update_settings({'language': next(languages)}), write=True),
+        Case('set_device_info', lambda: db.set_device_info(dict(device_info or {'machine_id_hash': 'bench'})),
+             write=True),
+        Case('set_license_info', lambda: db.set_license_info(dict(license_info or {'license_key': 'bench'})),
+             write=True),
+        Case('update_license_info', lambda: db.update_license_info({'last_check_date': datetime.now().isoformat()}),
+             write=True),
+        Case('insert_translation', lambda: db.insert_translation(f"bench_key_{next(serial)}", 'نص', 'texte', 'text'),
+             write=True),
+        Case('add_user', lambda: db.add_user({'username': f"bench_user_{next(serial)}", 'password_hash': 'x'}),
+             write=True),
+        Case('add_client', lambda: db.add_client(client(next(serial))), write=True),
+        Case('add_service', lambda: db.add_service({'name_ar': f"خدمة {next(serial)}", 'price': 100.0,
+                                                    'duration_minutes': 30}), write=True),
+        Case('add_appointment', lambda: db.add_appointment(appointment(appointment_slot())), write=True),
+        Case('book_appointment', lambda: db.book_appointment(
+            appointment(booking_slot()), {'created_by_user_id': user_id, 'total_amount': 150.0,
+                                          'payment_status': 'unpaid'}), write=True),
+        Case('update_appointment', lambda: db.update_appointment(
+            data['appointment_id'], {'notes': f"bench {next(serial)}"}), write=True),
+        Case('add_invoice', lambda: db.add_invoice({'appointment_id': uninvoiced(), 'created_by_user_id': user_id,
+                                                    'total_amount': 150.0, 'payment_status': 'paid'}), write=True),
+        Case('create_audit_log', lambda: db.create_audit_log({'user_id': user_id, 'action_type': 'BENCH',
+                                                              'details': f"bench {next(serial)}"}), write=True),
+        Case(f'bulk_add_clients[{BULK_ROWS}]', lambda: db.bulk_add_clients(
+            [client(next(serial)) for _ in range(BULK_ROWS)]), write=True),
+        Case(f'bulk_add_services[{BULK_ROWS}]', lambda: db.bulk_add_services(
+            [{'name_ar': 'خدمة', 'price': 10.0} for _ in range(BULK_ROWS)]), write=True),
+        Case(f'bulk_add_appointments[{BULK_ROWS}]', lambda: db.bulk_add_appointments(
+            [{**appointment(appointment_slot()), 'service_id': service_id} for _ in range(BULK_ROWS)]), write=True),
+        Case(f'bulk_add_invoices[{BULK_ROWS}]', lambda: db.bulk_add_invoices(
+            [{'invoice_number': next(next_invoice), 'appointment_id': uninvoiced(), 'created_by_user_id': user_id,
+              'total_amount': 80.0} for _ in range(BULK_ROWS)]), write=True),
+        Case(f'bulk_add_audit_logs[{BULK_ROWS}]', lambda: db.bulk_add_audit_logs(
+            [{'user_id': user_id, 'action_type': 'BENCH', 'details': 'bulk'} for _ in range(BULK_ROWS)]), write=True),
+        # --- الثيم ---
+        Case('update_theme_element', lambda: db.update_theme_element(
+            'color', 'status', 'danger_red', 'hex', next(theme_values)), write=True),
+        Case('update_theme_settings', lambda: db.update_theme_settings({'state': 'active'}), write=True),
+        Case('set_default_theme', lambda: db.set_default_theme(data['theme_id']), write=True),
+        Case('switch_theme', lambda: db.switch_theme(data['theme_id']), write=True),
+        Case('export_theme_to_json', lambda: db.export_theme_to_json(data['theme_id'], theme_file), write=True),
+        Case('import_theme_from_json', lambda: db.import_theme_from_json(theme_file, f"bench_{next(serial)}"),
+             write=True),
+        Case('add_theme', lambda: db.add_theme({'theme_name': f"bench_{next(serial)}", 'state': 'inactive'}),
+             write=True),
+        Case('add_theme_details_element', lambda: db.add_theme_details_element(theme_element(next(serial))),
+             write=True),
+        Case('add_complete_theme', lambda: db.add_complete_theme(
+            {'theme_name': f"bench_{next(serial)}", 'state': 'inactive'},
+            {i: theme_element(next(serial)) for i in range(10)}), write=True),
+        # --- الإحصائيات الداخلية ---
+        Case('dump_stats', lambda: db.dump_stats(os.path.join(workdir, 'query_stats.json')), write=True),
+        Case('reset_stats', db.reset_stats, write=True),
+    ]
+    return reads + writes
+
+
+def _empty_transaction(db: DatabaseManager):
+    with db.transaction():
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-method DatabaseManager benchmarks on synthetic data")
+    parser.add_argument('--scale', default='10k', help="approximate rows of synthetic data (10k, 100k, 1m, 10m)")
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--db', default=None,
+                        help="database file; generated if missing, reused as is if it exists (writes add rows)")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="maximum rounds per case")
+    parser.add_argument('--max-time', type=float, default=DEFAULT_MAX_TIME, help="seconds per case")
+    parser.add_argument('--min-round-ms', type=float, default=DEFAULT_MIN_ROUND_MS,
+                        help="fast read cases repeat inside a round until it takes this long")
+    parser.add_argument('--only', action='append', help="run cases whose name contains this text (repeatable)")
+    parser.add_argument('--no-writes', action='store_true', help="read cases only (keeps --db unchanged)")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--baseline', help="JSON file from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown of the median (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_database_')
+    db_path = args.db or os.path.join(workdir, 'bench_database.db')
+    reuse = os.path.exists(db_path)
+    db = DatabaseManager(db_path, collect_stats=False, slow_query_ms=None)
+    if reuse:
+        row = db.execute_query("SELECT MIN(date), MAX(date) FROM Appointments", fetch_one=True)
+        summary = {'counts': {}, 'start_date': row[0], 'end_date': row[1] or DEFAULT_END_DATE, 'seed': None}
+        print(f"reusing {db_path}")
+    else:
+        summary = generate(db, parse_scale(args.scale), args.years, args.seed)
+        print(f"generated {sum(summary['counts'].values()):,} rows in {summary['seconds']} s "
+              f"({', '.join(f'{table} {n:,}' for table, n in summary['counts'].items())})")
+
+    cases = build_cases(db, fixtures(db, summary), workdir, args.rounds)
+    if args.no_writes:
+        cases = [case for case in cases if not case.write]
+    if args.only:
+        cases = [case for case in cases if any(text in case.name for text in args.only)]
+
+    results: Dict[str, Any] = {}
+    print(f"\n{'case':<40}{'min_ms':>10}{'median_ms':>11}{'mean_ms':>10}{'stddev':>9}{'ops':>11}{'rounds':>8}")
+    for case in cases:
+        try:
+            result = run_case(case, args.rounds, args.max_time, args.min_round_ms)
+        except Exception as e:
+            result = {'error': f"{type(e).__name__}: {e}"}
+        results[case.name] = result
+        if 'error' in result:
+            print(f"{case.name:<40}  {result['error']}")
+            continue
+        print(f"{case.name:<40}{result['min_ms']:>10.3f}{result['median_ms']:>11.3f}{result['mean_ms']:>10.3f}"
+              f"{result['stddev_ms']:>9.3f}{result['ops']:>11.0f}{result['rounds']:>5}×{result['iterations']:<3}")
+    db.close()
+
+    covered = {Case(name, None).method for name in results}
+    uncovered = [name for name in public_methods() if name not in covered and name not in SKIPPED]
+    if uncovered and not args.only and not args.no_writes:
+        print(f"\n⚠️ public methods without a case: {', '.join(uncovered)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': datetime.now().isoformat(), 'python': sys.version.split()[0],
+                       'platform': platform.platform(), 'scale': args.scale, 'seed': summary['seed'],
+                       'rows': summary['counts'], 'results': results, 'uncovered': uncovered,
+                       'skipped': SKIPPED}, f, indent=2, ensure_ascii=False)
+        print(f"\nresults written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
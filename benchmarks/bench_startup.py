@@ -0,0 +1,310 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+"""
+BS = Benchmark Startup: زمن بدء التطبيق مقسماً إلى ثلاثة أجزاء.
+- import: زمن استيراد كل وحدة في عملية جديدة (مع اعتمادياتها)، e.g. config.settings و views.*.
+- db_init: DatabaseManager.__init__ على قاعدة بيانات جديدة (الترحيلات) مقابل قاعدة موجودة.
+- main: main() كاملة في عملية جديدة مع صفحة وهمية بدل ft.Page، حتى إنشاء أول واجهة (LoginView
+  عند توفر ترخيص صالح). "first_run" = مجلد جديد، "warm" = نفس المجلد مرة ثانية (قاعدة بيانات موجودة،
+  نتيجة تحقق الترخيص وبصمة الجهاز محفوظتان).
+- النتائج إلى JSON (--json) للمقارنة بين الإصدارات؛ --baseline يقارن الوسيط بملف سابق ويخرج بالرمز 1
+  إذا تباطأ أي قياس أكثر من --threshold.
+
+التشغيل:
+    python benchmarks/bench_startup.py --repeat 5 --json startup.json
+    python benchmarks/bench_startup.py --repeat 5 --baseline startup.json --threshold 0.2
+"""
+
+BASE_MODULES = ['config.settings', 'db.database_manager', 'utils.license_handler',
+                'utils.translation_manager', 'utils.theme_compiler', 'utils.startup']
+FIRST_VIEWS = ('LoginView', 'LicenseView')
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MIN_DELTA_MS = 2.0  # فروق أصغر من هذا ضجيج قياس وليست تراجعاً
+
+
+def modules() -> List[str]:
+    """الوحدات المقاسة: الأساسية + كل ملفات views + main"""
+    views = sorted(f"views.{os.path.splitext(os.path.basename(path))[0]}"
+                   for path in glob.glob(os.path.join(ROOT, 'views', '*.py'))
+                   if not path.endswith('__init__.py'))
+    return BASE_MODULES + views + ['main']
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    return {'best_ms': min(samples), 'median_ms': statistics.median(samples),
+            'mean_ms': statistics.fmean(samples), 'samples': len(samples)}
+
+
+def _child(args: List[str], cwd: str, timeout: float) -> Dict[str, Any]:
+    """تشغيل هذا الملف في عملية جديدة (--child ...) وقراءة سطر JSON الأخير من مخرجاته"""
+    process = subprocess.run([sys.executable, os.path.abspath(__file__)] + args, cwd=cwd,
+                             capture_output=True, text=True, timeout=timeout)
+    lines = [line for line in process.stdout.splitlines() if line.startswith('{')]
+    if process.returncode != 0 or not lines:
+        error = (process.stderr.strip().splitlines() or ['no output'])[-1]
+        return {'error': error}
+    return json.loads(lines[-1])
+
+
+# --- 1. الاستيراد ---
+
+def bench_imports(repeat: int, timeout: float) -> Dict[str, Any]:
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='bench_startup_import_')
+    for module in modules():
+        samples, error = [], None
+        for _ in range(repeat):
+            result = _child(['--child', 'import', module], workdir, timeout)
+            if 'error' in result:
+                error = result['error']
+                break
+            samples.append(result['ms'])
+        results[f"import {module}"] = {'error': error} if error else summarize(samples)
+    return results
+
+
+def child_import(module: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    __import__(module)
+    return {'ms': (time.perf_counter() - started) * 1000}
+
+
+# --- 2. DatabaseManager.__init__ ---
+
+def bench_db_init(repeat: int) -> Dict[str, Any]:
+    from db.database_manager import DatabaseManager
+
+    def timed(path: str) -> float:
+        started = time.perf_counter()
+        db = DatabaseManager(path)
+        elapsed = (time.perf_counter() - started) * 1000
+        db.close()
+        return elapsed
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_db_')
+    fresh = [timed(os.path.join(workdir, f"fresh_{i}.db")) for i in range(repeat)]
+    existing_path = os.path.join(workdir, 'existing.db')
+    timed(existing_path)
+    existing = [timed(existing_path) for _ in range(repeat)]
+    return {'db_init fresh': summarize(fresh), 'db_init existing': summarize(existing)}
+
+
+# --- 3. main() حتى أول واجهة ---
+
+class HeadlessPage:
+    """بديل ft.Page بدون نافذة: يسجل وقت إضافة أول واجهة (LoginView / LicenseView)"""
+
+    def __init__(self):
+        self.controls: List[Any] = []
+        self.overlay: List[Any] = []
+        self.title = ''
+        self.theme = None
+        self.horizontal_alignment = None
+        self.vertical_alignment = None
+        self.first_view: Optional[str] = None
+        self.first_view_at: Optional[float] = None
+        self.first_view_shown = threading.Event()
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+        for control in controls:
+            if self.first_view is None and type(control).__name__ in FIRST_VIEWS:
+                self.first_view_at = time.perf_counter()
+                self.first_view = type(control).__name__
+                self.first_view_shown.set()
+
+    def clean(self):
+        self.controls.clear()
+
+    def update(self):
+        pass
+
+    def set_clipboard(self, value: str):
+        pass
+
+
+def write_license(workdir: str) -> bool:
+    """مفتاح عام وترخيص موقع لهذا الجهاز داخل workdir (حتى يصل main إلى LoginView)"""
+    try:
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding, rsa
+    except ImportError:
+        return False
+    from utils.machine_fingerprint import generate_machine_id_hash
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    os.makedirs(os.path.join(workdir, 'config'), exist_ok=True)
+    with open(os.path.join(workdir, 'config', 'public_key.pem'), 'wb') as f:
+        f.write(key.public_key().public_bytes(serialization.Encoding.PEM,
+                                              serialization.PublicFormat.SubjectPublicKeyInfo))
+    license_data = {'license_key': 'BENCH-STARTUP', 'machine_id': generate_machine_id_hash()['machine_id_hash'],
+                    'issued_at': datetime.now().isoformat(), 'expires_at': None}
+    signature = key.sign(json.dumps(license_data, sort_keys=True).encode('utf-8'),
+                         padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+                         hashes.SHA256())
+    with open(os.path.join(workdir, 'license.json'), 'w') as f:
+        json.dump({**license_data, 'signature': signature.hex()}, f)
+    return True
+
+
+def child_main(timeout: float) -> Dict[str, Any]:
+    """main() واحدة في المجلد الحالي؛ الأزمنة بالمللي ثانية منذ بداية العملية الفرعية"""
+    started = time.perf_counter()
+    import main as app
+    from utils.startup import StartupPipeline
+    imported = time.perf_counter()
+
+    pipelines: List[StartupPipeline] = []
+
+    class RecordingPipeline(StartupPipeline):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pipelines.append(self)
+
+    app.StartupPipeline = RecordingPipeline
+    app.DB_PATH = os.path.join(os.getcwd(), 'bench_startup.db')  # لا نلمس config/appointment_manager.db
+    page = HeadlessPage()
+    app.main(page)
+    returned = time.perf_counter()
+    # المرحلة ui تضيف أول واجهة؛ انتظار كل المراحل يكفي (ولا ينتظر timeout إذا فشلت مرحلة)
+    if pipelines:
+        pipelines[0].wait(timeout)
+    else:
+        page.first_view_shown.wait(timeout)
+
+    def ms(at: Optional[float]) -> Optional[float]:
+        return (at - started) * 1000 if at is not None else None
+
+    report = pipelines[0].report() if pipelines else {'phases': {}, 'marks': {}}
+    return {
+        'import_ms': ms(imported),
+        'first_paint_ms': ms(returned),
+        'first_view_ms': ms(page.first_view_at),
+        'first_view': page.first_view,
+        'phases': {name: timing['duration_ms'] for name, timing in report['phases'].items()},
+        'errors': {name: timing['error'] for name, timing in report['phases'].items() if timing['error']},
+    }
+
+
+def bench_main(repeat: int, timeout: float, with_license: bool) -> Dict[str, Any]:
+    runs: Dict[str, List[Dict[str, Any]]] = {'first_run': [], 'warm': []}
+    licensed = False
+    for _ in range(repeat):
+        workdir = tempfile.mkdtemp(prefix='bench_startup_main_')
+        licensed = with_license and write_license(workdir)
+        for name in runs:
+            runs[name].append(_child(['--child', 'main', '--timeout', str(timeout)], workdir, timeout + 10))
+
+    results = {}
+    for name, samples in runs.items():
+        failed = next((sample for sample in samples if 'error' in sample or sample['first_view_ms'] is None), None)
+        if failed is not None:
+            results[f"main {name}"] = {'error': failed.get('error') or f"no first view: {failed.get('errors')}"}
+            continue
+        for metric in ('import_ms', 'first_paint_ms', 'first_view_ms'):
+            results[f"main {name} {metric[:-3]}"] = summarize([sample[metric] for sample in samples])
+        for phase in samples[0]['phases']:
+            durations = [sample['phases'].get(phase) for sample in samples]
+            if None not in durations:
+                results[f"main {name} phase {phase}"] = summarize(durations)
+        results[f"main {name} view"] = {'view': samples[0]['first_view'], 'licensed': licensed,
+                                                'errors': samples[0]['errors']}
+    return results
+
+
+# --- المقارنة مع نتائج سابقة ---
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+            min_delta_ms: float) -> List[str]:
+    """أسماء القياسات التي تباطأ وسيطها أكثر من threshold (ومن min_delta_ms) مقارنة بالملف السابق"""
+    regressions = []
+    print(f"\n{'metric':<48}{'baseline':>11}{'current':>11}{'change':>9}")
+    for name, result in results.items():
+        old = baseline.get(name, {})
+        if 'median_ms' not in result or 'median_ms' not in old:
+            continue
+        change = result['median_ms'] / old['median_ms'] - 1 if old['median_ms'] else 0.0
+        regressed = change > threshold and result['median_ms'] - old['median_ms'] > min_delta_ms
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<48}{old['median_ms']:>11.2f}{result['median_ms']:>11.2f}{change:>+9.1%}"
+              f"{'  ⚠️ regression' if regressed else ''}")
+    return regressions
+
+
+def run_section(name: str, function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return function()
+    except Exception as e:
+        return {name: {'error': f"{type(e).__name__}: {e}"}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time: module imports, DatabaseManager init, main() to first view")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', choices=('import', 'db_init', 'main'), action='append',
+                        help="run only these sections (repeatable)")
+    parser.add_argument('--no-license', action='store_true', help="do not write a signed license (main stops at LicenseView)")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    parser.add_argument('--json', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown of the median (0.2 = 20%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    parser.add_argument('--child', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = child_import(args.child[1]) if args.child[0] == 'import' else child_main(args.timeout)
+        print(json.dumps(result))
+        return
+
+    sections = args.only or ['import', 'db_init', 'main']
+    results: Dict[str, Any] = {}
+    if 'import' in sections:
+        results.update(run_section('import', lambda: bench_imports(args.repeat, args.timeout)))
+    if 'db_init' in sections:
+        results.update(run_section('db_init', lambda: bench_db_init(args.repeat)))
+    if 'main' in sections:
+        results.update(run_section('main', lambda: bench_main(args.repeat, args.timeout, not args.no_license)))
+
+    print(f"{'metric':<48}{'best_ms':>10}{'median_ms':>11}")
+    for name, result in results.items():
+        if 'median_ms' in result:
+            print(f"{name:<48}{result['best_ms']:>10.2f}{result['median_ms']:>11.2f}")
+        else:
+            print(f"{name:<48}  {result.get('error') or result}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'timestamp': datetime.now().isoformat(), 'python': platform.python_version(),
+                                'platform': platform.platform(), 'repeat': args.repeat},
+                       'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"\nresults written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == '__main__':
+    main()
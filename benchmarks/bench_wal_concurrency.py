@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_manager import DatabaseManager
+
+"""
+BWC = Benchmark WAL Concurrency: القراءة أثناء الكتابة قبل وبعد PRAGMA_PROFILE.
+- خيط كتابة واحد يحجز مواعيد (book_appointment) في معاملات متتالية، كما تفعل شاشة الاستقبال.
+- عدة خيوط قراءة تستدعي get_daily_appointments باستمرار، كما تفعل شاشة التقارير.
+- "rollback" = الإعدادات القديمة (journal_mode=DELETE, synchronous=FULL)، "wal" = PRAGMA_PROFILE.
+
+التشغيل:
+    python benchmarks/bench_wal_concurrency.py --seconds 5 --readers 4
+"""
+
+PROFILES = {
+    'rollback': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'mmap_size': None,
+                 'cache_size': None, 'temp_store': None},
+    'wal': {},
+}
+SLOTS_PER_DAY = 16  # مواعيد 30 دقيقة من 09:00 إلى 17:00
+
+
+def _slot(i: int) -> Dict[str, str]:
+    """موعد رقم i بدون تداخل: 16 موعداً في اليوم"""
+    day, slot = divmod(i, SLOTS_PER_DAY)
+    minutes = 9 * 60 + slot * 30
+    return {'date': f"2030-{1 + day // 28:02d}-{1 + day % 28:02d}",
+            'start_time': f"{minutes // 60:02d}:{minutes % 60:02d}"}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_profile(name: str, seconds: float, readers: int, db_dir: str) -> Dict[str, Any]:
+    """تشغيل سيناريو واحد وإرجاع النتائج"""
+    db_path = os.path.join(db_dir, f"bench_{name}.db")
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    # اتصال لكل خيط: الكاتب + القراء + الخيط الرئيسي (التهيئة)
+    db = DatabaseManager(db_path, pool_size=readers + 2, collect_stats=False,
+                         slow_query_ms=None, pragmas=PROFILES[name])
+    user_id = db.add_user({'username': 'bench', 'password_hash': 'x'})
+    client_id = db.add_client({'full_name': 'Bench Client', 'phone_number': '000'})
+    service_id = db.add_service({'name_ar': 'خدمة', 'duration_minutes': 30, 'price': 100.0})
+    journal_mode = db.execute_query("PRAGMA journal_mode", fetch_one=True)[0]
+
+    stop = threading.Event()
+    writes = [0]
+    read_latencies: List[List[float]] = [[] for _ in range(readers)]
+    read_errors = [0] * readers
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            appointment = {'client_id': client_id, 'user_id': user_id, 'service_id': service_id,
+                           'duration_minutes': 30, 'status': 'Confirmed', **_slot(i)}
+            invoice = {'created_by_user_id': user_id, 'total_amount': 100.0, 'payment_status': 'unpaid'}
+            if db.book_appointment(appointment, invoice):
+                writes[0] += 1
+            i += 1
+
+    def reader(index: int):
+        i = 0
+        while not stop.is_set():
+            date = _slot(i * SLOTS_PER_DAY)['date']
+            started = time.perf_counter()
+            result = db.get_daily_appointments(date)
+            read_latencies[index].append((time.perf_counter() - started) * 1000)
+            if result is None:
+                read_errors[index] += 1
+            i = (i + 1) % max(1, writes[0] // SLOTS_PER_DAY + 1)
+
+    threads = [threading.Thread(target=writer)] + [
+        threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    latencies = [value for values in read_latencies for value in values]
+    return {
+        'profile': name,
+        'journal_mode': journal_mode,
+        'writes_per_s': writes[0] / seconds,
+        'reads_per_s': len(latencies) / seconds,
+        'read_p50_ms': _percentile(latencies, 0.50),
+        'read_p95_ms': _percentile(latencies, 0.95),
+        'read_max_ms': max(latencies) if latencies else 0.0,
+        'read_errors': sum(read_errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read/write concurrency: rollback journal vs WAL")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--db-dir', default=None, help="directory for the benchmark databases (default: temp dir)")
+    args = parser.parse_args()
+
+    db_dir = args.db_dir or tempfile.mkdtemp(prefix='bench_wal_')
+    columns = ('profile', 'journal_mode', 'writes_per_s', 'reads_per_s',
+               'read_p50_ms', 'read_p95_ms', 'read_max_ms', 'read_errors')
+    print(' '.join(f"{c:>13}" for c in columns))
+    for name in PROFILES:
+        result = run_profile(name, args.seconds, args.readers, db_dir)
+        print(' '.join(f"{result[c]:>13.2f}" if isinstance(result[c], float) else f"{result[c]:>13}"
+                       for c in columns))
+
+
+if __name__ == '__main__':
+    main()
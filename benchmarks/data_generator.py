@@ -0,0 +1,380 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.database_manager import DatabaseManager
+
+"""
+DG = Data Generator: بيانات اصطناعية ثابتة (بـ seed) بحجم واقعي لاختبارات الأداء.
+- عملاء بأسماء عربية وفرنسية وإنجليزية (مع أرقام هاتف فريدة)، خدمات، مواعيد على عدة سنوات بتوزيع
+  حالات واقعي، فواتير للمواعيد المحضورة، وسجلات تدقيق.
+- الحجم = العدد التقريبي لكل الصفوف (e.g. 10k حتى 10m)؛ التوزيع بين الجداول في TABLE_SHARES.
+- الصفوف تُولد وتُدخل على دفعات (bulk_add_*)، فالذاكرة لا تزيد مع الحجم.
+- نفس seed ونفس الحجم = نفس البيانات تماماً (لكل جدول مولد عشوائي مستقل).
+
+التشغيل:
+    python benchmarks/data_generator.py --scale 1m --years 3 --db bench.db
+"""
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+DEFAULT_SEED = 42
+DEFAULT_YEARS = 3
+DEFAULT_END_DATE = '2025-12-31'
+BLOCK_SIZE = 20_000  # صفوف كل استدعاء bulk_add_* (معرفات الدفعة فقط في الذاكرة)
+
+# نسبة كل جدول من الحجم الكلي؛ الفواتير ناتجة عن المواعيد المحضورة (حوالي 0.6 منها، أي 0.3 من الحجم)
+TABLE_SHARES = {'clients': 0.05, 'appointments': 0.5, 'audit_logs': 0.15}
+MIN_CLIENTS = 20
+
+# (الحالة، الوزن) للمواعيد الماضية؛ المواعيد بعد تاريخ "اليوم" (آخر 30 يوماً من المدى) مؤكدة أو ملغاة
+PAST_STATUSES = (('Attended', 62), ('Absent', 11), ('Cancelled', 14), ('Confirmed', 13))
+FUTURE_STATUSES = (('Confirmed', 88), ('Cancelled', 12))
+PAYMENT_STATUSES = (('paid', 78), ('unpaid', 15), ('partial', 7))
+AUDIT_ACTIONS = (('CREATE_APPOINTMENT', 40), ('UPDATE_APPOINTMENT', 22), ('LOGIN', 18), ('CREATE_CLIENT', 8),
+                 ('PRINT_INVOICE', 7), ('CANCEL_APPOINTMENT', 5))
+NAME_LANGUAGES = (('ar', 55), ('fr', 30), ('en', 15))
+
+FIRST_NAMES = {
+    'ar': ['محمد', 'أحمد', 'يوسف', 'عمر', 'علي', 'حسن', 'خالد', 'إبراهيم', 'فاطمة', 'خديجة', 'مريم', 'عائشة',
+           'زينب', 'سلمى', 'نور', 'هدى', 'ياسين', 'أمين', 'سارة', 'ليلى'],
+    'fr': ['Jean', 'Pierre', 'Louis', 'Antoine', 'Nicolas', 'Julien', 'Camille', 'Chloé', 'Léa', 'Manon',
+           'Élise', 'Amélie', 'Hélène', 'François', 'Mathéo', 'Inès'],
+    'en': ['James', 'John', 'Robert', 'Michael', 'David', 'Emma', 'Olivia', 'Sophia', 'Emily', 'Grace',
+           'Daniel', 'Hannah'],
+}
+LAST_NAMES = {
+    'ar': ['العلوي', 'الإدريسي', 'بنعلي', 'الفاسي', 'التازي', 'المراكشي', 'الحسني', 'بن يوسف', 'الشرقاوي',
+           'القاسمي', 'الزهراني', 'البكري', 'الأنصاري', 'الصديقي'],
+    'fr': ['Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Lefèvre',
+           'Moreau', 'Laurent', 'Garçon'],
+    'en': ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson', 'Taylor', 'Clark'],
+}
+EMAIL_DOMAINS = ['gmail.com', 'outlook.fr', 'yahoo.com', 'menara.ma']
+NOTES = ['VIP', 'Allergie', 'Préfère le matin', 'يفضل الاتصال مساءً', 'New patient', None, None, None]
+
+# (name_ar, name_fr, price, duration_minutes, is_active)
+SERVICES = [
+    ('استشارة', 'Consultation', 200.0, 30, 1),
+    ('متابعة', 'Suivi', 150.0, 20, 1),
+    ('فحص شامل', 'Bilan complet', 450.0, 60, 1),
+    ('تنظيف', 'Nettoyage', 300.0, 45, 1),
+    ('أشعة', 'Radiographie', 250.0, 15, 1),
+    ('تحاليل', 'Analyses', 180.0, 15, 1),
+    ('علاج طبيعي', 'Kinésithérapie', 220.0, 45, 1),
+    ('جلسة تدليك', 'Massage', 260.0, 60, 1),
+    ('تلقيح', 'Vaccination', 120.0, 10, 1),
+    ('استشارة عن بعد', 'Téléconsultation', 150.0, 20, 1),
+    ('شهادة طبية', 'Certificat médical', 100.0, 10, 1),
+    ('خدمة قديمة', 'Ancien service', 90.0, 30, 0),
+]
+USERS = ['reception_1', 'reception_2', 'reception_3', 'doctor_1']
+
+# ساعات العمل: 08:00 - 18:00 بخطوة 15 دقيقة
+SLOTS = [f"{minutes // 60:02d}:{minutes % 60:02d}" for minutes in range(8 * 60, 18 * 60, 15)]
+
+
+def parse_scale(value: str) -> int:
+    """'10k' / '1m' / '250000' -> عدد الصفوف"""
+    text = str(value).strip().lower().replace('_', '')
+    if text in SCALES:
+        return SCALES[text]
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    number = float(text[:-1]) if multiplier > 1 else float(text)
+    rows = int(number * multiplier)
+    if rows <= 0:
+        raise ValueError(f"invalid scale {value!r}")
+    return rows
+
+
+def plan(rows: int) -> Dict[str, int]:
+    """
+    توزيع الحجم على الجداول.
+
+    Args:
+        rows (int): العدد التقريبي لكل الصفوف.
+    Returns:
+        Dict[str, int]: {'clients': 500, 'services': 12, 'appointments': 5000, 'audit_logs': 1500}
+    """
+    return {
+        'clients': max(MIN_CLIENTS, int(rows * TABLE_SHARES['clients'])),
+        'services': len(SERVICES),
+        'appointments': int(rows * TABLE_SHARES['appointments']),
+        'audit_logs': int(rows * TABLE_SHARES['audit_logs']),
+    }
+
+
+def _weighted(rng: random.Random, choices: Tuple[Tuple[Any, int], ...]) -> Callable[[], Any]:
+    """دالة سحب سريعة من (القيمة، الوزن)"""
+    values = [value for value, _ in choices]
+    cumulative, total = [], 0
+    for _, weight in choices:
+        total += weight
+        cumulative.append(total)
+    return lambda: rng.choices(values, cum_weights=cumulative)[0]
+
+
+def _table_rng(seed: int, table: str) -> random.Random:
+    """مولد مستقل لكل جدول: تغيير عدد صفوف جدول لا يغير بيانات الجداول الأخرى"""
+    return random.Random(f"{seed}:{table}")
+
+
+def _date_range(years: int, end_date: str) -> Tuple[date, date]:
+    end = date.fromisoformat(end_date)
+    return end - timedelta(days=365 * years - 1), end
+
+
+# --- مولدات الصفوف ---
+
+def client_rows(count: int, seed: int = DEFAULT_SEED, end_date: str = DEFAULT_END_DATE,
+                years: int = DEFAULT_YEARS) -> Iterator[Dict]:
+    """
+    Args:
+        count (int): عدد العملاء.
+    Returns:
+        Iterator[Dict]: {'full_name': 'فاطمة العلوي', 'phone_number': '0612345678', 'email': None, 'notes': None,
+            'created_at': '2023-02-11T10:15:00'} بنفس الأعمدة لكل صف (executemany دفعة واحدة).
+    """
+    rng = _table_rng(seed, 'clients')
+    language = _weighted(rng, NAME_LANGUAGES)
+    start, end = _date_range(years, end_date)
+    days = (end - start).days + 1
+    for index in range(count):
+        lang = language()
+        first, last = rng.choice(FIRST_NAMES[lang]), rng.choice(LAST_NAMES[lang])
+        email = None
+        if lang != 'ar' and rng.random() < 0.6:
+            email = f"{first}.{last}.{index}@{rng.choice(EMAIL_DOMAINS)}".lower().replace(' ', '')
+        created = start + timedelta(days=rng.randrange(days))
+        yield {
+            'full_name': f"{first} {last}",
+            # 7919 أولي مع 10^8: أرقام فريدة لأي index < 10^8 دون تخزين ما سبق
+            'phone_number': f"0{rng.choice('567')}{(index * 7919 + 12345) % 10 ** 8:08d}",
+            'email': email,
+            'notes': rng.choice(NOTES),
+            'created_at': f"{created.isoformat()}T{rng.choice(SLOTS)}:00",
+        }
+
+
+def service_rows() -> Iterator[Dict]:
+    for name_ar, name_fr, price, duration, is_active in SERVICES:
+        yield {'name_ar': name_ar, 'name_fr': name_fr, 'price': price, 'duration_minutes': duration,
+               'is_active': is_active}
+
+
+def appointment_rows(count: int, client_ids: List[int], user_ids: List[int], services: List[Dict],
+                     seed: int = DEFAULT_SEED, years: int = DEFAULT_YEARS,
+                     end_date: str = DEFAULT_END_DATE) -> Iterator[Dict]:
+    """
+    مواعيد موزعة على المدى (بدون أيام الأحد)، مرتبة بالتاريخ كما تتراكم فعلياً.
+
+    Args:
+        count (int): عدد المواعيد.
+        client_ids (List[int]) / user_ids (List[int]): المعرفات الموجودة.
+        services (List[Dict]): [{'service_id': 1, 'duration_minutes': 30, 'is_active': 1, ...}]
+    Returns:
+        Iterator[Dict]: صفوف Appointments بنفس الأعمدة؛ عدد قليل من العملاء يأخذ حصة أكبر (عملاء دائمون).
+    """
+    rng = _table_rng(seed, 'appointments')
+    start, end = _date_range(years, end_date)
+    today = end - timedelta(days=30)
+    working_days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)
+                    if (start + timedelta(days=offset)).weekday() != 6]
+    past_status, future_status = _weighted(rng, PAST_STATUSES), _weighted(rng, FUTURE_STATUSES)
+    active = [service for service in services if service['is_active']] or services
+    regulars = client_ids[:max(1, len(client_ids) // 10)]
+    for index in range(count):
+        day = working_days[index * len(working_days) // count] if count else start
+        service = rng.choice(active) if rng.random() < 0.9 else None
+        status = past_status() if day <= today else future_status()
+        created = day - timedelta(days=min(rng.expovariate(1 / 7), 120))
+        yield {
+            'client_id': rng.choice(regulars) if rng.random() < 0.3 else rng.choice(client_ids),
+            'user_id': rng.choice(user_ids),
+            'service_id': service['service_id'] if service else None,
+            'date': day.isoformat(),
+            'start_time': rng.choice(SLOTS),
+            'duration_minutes': None if service and rng.random() < 0.7 else rng.choice((15, 30, 45, 60)),
+            'status': status,
+            'notes': rng.choice(NOTES),
+            'is_paid': 1 if status == 'Attended' and rng.random() < 0.85 else 0,
+            'reminder_set': 1 if rng.random() < 0.4 else 0,
+            'created_at': f"{created.isoformat()}T{rng.choice(SLOTS)}:00",
+            'updated_at': f"{day.isoformat()}T{rng.choice(SLOTS)}:00",
+        }
+
+
+def invoice_rows(appointments: Iterable[Tuple[int, Dict]], prices: Dict[int, float], first_number: int,
+                 rng: random.Random) -> Iterator[Dict]:
+    """
+    فاتورة لكل موعد محضور.
+
+    Args:
+        appointments (Iterable[Tuple[int, Dict]]): (appointment_id، صف الموعد).
+        prices (Dict[int, float]): service_id -> السعر.
+        first_number (int): invoice_number للفاتورة الأولى (تتزايد بعدها).
+        rng (random.Random): مولد جدول الفواتير (يستمر بين الدفعات).
+    Returns:
+        Iterator[Dict]: صفوف Invoices.
+    """
+    payment = _weighted(rng, PAYMENT_STATUSES)
+    number = first_number
+    for appointment_id, row in appointments:
+        if row['status'] != 'Attended':
+            continue
+        price = prices.get(row['service_id']) or float(rng.randint(10, 60) * 10)
+        yield {'invoice_number': number, 'appointment_id': appointment_id, 'created_by_user_id': row['user_id'],
+               'issue_date': row['date'], 'total_amount': price, 'payment_status': payment()}
+        number += 1
+
+
+def audit_log_rows(count: int, user_ids: List[int], seed: int = DEFAULT_SEED, years: int = DEFAULT_YEARS,
+                   end_date: str = DEFAULT_END_DATE) -> Iterator[Dict]:
+    """
+    Returns:
+        Iterator[Dict]: {'user_id': 2, 'timestamp': '2024-03-04T10:30:00', 'action_type': 'LOGIN',
+            'details': '...', 'related_data': '{"appointment_id": 12}'} مرتبة زمنياً.
+    """
+    rng = _table_rng(seed, 'audit_logs')
+    action = _weighted(rng, AUDIT_ACTIONS)
+    start, end = _date_range(years, end_date)
+    span = (end - start).days + 1
+    for index in range(count):
+        day = start + timedelta(days=index * span // count)
+        action_type = action()
+        reference = rng.randint(1, max(1, count))
+        yield {
+            'user_id': rng.choice(user_ids),
+            'timestamp': f"{day.isoformat()}T{rng.choice(SLOTS)}:{rng.randrange(60):02d}",
+            'action_type': action_type,
+            'details': f"{action_type.lower()} #{reference}",
+            'related_data': None if action_type == 'LOGIN' else f'{{"id": {reference}}}',
+        }
+
+
+# --- الإدخال ---
+
+def _blocks(rows: Iterable[Dict], size: int = BLOCK_SIZE) -> Iterator[List[Dict]]:
+    iterator = iter(rows)
+    while True:
+        block = list(islice(iterator, size))
+        if not block:
+            return
+        yield block
+
+
+def _insert(bulk_add: Callable[[List[Dict]], Dict[str, List]], block: List[Dict], table: str) -> List[int]:
+    result = bulk_add(block)
+    if result['conflicts']:
+        raise RuntimeError(f"DG {len(result['conflicts'])} {table} rows rejected, first: "
+                           f"{result['conflicts'][0]['error']}")
+    return result['inserted_ids']
+
+
+def _users(db: DatabaseManager) -> List[int]:
+    """مستخدمو البيانات (موجودون مسبقاً إذا أعيد التوليد على نفس القاعدة)"""
+    ids = []
+    for username in USERS:
+        user = db.get_user_by_username(username)
+        user_id = user['user_id'] if user else db.add_user(
+            {'username': username, 'password_hash': 'x', 'full_name': username.replace('_', ' ').title(),
+             'role': 'doctor' if username.startswith('doctor') else 'receptionist'})
+        if user_id is None:
+            raise RuntimeError(f"DG could not create user {username!r}")
+        ids.append(user_id)
+    return ids
+
+
+def generate(db: DatabaseManager, rows: int = SCALES['10k'], years: int = DEFAULT_YEARS, seed: int = DEFAULT_SEED,
+             end_date: str = DEFAULT_END_DATE,
+             progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+    """
+    ملء قاعدة بيانات (فارغة عادة) بالبيانات الاصطناعية.
+
+    Args:
+        db (DatabaseManager): القاعدة الهدف.
+        rows (int): الحجم التقريبي (كل الجداول)، e.g. parse_scale('1m').
+        years (int): عدد سنوات المواعيد والسجلات، حتى end_date.
+        seed (int): نفس seed = نفس البيانات.
+        end_date (str): آخر يوم في البيانات؛ آخر 30 يوماً مواعيد مستقبلية (Confirmed/Cancelled).
+        progress (Optional[Callable[[str, int], None]]): (الجدول، عدد الصفوف المدخلة حتى الآن).
+    Returns:
+        Dict[str, Any]: {'counts': {'clients': 500, ..., 'invoices': 3000}, 'start_date': '2023-01-01',
+            'end_date': '2025-12-31', 'seed': 42, 'seconds': 1.9}
+    """
+    started = time.perf_counter()
+    counts = plan(rows)
+    start, end = _date_range(years, end_date)
+    report = progress or (lambda table, done: None)
+
+    user_ids = _users(db)
+    service_block = list(service_rows())
+    services = [{**row, 'service_id': service_id}
+                for row, service_id in zip(service_block, _insert(db.bulk_add_services, service_block, 'Services'))]
+    prices = {service['service_id']: service['price'] for service in services}
+
+    client_ids: List[int] = []
+    for block in _blocks(client_rows(counts['clients'], seed, end_date, years)):
+        client_ids.extend(_insert(db.bulk_add_clients, block, 'Clients'))
+        report('clients', len(client_ids))
+
+    # المواعيد ثم فواتير كل دفعة بمعرفاتها، دون الاحتفاظ بكل المعرفات
+    invoices_rng = _table_rng(seed, 'invoices')
+    first_number = (db.execute_query("SELECT COALESCE(MAX(invoice_number), 1000) + 1 FROM Invoices",
+                                     fetch_one=True) or [1001])[0]
+    appointments = invoices = 0
+    for block in _blocks(appointment_rows(counts['appointments'], client_ids, user_ids, services, seed, years,
+                                          end_date)):
+        ids = _insert(db.bulk_add_appointments, block, 'Appointments')
+        appointments += len(ids)
+        invoice_block = list(invoice_rows(zip(ids, block), prices, first_number + invoices, invoices_rng))
+        if invoice_block:
+            invoices += len(_insert(db.bulk_add_invoices, invoice_block, 'Invoices'))
+        report('appointments', appointments)
+
+    audit_logs = 0
+    for block in _blocks(audit_log_rows(counts['audit_logs'], user_ids, seed, years, end_date)):
+        audit_logs += len(_insert(db.bulk_add_audit_logs, block, 'Audit_Logs'))
+        report('audit_logs', audit_logs)
+
+    counts = {'users': len(user_ids), 'services': len(services), 'clients': len(client_ids),
+              'appointments': appointments, 'invoices': invoices, 'audit_logs': audit_logs}
+    return {'counts': counts, 'start_date': start.isoformat(), 'end_date': end.isoformat(), 'seed': seed,
+            'seconds': round(time.perf_counter() - started, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a database with seeded synthetic clinic data")
+    parser.add_argument('--scale', default='10k', help=f"approximate total rows: {', '.join(SCALES)} or a number")
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE)
+    parser.add_argument('--db', default=None, help="database file (default: new file in a temp dir)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='data_generator_'), 'synthetic.db')
+    db = DatabaseManager(db_path, collect_stats=False, slow_query_ms=None)
+    last_print = [0.0]
+
+    def progress(table: str, done: int):
+        if time.perf_counter() - last_print[0] > 2:
+            last_print[0] = time.perf_counter()
+            print(f"  {table}: {done:,} rows", flush=True)
+
+    summary = generate(db, parse_scale(args.scale), args.years, args.seed, args.end_date, progress)
+    db.close()
+    print(f"{db_path}: {sum(summary['counts'].values()):,} rows ({summary['start_date']} .. {summary['end_date']}, "
+          f"seed {summary['seed']}) in {summary['seconds']} s")
+    for table, count in summary['counts'].items():
+        print(f"{table:>13} {count:>12,}")
+
+
+if __name__ == '__main__':
+    main()
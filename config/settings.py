@@ -1,4 +1,6 @@
 import os
+import threading
+from typing import Any, Dict, Optional
 from db.database_manager import DatabaseManager
 
 
@@ -9,6 +11,8 @@ LICENSE_FILE_NAME = 'license.json'
 
 LICENSE_FILE_PATH = 'license.json'
 PUBLIC_KEY_PATH = 'config/public_key.pem' 
+# توقيتات آخر بدء للتطبيق (utils/startup.py: write_report)
+STARTUP_TIMINGS_PATH = 'config/startup_timings.json'
 # --- إعدادات التطبيق العامة ---
 APP_TITLE = "Appointment Management System"
 DEFAULT_LANGUAGE = 'fr' 
@@ -21,17 +25,80 @@ STATUS_CANCELLED = 'Cancelled'
 ALL_STATUSES = [STATUS_CONFIRMED, STATUS_ATTENDED, STATUS_ABSENT, STATUS_CANCELLED]
 
 
-#--- إعدادات الثيمات ---
-DEFAULT_THEME_ID = DatabaseManager.get_default_theme()
-DEFAULT_THEME = DatabaseManager.get_current_theme() or {}
-
-#------ الترجمة ------
-ALL_TRANSLATION = DatabaseManager.get_translations()
-
 SUPPORTED_LANGUAGES = {
     'Eng': 'English',
     'Ar': 'العربية',
     'Fr': 'Français',
 }
 
-ALL_SETTINGS = DatabaseManager.get_settings()
\ No newline at end of file
+
+#--- الإعدادات المخزنة في قاعدة البيانات (تحميل كسول) ---
+class LazySettings:
+    """
+    الإعدادات المخزنة في قاعدة البيانات (الثيم، الترجمات، Settings) تُقرأ عند أول وصول فقط
+    ثم تُحفظ في الذاكرة، فاستيراد هذا الملف لا يكلف أي قراءة من القرص.
+
+    Example:
+        app_settings.bind(db_manager)      # اختياري: استخدام نفس مدير قاعدة البيانات
+        theme = app_settings.DEFAULT_THEME # أول وصول: استعلام واحد
+        app_settings.invalidate('DEFAULT_THEME')  # بعد تغيير الثيم
+    """
+
+    # الاسم -> (دالة DatabaseManager، القيمة الافتراضية إذا أرجعت None)
+    LOADERS = {
+        'DEFAULT_THEME_ID': ('get_default_theme', None),
+        'DEFAULT_THEME': ('get_current_theme', {}),
+        'ALL_TRANSLATION': ('get_translations', {}),
+        'ALL_SETTINGS': ('get_settings', None),
+    }
+
+    def __init__(self, db_path: str = DB_PATH):
+        self._db_path = db_path
+        self._db: Optional[DatabaseManager] = None
+        self._values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, db_manager: DatabaseManager):
+        """استخدام مدير قاعدة بيانات موجود بدلاً من إنشاء واحد عند أول وصول"""
+        with self._lock:
+            self._db = db_manager
+            self._values.clear()
+
+    def _database(self) -> DatabaseManager:
+        if self._db is None:
+            self._db = DatabaseManager(db_path=self._db_path)
+        return self._db
+
+    def __getattr__(self, name: str) -> Any:
+        loader = self.LOADERS.get(name)
+        if loader is None:
+            raise AttributeError(name)
+        with self._lock:
+            if name not in self._values:
+                method, default = loader
+                value = getattr(self._database(), method)()
+                self._values[name] = default if value is None else value
+            return self._values[name]
+
+    def invalidate(self, name: Optional[str] = None):
+        """
+        إلغاء القيم المحفوظة لتُقرأ من جديد عند الوصول التالي.
+
+        Args:
+            name (Optional[str]): e.g. 'DEFAULT_THEME'. None = جميع القيم.
+        """
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+
+app_settings = LazySettings()
+
+
+def __getattr__(name: str) -> Any:
+    """توافق مع الاستيراد القديم: from config.settings import DEFAULT_THEME (يُقرأ عند الاستيراد نفسه)"""
+    if name in LazySettings.LOADERS:
+        return getattr(app_settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,316 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as date_cls, timedelta
+from typing import Dict, List, Optional, Tuple, Any
+
+from db.availability import FREE_STATUSES, DEFAULT_DURATION_MINUTES, to_minutes
+
+try:  # اختياري: بدونه تُحسب نفس المؤشرات بحلقات Python عادية
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+"""
+DA = Dashboard Analytics: مؤشرات لوحة التحكم (KPIs) لفترة زمنية.
+- مواعيد الفترة تُقرأ باستعلام واحد وتُخزن كأعمدة (columnar) بدل قائمة dict:
+  التاريخ كرقم يوم (date.toordinal)، الدقائق int16، الحالة والخدمة كرموز فئوية (categorical codes).
+- كل المؤشرات تُحسب في مرور واحد على الأعمدة (NumPy: bincount / عمليات متجهية).
+- الأعمدة محفوظة لكل فترة؛ تُعاد قراءتها إذا تغيرت قاعدة البيانات (write_version) أو بعد cache_ttl ثانية
+  (كتابة من عملية أخرى).
+- بدون NumPy: نفس الأعمدة كقوائم Python ونفس النتائج (أبطأ).
+"""
+
+logger = logging.getLogger('DBM.analytics')
+
+DEFAULT_CACHE_SIZE = 8       # عدد الفترات المحفوظة
+DEFAULT_CACHE_TTL = 60.0     # ثوانٍ
+ATTENDED_STATUSES = frozenset({'attended'})
+NO_SHOW_STATUSES = frozenset({'absent', 'no-show', 'no_show', 'noshow'})
+
+# أنواع الحالات المستخدمة في الحساب
+_KIND_OTHER, _KIND_ATTENDED, _KIND_NO_SHOW, _KIND_CANCELLED = range(4)
+
+_COLUMNS_SQL = """
+SELECT A.date, A.start_time,
+       COALESCE(A.duration_minutes, S.duration_minutes) AS duration_minutes,
+       A.status, COALESCE(A.service_id, 0) AS service_id,
+       SUBSTR(A.created_at, 1, 10) AS created_day,
+       COALESCE(I.total_amount, 0) AS revenue
+FROM Appointments A
+LEFT JOIN Services S ON A.service_id = S.service_id
+LEFT JOIN Invoices I ON I.appointment_id = A.appointment_id
+WHERE A.date BETWEEN ? AND ?
+"""
+
+
+def _status_kind(status: str) -> int:
+    status = str(status or '').lower()
+    if status in ATTENDED_STATUSES:
+        return _KIND_ATTENDED
+    if status in NO_SHOW_STATUSES:
+        return _KIND_NO_SHOW
+    if status in FREE_STATUSES:
+        return _KIND_CANCELLED
+    return _KIND_OTHER
+
+
+def _rate(part: float, total: float) -> Optional[float]:
+    return round(float(part) / float(total), 4) if total else None
+
+
+class AppointmentColumns:
+    """
+    مواعيد فترة واحدة كأعمدة متوازية (مصفوفات NumPy أو قوائم Python).
+
+    Attributes:
+        day: رقم اليوم (date.toordinal()).
+        start / duration: الدقائق منذ منتصف الليل / مدة الموعد.
+        status: رمز الحالة، الاسم في statuses[status].
+        service: رمز الخدمة، المعرف في services[service] (0 = بدون خدمة).
+        lead_days: الأيام بين إنشاء الموعد وتاريخه (-1 إذا كان created_at فارغاً).
+        revenue: مبلغ الفاتورة المرتبطة (0 إذا لم توجد).
+        work_start / work_end: ساعات العمل لكل يوم من الفترة بالترتيب (0, 0 ليوم عطلة).
+    """
+
+    __slots__ = ('first_day', 'day', 'start', 'duration', 'status', 'service', 'lead_days', 'revenue',
+                 'statuses', 'services', 'work_start', 'work_end', 'loaded_at', 'version')
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+
+class AnalyticsEngine:
+    """
+    محرك مؤشرات لوحة التحكم فوق DatabaseManager.
+
+    Example:
+        kpis = db.analytics.kpis('2024-06-01', '2024-06-30')
+        kpis['attendance_rate']            # 0.87
+        kpis['no_show_rate_by_weekday']    # {0: 0.1, 1: 0.05, ...} (الاثنين = 0)
+    """
+
+    def __init__(self, db_manager: Any, cache_size: int = DEFAULT_CACHE_SIZE,
+                 cache_ttl: float = DEFAULT_CACHE_TTL, use_numpy: Optional[bool] = None):
+        """
+        Args:
+            db_manager (DatabaseManager): مدير قاعدة البيانات.
+            cache_size (int): عدد الفترات المحفوظة في الذاكرة.
+            cache_ttl (float): عمر الأعمدة المحفوظة بالثواني.
+            use_numpy (Optional[bool]): None = NumPy إذا كان مثبتاً.
+        """
+        self._db = db_manager
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self.use_numpy = np is not None if use_numpy is None else (use_numpy and np is not None)
+        self._cache: 'OrderedDict[Tuple[str, str], AppointmentColumns]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- تحميل الأعمدة ---
+
+    def load(self, start_date: str, end_date: str) -> AppointmentColumns:
+        """
+        أعمدة مواعيد الفترة (من الذاكرة إذا كانت صالحة).
+
+        Args:
+            start_date (str): 'YYYY-MM-DD' بداية الفترة.
+            end_date (str): 'YYYY-MM-DD' نهاية الفترة.
+        Returns:
+            AppointmentColumns: الأعمدة.
+        """
+        key = (start_date, end_date)
+        version = self._db.write_version
+        with self._lock:
+            columns = self._cache.get(key)
+            if (columns is not None and columns.version == version
+                    and time.monotonic() - columns.loaded_at < self._cache_ttl):
+                self._cache.move_to_end(key)
+                return columns
+
+        columns = self._read(start_date, end_date)
+        columns.version = version
+        with self._lock:
+            self._cache[key] = columns
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return columns
+
+    def invalidate(self):
+        """مسح الأعمدة المحفوظة"""
+        with self._lock:
+            self._cache.clear()
+
+    def _read(self, start_date: str, end_date: str) -> AppointmentColumns:
+        started = time.perf_counter()
+        rows = self._db.execute_query(_COLUMNS_SQL, (start_date, end_date))
+        if rows is None:
+            raise RuntimeError(f"could not load appointments for {start_date} - {end_date}")
+
+        # نفس التواريخ والأوقات تتكرر كثيراً: تحويل كل قيمة مرة واحدة
+        day_of: Dict[str, int] = {}
+        minutes_of: Dict[str, int] = {}
+        status_code: Dict[str, int] = {}
+        service_code: Dict[int, int] = {}
+        day, start, duration, status, service, lead_days, revenue = [], [], [], [], [], [], []
+        for row_date, row_start, row_duration, row_status, row_service, created_day, row_revenue in rows:
+            ordinal = day_of.get(row_date)
+            if ordinal is None:
+                ordinal = day_of[row_date] = date_cls.fromisoformat(row_date).toordinal()
+            minutes = minutes_of.get(row_start)
+            if minutes is None:
+                minutes = minutes_of[row_start] = to_minutes(row_start)
+            day.append(ordinal)
+            start.append(minutes)
+            duration.append(row_duration or DEFAULT_DURATION_MINUTES)
+            status.append(status_code.setdefault(row_status, len(status_code)))
+            service.append(service_code.setdefault(row_service, len(service_code)))
+            created = day_of.get(created_day) if created_day else -1
+            if created is None:
+                try:
+                    created = date_cls.fromisoformat(created_day).toordinal()
+                except ValueError:
+                    created = -1
+                day_of[created_day] = created
+            lead_days.append(max(ordinal - created, 0) if created >= 0 else -1)
+            revenue.append(row_revenue)
+
+        columns = AppointmentColumns()
+        columns.statuses = list(status_code)
+        columns.services = list(service_code)
+        columns.first_day = date_cls.fromisoformat(start_date).toordinal()
+        columns.work_start, columns.work_end = self._working_hours(start_date, end_date)
+        columns.loaded_at = time.monotonic()
+        if self.use_numpy:
+            columns.day = np.array(day, dtype=np.int32)
+            columns.start = np.array(start, dtype=np.int16)
+            columns.duration = np.array(duration, dtype=np.int16)
+            columns.status = np.array(status, dtype=np.int16)
+            columns.service = np.array(service, dtype=np.int32)
+            columns.lead_days = np.array(lead_days, dtype=np.int32)
+            columns.revenue = np.array(revenue, dtype=np.float64)
+            columns.work_start = np.array(columns.work_start, dtype=np.int16)
+            columns.work_end = np.array(columns.work_end, dtype=np.int16)
+        else:
+            columns.day, columns.start, columns.duration = day, start, duration
+            columns.status, columns.service = status, service
+            columns.lead_days, columns.revenue = lead_days, revenue
+        logger.debug("📊 Loaded %s appointments for %s - %s in %.1f ms", len(day), start_date, end_date,
+                     (time.perf_counter() - started) * 1000)
+        return columns
+
+    def _working_hours(self, start_date: str, end_date: str) -> Tuple[List[int], List[int]]:
+        """ساعات العمل لكل يوم من الفترة (من محرك التوفر)"""
+        first = date_cls.fromisoformat(start_date)
+        days = (date_cls.fromisoformat(end_date) - first).days + 1
+        work_start, work_end = [], []
+        for offset in range(max(days, 0)):
+            hours = self._db.availability.working_hours((first + timedelta(days=offset)).isoformat())
+            work_start.append(hours[0] if hours else 0)
+            work_end.append(hours[1] if hours else 0)
+        return work_start, work_end
+
+    # --- المؤشرات ---
+
+    def kpis(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        كل مؤشرات لوحة التحكم لفترة.
+
+        Args:
+            start_date (str): 'YYYY-MM-DD' بداية الفترة.
+            end_date (str): 'YYYY-MM-DD' نهاية الفترة.
+        Returns:
+            Dict[str, Any]: {'appointments': 120, 'by_status': {'Attended': 80, ...},
+                             'attendance_rate': 0.87,                 # حضر / (حضر + غاب)
+                             'no_show_rate_by_weekday': {0: 0.1, ..., 6: None},  # الاثنين = 0
+                             'revenue_total': 9500.0, 'revenue_by_service': {2: 6000.0, 0: 3500.0},
+                             'avg_lead_time_days': 4.2,               # بين created_at وتاريخ الموعد
+                             'booked_minutes': 3600, 'available_minutes': 9600,
+                             'utilization': 0.375}                     # المواعيد غير الملغاة داخل ساعات العمل
+        """
+        columns = self.load(start_date, end_date)
+        if self.use_numpy:
+            return self._kpis_numpy(columns)
+        return self._kpis_python(columns)
+
+    @staticmethod
+    def _result(columns: AppointmentColumns, status_counts, attended: int, no_show: int,
+                weekday_attended, weekday_no_show, service_revenue, lead_total: float, lead_count: int,
+                booked: int, available: int) -> Dict[str, Any]:
+        """تجميع النتيجة (مشترك بين الحسابين)"""
+        return {
+            'appointments': len(columns),
+            'by_status': {name: int(count) for name, count in zip(columns.statuses, status_counts) if count},
+            'attendance_rate': _rate(attended, attended + no_show),
+            'no_show_rate_by_weekday': {weekday: _rate(weekday_no_show[weekday],
+                                                       weekday_attended[weekday] + weekday_no_show[weekday])
+                                        for weekday in range(7)},
+            'revenue_total': round(float(sum(service_revenue)), 2),
+            'revenue_by_service': {service_id: round(float(amount), 2)
+                                   for service_id, amount in zip(columns.services, service_revenue) if amount},
+            'avg_lead_time_days': round(lead_total / lead_count, 2) if lead_count else None,
+            'booked_minutes': int(booked),
+            'available_minutes': int(available),
+            'utilization': _rate(booked, available),
+        }
+
+    def _kpis_numpy(self, columns: AppointmentColumns) -> Dict[str, Any]:
+        kind_of = np.array([_status_kind(status) for status in columns.statuses] or [_KIND_OTHER], dtype=np.int8)
+        kind = kind_of[columns.status]
+        status_counts = np.bincount(columns.status, minlength=len(columns.statuses))
+
+        # (ordinal - 1) % 7 == date.weekday()
+        weekday = (columns.day - 1) % 7
+        attended = kind == _KIND_ATTENDED
+        no_show = kind == _KIND_NO_SHOW
+        weekday_attended = np.bincount(weekday[attended], minlength=7)
+        weekday_no_show = np.bincount(weekday[no_show], minlength=7)
+
+        service_revenue = np.bincount(columns.service, weights=columns.revenue, minlength=len(columns.services))
+
+        known_lead = columns.lead_days >= 0
+        lead = columns.lead_days[known_lead]
+
+        # الجزء من كل موعد غير ملغى الواقع داخل ساعات عمل يومه
+        index = columns.day - columns.first_day
+        start = columns.start.astype(np.int32)
+        end = start + columns.duration
+        overlap = (np.minimum(end, columns.work_end[index]) -
+                   np.maximum(start, columns.work_start[index].astype(np.int32)))
+        booked = np.clip(overlap, 0, None)[kind != _KIND_CANCELLED].sum()
+        available = (columns.work_end.astype(np.int32) - columns.work_start).sum()
+
+        return self._result(columns, status_counts, int(attended.sum()), int(no_show.sum()),
+                            weekday_attended, weekday_no_show, service_revenue,
+                            float(lead.sum()), int(lead.size), booked, available)
+
+    def _kpis_python(self, columns: AppointmentColumns) -> Dict[str, Any]:
+        kind_of = [_status_kind(status) for status in columns.statuses]
+        status_counts = [0] * len(columns.statuses)
+        weekday_attended = [0] * 7
+        weekday_no_show = [0] * 7
+        service_revenue = [0.0] * len(columns.services)
+        lead_total = lead_count = booked = 0
+        for i in range(len(columns)):
+            status = columns.status[i]
+            kind = kind_of[status]
+            status_counts[status] += 1
+            if kind == _KIND_ATTENDED:
+                weekday_attended[(columns.day[i] - 1) % 7] += 1
+            elif kind == _KIND_NO_SHOW:
+                weekday_no_show[(columns.day[i] - 1) % 7] += 1
+            service_revenue[columns.service[i]] += columns.revenue[i]
+            if columns.lead_days[i] >= 0:
+                lead_total += columns.lead_days[i]
+                lead_count += 1
+            if kind != _KIND_CANCELLED:
+                index = columns.day[i] - columns.first_day
+                start = columns.start[i]
+                overlap = (min(start + columns.duration[i], columns.work_end[index]) -
+                           max(start, columns.work_start[index]))
+                booked += max(overlap, 0)
+        available = sum(columns.work_end) - sum(columns.work_start)
+        return self._result(columns, status_counts, sum(weekday_attended), sum(weekday_no_show),
+                            weekday_attended, weekday_no_show, service_revenue,
+                            lead_total, lead_count, booked, available)
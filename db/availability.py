@@ -0,0 +1,340 @@
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date as date_cls
+from typing import Dict, FrozenSet, List, Optional, Tuple, Any
+
+"""
+AE = Availability Engine: فحص تداخل المواعيد والبحث عن الأوقات المتاحة.
+- لكل يوم: قائمة مرتبة بفترات الانشغال بعد دمجها (starts/ends بالدقائق)، فالسؤال
+  "هل يتداخل هذا الموعد؟" يكلف bisect واحد (O(log n)) بدل مسح مواعيد اليوم كلها.
+- اليوم يُحمّل من قاعدة البيانات عند أول سؤال عنه (استعلام واحد على idx_appointments_date_start)،
+  ثم يتم تحديثه مباشرة عند الإضافة/التعديل الناجح.
+- الذاكرة خاصة بهذا الكائن: حجوزات كائن أو عملية أخرى على نفس الملف لا تظهر فيها. لذلك فحص الكتابة
+  (add_appointment / update_appointment) يعيد قراءة اليوم داخل معاملة الكتابة (fresh=True)، ويرفع
+  AppointmentConflictError عند التداخل.
+- المواعيد الملغاة لا تشغل وقتاً.
+- ساعات وأيام العمل من جدول Settings (start_time, end_time, working_days)، والافتراضي 09:00 - 17:00 كل الأيام.
+"""
+
+DEFAULT_WORK_START = '09:00'
+DEFAULT_WORK_END = '17:00'
+DEFAULT_DURATION_MINUTES = 30   # إذا لم يحدد الموعد ولا الخدمة مدة
+DEFAULT_SLOT_STEP = 15          # دقة الأوقات المقترحة في find_free_slots
+DEFAULT_MAX_DAYS = 366          # عدد الأيام المحفوظة في الذاكرة
+FREE_STATUSES = frozenset({'cancelled', 'canceled'})
+
+
+class AppointmentConflictError(sqlite3.IntegrityError):
+    """الوقت المطلوب محجوز (يختلف عن أخطاء قاعدة البيانات التي تُرجع None/False)."""
+
+    def __init__(self, date: str, start_time: str, appointment_id: Optional[int] = None):
+        self.date = date
+        self.start_time = start_time
+        self.appointment_id = appointment_id  # الموعد المعدل (update_appointment)، None عند الإضافة
+        super().__init__(f"time slot taken: {date} {start_time}")
+
+# أسماء أيام الأسبوع كما قد تُكتب في Settings.working_days -> date.weekday() (الاثنين = 0)
+WEEKDAY_NAMES = {
+    'monday': 0, 'mon': 0, 'lundi': 0, 'الاثنين': 0, 'الإثنين': 0,
+    'tuesday': 1, 'tue': 1, 'mardi': 1, 'الثلاثاء': 1,
+    'wednesday': 2, 'wed': 2, 'mercredi': 2, 'الأربعاء': 2, 'الاربعاء': 2,
+    'thursday': 3, 'thu': 3, 'jeudi': 3, 'الخميس': 3,
+    'friday': 4, 'fri': 4, 'vendredi': 4, 'الجمعة': 4,
+    'saturday': 5, 'sat': 5, 'samedi': 5, 'السبت': 5,
+    'sunday': 6, 'sun': 6, 'dimanche': 6, 'الأحد': 6, 'الاحد': 6,
+}
+
+
+def to_minutes(value: str) -> int:
+    """'HH:MM' أو 'HH:MM:SS' -> دقائق منذ منتصف الليل"""
+    hours, minutes = str(value).strip().split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def from_minutes(minutes: int) -> str:
+    """دقائق منذ منتصف الليل -> 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def parse_working_days(value: Optional[str]) -> Optional[FrozenSet[int]]:
+    """
+    تحويل Settings.working_days إلى أرقام أيام الأسبوع.
+
+    Args:
+        value (Optional[str]): e.g. 'Saturday, Sunday' أو 'السبت,الأحد' أو '1,2,3' (ISO: الاثنين = 1).
+    Returns:
+        Optional[FrozenSet[int]]: e.g. frozenset({5, 6})، أو None (كل الأيام) إذا كانت القيمة فارغة أو غير مفهومة.
+    """
+    if not value:
+        return None
+    days = set()
+    for part in str(value).replace(';', ',').replace('،', ',').split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part.isdigit() and 1 <= int(part) <= 7:
+            days.add(int(part) - 1)
+        elif part in WEEKDAY_NAMES:
+            days.add(WEEKDAY_NAMES[part])
+        elif part[:3] in WEEKDAY_NAMES:
+            days.add(WEEKDAY_NAMES[part[:3]])
+        else:
+            return None
+    return frozenset(days) or None
+
+
+class _DaySchedule:
+    """مواعيد يوم واحد: الفترات الفردية + اتحادها المرتب"""
+
+    __slots__ = ('bookings', 'starts', 'ends')
+
+    def __init__(self):
+        self.bookings: Dict[int, Tuple[int, int]] = {}
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def add(self, appointment_id: int, start: int, end: int):
+        """إضافة فترة ودمجها مع الفترات المتداخلة أو الملاصقة لها"""
+        if appointment_id in self.bookings:
+            self.remove(appointment_id)
+        self.bookings[appointment_id] = (start, end)
+        i = bisect_left(self.ends, start)
+        j = bisect_right(self.starts, end)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def remove(self, appointment_id: int):
+        """حذف فترة (يعاد بناء الاتحاد لأن الفترة ربما دُمجت مع غيرها)"""
+        if self.bookings.pop(appointment_id, None) is None:
+            return
+        self.starts, self.ends = [], []
+        for start, end in sorted(self.bookings.values()):
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def overlaps(self, start: int, end: int, exclude_id: Optional[int] = None) -> bool:
+        """هل تتداخل الفترة [start, end) مع أي موعد؟"""
+        if exclude_id is not None and exclude_id in self.bookings:
+            # الاتحاد يشمل الموعد المستثنى، فنفحص الفترات الفردية
+            return any(s < end and start < e for appointment_id, (s, e) in self.bookings.items()
+                       if appointment_id != exclude_id)
+        i = bisect_right(self.starts, start) - 1
+        if i >= 0 and self.ends[i] > start:
+            return True
+        return i + 1 < len(self.starts) and self.starts[i + 1] < end
+
+
+class AvailabilityEngine:
+    """
+    محرك التوفر: has_conflict و find_free_slots لمواعيد قاعدة البيانات.
+    """
+
+    def __init__(self, db_manager: Any, max_days: int = DEFAULT_MAX_DAYS):
+        """
+        Args:
+            db_manager (DatabaseManager): مدير قاعدة البيانات (لقراءة المواعيد والإعدادات والخدمات).
+            max_days (int): الحد الأقصى للأيام المحفوظة في الذاكرة.
+        """
+        self._db = db_manager
+        self._max_days = max_days
+        self._days: 'OrderedDict[str, _DaySchedule]' = OrderedDict()
+        self._hours: Optional[Tuple[int, int, Optional[FrozenSet[int]]]] = None
+        self._service_durations: Dict[int, Optional[int]] = {}
+        self._generation = 0  # يزداد مع كل تعديل، لاكتشاف تعديل حدث أثناء تحميل يوم
+        self._lock = threading.Lock()
+
+    # --- تحميل البيانات ---
+
+    def _load_day(self, date: str) -> _DaySchedule:
+        """قراءة مواعيد يوم من قاعدة البيانات"""
+        rows = self._db.execute_query(
+            """
+            SELECT A.appointment_id, A.start_time,
+                   COALESCE(A.duration_minutes, S.duration_minutes) AS duration_minutes, A.status
+            FROM Appointments A
+            LEFT JOIN Services S ON A.service_id = S.service_id
+            WHERE A.date = ?
+            """, (date,))
+        if rows is None:
+            raise RuntimeError(f"could not load appointments for {date}")
+        day = _DaySchedule()
+        for row in rows:
+            if str(row['status'] or '').lower() in FREE_STATUSES:
+                continue
+            start = to_minutes(row['start_time'])
+            day.add(row['appointment_id'], start, start + (row['duration_minutes'] or DEFAULT_DURATION_MINUTES))
+        return day
+
+    def _day(self, date: str, fresh: bool = False) -> _DaySchedule:
+        if fresh:
+            # داخل معاملة كتابة: القراءة ترى كل ما أكدته الاتصالات والعمليات الأخرى
+            loaded = self._load_day(date)
+            with self._lock:
+                self._generation += 1
+                self._days[date] = loaded
+                self._days.move_to_end(date)
+                if len(self._days) > self._max_days:
+                    self._days.popitem(last=False)
+                return loaded
+        with self._lock:
+            day = self._days.get(date)
+            if day is not None:
+                self._days.move_to_end(date)
+                return day
+        while True:
+            # القراءة خارج القفل حتى لا ينتظر خيط آخر انتهاء الاستعلام
+            generation = self._generation
+            loaded = self._load_day(date)
+            with self._lock:
+                day = self._days.get(date)
+                if day is not None:
+                    return day
+                if generation != self._generation:
+                    continue  # تم تعديل موعد أثناء القراءة: ربما فاتنا
+                self._days[date] = loaded
+                if len(self._days) > self._max_days:
+                    self._days.popitem(last=False)
+                return loaded
+
+    def working_hours(self, date: str) -> Optional[Tuple[int, int]]:
+        """
+        ساعات العمل ليوم معين بالدقائق.
+
+        Returns:
+            Optional[Tuple[int, int]]: e.g. (540, 1020) لـ 09:00 - 17:00، أو None إذا لم يكن يوم عمل.
+        """
+        if self._hours is None:
+            settings = self._db.get_settings() or {}
+            self._hours = (to_minutes(settings.get('start_time') or DEFAULT_WORK_START),
+                           to_minutes(settings.get('end_time') or DEFAULT_WORK_END),
+                           parse_working_days(settings.get('working_days')))
+        start, end, days = self._hours
+        if days is not None and date_cls.fromisoformat(date).weekday() not in days:
+            return None
+        return start, end
+
+    def resolve_duration(self, duration_minutes: Optional[int] = None, service_id: Optional[int] = None) -> int:
+        """مدة الموعد: المحددة، أو مدة الخدمة، أو DEFAULT_DURATION_MINUTES"""
+        if duration_minutes:
+            return int(duration_minutes)
+        if service_id is not None:
+            if service_id not in self._service_durations:
+                row = self._db.execute_query(
+                    "SELECT duration_minutes FROM Services WHERE service_id = ?", (service_id,), fetch_one=True)
+                self._service_durations[service_id] = row['duration_minutes'] if row else None
+            if self._service_durations[service_id]:
+                return int(self._service_durations[service_id])
+        return DEFAULT_DURATION_MINUTES
+
+    # --- الاستعلامات ---
+
+    def has_conflict(self, date: str, start_time: str, duration_minutes: Optional[int] = None,
+                     service_id: Optional[int] = None, exclude_id: Optional[int] = None,
+                     fresh: bool = False) -> bool:
+        """
+        هل يتداخل موعد مقترح مع موعد موجود؟
+
+        Args:
+            date (str): 'YYYY-MM-DD'.
+            start_time (str): 'HH:MM'.
+            duration_minutes (Optional[int]): المدة، وإلا تستخدم مدة الخدمة.
+            service_id (Optional[int]): الخدمة (لمعرفة المدة).
+            exclude_id (Optional[int]): موعد يُستثنى من الفحص (عند تعديل موعد موجود).
+            fresh (bool): إعادة قراءة اليوم من قاعدة البيانات بدل الذاكرة (قبل الكتابة).
+        Returns:
+            bool: True إذا كان هناك تداخل.
+        """
+        start = to_minutes(start_time)
+        end = start + self.resolve_duration(duration_minutes, service_id)
+        day = self._day(date, fresh)
+        with self._lock:
+            return day.overlaps(start, end, exclude_id)
+
+    def find_free_slots(self, date: str, duration: Optional[int] = None, service_id: Optional[int] = None,
+                        step: int = DEFAULT_SLOT_STEP) -> List[str]:
+        """
+        الأوقات المتاحة لبدء موعد في يوم معين ضمن ساعات العمل.
+
+        Args:
+            date (str): 'YYYY-MM-DD'.
+            duration (Optional[int]): مدة الموعد بالدقائق، وإلا تستخدم مدة الخدمة.
+            service_id (Optional[int]): الخدمة (لمعرفة المدة).
+            step (int): الفاصل بين الأوقات المقترحة بالدقائق.
+        Returns:
+            List[str]: e.g. ['09:00', '09:15', '11:30', ...]، أو [] إذا لم يكن يوم عمل.
+        """
+        hours = self.working_hours(date)
+        if hours is None:
+            return []
+        open_at, close_at = hours
+        length = self.resolve_duration(duration, service_id)
+        day = self._day(date)
+        with self._lock:
+            starts, ends = list(day.starts), list(day.ends)
+
+        slots = []
+        cursor = open_at
+        # أول فترة انشغال تنتهي بعد بداية الدوام
+        i = bisect_right(ends, open_at)
+        while cursor + length <= close_at:
+            gap_end = min(starts[i], close_at) if i < len(starts) else close_at
+            # محاذاة بداية الفجوة على الشبكة (step) ابتداءً من بداية الدوام
+            t = open_at + -(-(cursor - open_at) // step) * step
+            while t + length <= gap_end:
+                slots.append(from_minutes(t))
+                t += step
+            if i >= len(starts):
+                break
+            cursor = max(cursor, ends[i])
+            i += 1
+        return slots
+
+    # --- التحديث ---
+
+    def add(self, appointment_id: int, date: str, start_time: str, duration_minutes: Optional[int] = None,
+            status: Optional[str] = None, service_id: Optional[int] = None):
+        """تسجيل موعد تمت إضافته أو تعديله (الأيام غير المحملة تُقرأ لاحقاً من قاعدة البيانات)"""
+        if str(status or '').lower() in FREE_STATUSES:
+            self.remove(appointment_id)
+            return
+        start = to_minutes(start_time)
+        end = start + self.resolve_duration(duration_minutes, service_id)
+        with self._lock:
+            self._remove_locked(appointment_id)
+            day = self._days.get(date)
+            if day is not None:
+                day.add(appointment_id, start, end)
+
+    def remove(self, appointment_id: int):
+        """إزالة موعد من جميع الأيام المحملة"""
+        with self._lock:
+            self._remove_locked(appointment_id)
+
+    def _remove_locked(self, appointment_id: int):
+        self._generation += 1
+        for day in self._days.values():
+            if appointment_id in day.bookings:
+                day.remove(appointment_id)
+                return
+
+    def invalidate(self, date: Optional[str] = None):
+        """نسيان يوم (أو كل الأيام) لتتم قراءته من جديد، e.g. بعد إدخال جماعي أو تراجع معاملة"""
+        with self._lock:
+            self._generation += 1
+            if date is None:
+                self._days.clear()
+                self._service_durations.clear()
+            else:
+                self._days.pop(date, None)
+
+    def invalidate_settings(self):
+        """إعادة قراءة ساعات وأيام العمل عند الاستخدام التالي (بعد update_settings)"""
+        self._hours = None
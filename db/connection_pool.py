@@ -0,0 +1,226 @@
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
+
+"""
+CP = Connection Pool: مجمع اتصالات SQLite طويلة العمر.
+- الخيط (thread) يأخذ اتصالاً طوال مدة استخدامه فقط (استدعاء أو معاملة) ثم يعيده؛ acquire/release
+  متداخلة في نفس الخيط تعطي نفس الاتصال، ويعود إلى المجمع عند آخر release.
+- عدد الاتصالات المستخدمة في نفس الوقت محدود بـ max_size؛ الخيوط الدائمة (e.g. خيوط Flet أو
+  خيوط العمل في الخلفية) لا تحجز مكاناً وهي خاملة.
+- الاتصالات الخاملة يتم فحصها (SELECT 1) قبل إعادة استخدامها إذا طال خمولها.
+"""
+
+# القيم الافتراضية للمجمع
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 5.0            # ثوانٍ انتظار اتصال متاح
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0  # ثوانٍ قبل إعادة فحص اتصال خامل
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """لا يوجد اتصال متاح في المجمع خلال مهلة الانتظار."""
+
+
+class PoolClosedError(sqlite3.ProgrammingError):
+    """محاولة استخدام مجمع تم إغلاقه."""
+
+
+class _ThreadLease:
+    """يربط اتصالاً بخيط واحد أثناء استخدامه (users = عدد acquire غير المحررة)،
+    ويعيده إلى المجمع تلقائياً إذا انتهى الخيط قبل تحريره."""
+
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self.conn = conn
+        self.users = 1
+        self._finalizer = weakref.finalize(self, pool._checkin, conn)
+
+    def release(self):
+        self._finalizer()
+
+    def detach(self):
+        self._finalizer.detach()
+
+
+class ConnectionPool:
+    """
+    مجمع اتصالات SQLite واعٍ بالخيوط (thread-aware).
+    """
+
+    def __init__(self, db_path: str,
+                 max_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_POOL_TIMEOUT,
+                 health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+                 connect_kwargs: Optional[Dict[str, Any]] = None,
+                 on_connect: Optional[Callable[[sqlite3.Connection], None]] = None):
+        """
+        Args:
+            db_path (str): مسار ملف قاعدة البيانات.
+            max_size (int): الحد الأقصى للاتصالات المفتوحة في نفس الوقت.
+            timeout (float): مدة انتظار اتصال متاح قبل رفع PoolTimeoutError.
+            health_check_interval (float): المدة (بالثواني) التي يُعتبر بعدها الاتصال بحاجة لفحص قبل استخدامه.
+            connect_kwargs (Optional[Dict]): معاملات إضافية تمرر إلى sqlite3.connect.
+            on_connect (Optional[Callable]): دالة تُستدعى مرة واحدة على كل اتصال جديد.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._connect_kwargs = dict(connect_kwargs or {})
+        self._on_connect = on_connect
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._idle: List[Tuple[sqlite3.Connection, float]] = []
+        self._all: set = set()
+        self._closed = False
+
+    # --- إنشاء وفحص الاتصالات ---
+
+    def _create(self) -> sqlite3.Connection:
+        """إنشاء اتصال جديد (يمكن نقله بين الخيوط لأن المجمع يضمن استخداماً حصرياً)"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, **self._connect_kwargs)
+        conn.row_factory = sqlite3.Row  # للوصول إلى الأعمدة بالاسم
+        try:
+            if self._on_connect:
+                self._on_connect(conn)
+        except Exception:
+            conn.close()
+            raise
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """فحص صلاحية الاتصال"""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        """إغلاق اتصال وإزالته من المجمع نهائياً"""
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _checkout(self) -> sqlite3.Connection:
+        """أخذ اتصال خامل (مع فحصه إذا طال خموله) أو إنشاء اتصال جديد"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, idle_since = self._idle.pop()
+            if time.monotonic() - idle_since < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+        return self._create()
+
+    def _checkin(self, conn: sqlite3.Connection):
+        """إعادة اتصال إلى المجمع (تُستدعى عند التحرير أو انتهاء الخيط)"""
+        try:
+            if self._closed:
+                self._discard(conn)
+                return
+            if conn.in_transaction:
+                # لا نعيد اتصالاً يحمل قفل كتابة مفتوح
+                conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    # --- الواجهة العامة ---
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        أخذ اتصال للخيط الحالي حتى release() المقابلة (إذا كان الخيط يستخدم اتصالاً بالفعل يُعاد نفسه).
+
+        Returns:
+            sqlite3.Connection: اتصال خاص بالخيط الحالي.
+        Raises:
+            PoolTimeoutError: إذا كانت جميع الاتصالات مشغولة طوال مدة الانتظار.
+            PoolClosedError: إذا تم إغلاق المجمع.
+        """
+        if self._closed:
+            raise PoolClosedError("Connection pool is closed")
+
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            lease.users += 1
+            return lease.conn
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s (pool size {self.max_size})"
+            )
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        self._local.lease = _ThreadLease(self, conn)
+        return conn
+
+    def release(self):
+        """إنهاء acquire() واحدة؛ الاتصال يعود إلى المجمع عند تحرير آخر استخدام في الخيط"""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            return
+        lease.users -= 1
+        if lease.users <= 0:
+            self._local.lease = None
+            lease.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        استخدام اتصال لمدة كتلة with ثم تحريره.
+
+        Example:
+            with pool.connection() as conn:
+                conn.execute(...)
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release()
+
+    def close(self):
+        """إغلاق جميع الاتصالات (الخاملة والمستخدمة) ومنع أي استخدام لاحق"""
+        self._closed = True
+        lease = getattr(self._local, 'lease', None)
+        if lease is not None:
+            lease.detach()
+            self._local.lease = None
+        with self._lock:
+            connections = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, int]:
+        """إحصائيات المجمع: عدد الاتصالات المفتوحة والخاملة"""
+        with self._lock:
+            return {'open': len(self._all), 'idle': len(self._idle), 'max_size': self.max_size}
@@ -1,17 +1,58 @@
-from functools import lru_cache
+from contextlib import contextmanager
+from itertools import islice
 import json
 import sqlite3
 import os
+import sys
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Tuple, Any, Optional
+from typing import List, Dict, Tuple, Any, Optional, Iterable, Iterator, TYPE_CHECKING
+
+import logging
+
+from utils.text_normalizer import fold_text, search_tokens
+from db.connection_pool import ConnectionPool, DEFAULT_POOL_SIZE, DEFAULT_POOL_TIMEOUT
+from db.statement_builder import StatementBuilder
+from db.availability import AvailabilityEngine, AppointmentConflictError, FREE_STATUSES
+from db.theme_index import ThemeIndex
+from db.theme_cache import ThemeCache
+from db.instrumentation import QueryStats, DEFAULT_SLOW_QUERY_MS, normalize_sql
+
+if TYPE_CHECKING:  # db.analytics يستورد NumPy: يُحمّل عند أول get_dashboard_kpis فقط (زمن بدء التطبيق)
+    from db.analytics import AnalyticsEngine
+
+logger = logging.getLogger('DBM')
+query_logger = logging.getLogger('DBM.query')  # تفاصيل كل استعلام (DEBUG فقط)
 
 # تعريف مسار قاعدة البيانات
 DB_NAME = 'appointment_manager.db'
 DB_PATH = ""#os.path.join(os.path.dirname(__file__), DB_NAME)
+# حجم ذاكرة sqlite3 المؤقتة للجمل المُحضّرة لكل اتصال
+DEFAULT_CACHED_STATEMENTS = 256
+# عدد الصفوف في كل معاملة أثناء الإدخال الجماعي
+BULK_CHUNK_SIZE = 5000
+# عدد الصفوف المقروءة في كل fetchmany في دوال iter_*
+DEFAULT_FETCH_BATCH = 500
+# حجم الصفحة في دوال *_page (التمرير اللانهائي في الواجهة)
+DEFAULT_PAGE_SIZE = 50
+# أعمدة المواعيد التي يتطلب تعديلها فحص التداخل من جديد
+SCHEDULE_FIELDS = frozenset({'date', 'start_time', 'duration_minutes', 'status', 'service_id'})
+# إعدادات PRAGMA المطبقة على كل اتصال جديد (يمكن تعديلها عبر معامل pragmas في DatabaseManager)
+# WAL: القراءة لا تنتظر الكتابة (شاشة التقارير أثناء الحجز)، و NORMAL آمن مع WAL ويقلل fsync.
+PRAGMA_PROFILE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,       # ms انتظار القفل بدلاً من الفشل الفوري "database is locked"
+    'cache_size': -16000,       # القيمة السالبة بالـ KiB (16 MB لكل اتصال)
+    'mmap_size': 134217728,     # 128 MB قراءة عبر memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
 # --- تعريف أوامر SQL لإنشاء الجداول ---
-SCHEMA_SQL = ["""
-PRAGMA foreign_keys = ON;
-""",
+# ملاحظة: PRAGMA foreign_keys يُفعّل على كل اتصال (_configure_connection) وليس هنا،
+# لأنه لا يعمل داخل معاملة الترحيل.
+SCHEMA_SQL = [
 """
 CREATE TABLE IF NOT EXISTS "Settings" (
 	"id" INTEGER PRIMARY KEY,
@@ -132,7 +173,7 @@ CREATE TABLE IF NOT EXISTS "Audit_Logs" (
 
 CREATE TABLE IF NOT EXISTS "Invoices" (
 	"invoice_id" INTEGER PRIMARY KEY AUTOINCREMENT,
-	"invoice_number" INTEGER NOT NULL UNIQUE AUTOINCREMENT,
+	"invoice_number" INTEGER NOT NULL UNIQUE,
 	"appointment_id" INTEGER NOT NULL UNIQUE,
 	"created_by_user_id" INTEGER NOT NULL,
 	"issue_date" TEXT NOT NULL,
@@ -172,10 +213,29 @@ CREATE TABLE IF NOT EXISTS "theme_details" (
 """
 ]
 
+# --- الفهارس الثانوية لاستعلامات المواعيد والعملاء والسجلات ---
+INDEX_SQL = [
+# get_daily_appointments (date = ? ORDER BY start_time) و get_weekly_appointments (date BETWEEN ORDER BY date, start_time)
+"""CREATE INDEX IF NOT EXISTS "idx_appointments_date_start" ON "Appointments" ("date", "start_time");""",
+# get_client_appointments_history (client_id = ? ORDER BY date DESC, start_time DESC)
+"""CREATE INDEX IF NOT EXISTS "idx_appointments_client_date" ON "Appointments" ("client_id", "date", "start_time");""",
+# get_attendance_stats / get_peak_hours_stats: فهرس مغطٍّ (covering) لا يحتاج لقراءة الجدول
+"""CREATE INDEX IF NOT EXISTS "idx_appointments_date_status" ON "Appointments" ("date", "status", "start_time");""",
+# get_theme_data / get_theme_by_category
+"""CREATE INDEX IF NOT EXISTS "idx_theme_details_theme_category" ON "theme_details" ("theme_id", "category");""",
+# تصفح سجلات التدقيق حسب الوقت أو المستخدم
+"""CREATE INDEX IF NOT EXISTS "idx_audit_logs_timestamp" ON "Audit_Logs" ("timestamp");""",
+"""CREATE INDEX IF NOT EXISTS "idx_audit_logs_user" ON "Audit_Logs" ("user_id", "timestamp");""",
+]
+
+# --- البيانات الافتراضية ---
+DEFAULT_SETTINGS_SQL = "INSERT OR IGNORE INTO Settings (id, company_name, language, hardware_id) VALUES (1, 'Appointment Manager', 'ar', 'dummy_hardware_id')"
+DEFAULT_LICENSE_SQL = "INSERT OR IGNORE INTO Licenses (id, is_active) VALUES (1, 0)"
+
 
 # إدخال بيانات مفاتيح الترجمة   
 translations_keys = """
-INSERT INTO "Translations" ("key", "ar", "fr", "en") VALUES
+INSERT OR IGNORE INTO "Translations" ("key", "ar", "fr", "en") VALUES
 -- --- نصوص عامة ---
 ('app_title', 'نظام إدارة المواعيد', 'Système de Rendez-vous', 'Appointment Manager'),
 ('welcome_msg', 'أهلاً بك', 'Bienvenue', 'Welcome'),
@@ -244,8 +304,8 @@ INSERT INTO "Translations" ("key", "ar", "fr", "en") VALUES
 
 
 
-#set theme default values
-default_theme_values = {""" 
+#set theme default values (قائمة مرتبة: صف theme يجب أن يُدخل قبل theme_details)
+default_theme_values = [""" 
 INSERT INTO theme (theme_name, settings_id, state, is_default) VALUES 
 ('default_theme', 1, 'active', 1);
 """,
@@ -341,7 +401,247 @@ INSERT INTO theme_details (theme_id, category, subcategory, element_name, proper
 (1, 'spacing', 'sizes', 'medium', 'size', '16px'),
 (1, 'spacing', 'sizes', 'large', 'size', '24px'),
 (1, 'spacing', 'sizes', 'xlarge', 'size', '32px');"""
+]
+
+
+def _seed_default_data(db: 'DatabaseManager'):
+    """إدخال البيانات الافتراضية (الإعدادات، الترخيص، الترجمات، الثيم) دون تكرارها"""
+    db.execute_query(DEFAULT_SETTINGS_SQL, commit=True)
+    db.execute_query(DEFAULT_LICENSE_SQL, commit=True)
+    db.execute_query(translations_keys, commit=True)
+    # قواعد البيانات القديمة تحتوي الثيم الافتراضي مسبقاً
+    if not db.execute_query("SELECT 1 FROM theme LIMIT 1"):
+        for statement in default_theme_values:
+            db.execute_query(statement, commit=True)
+
+
+# --- فهرس البحث النصي للعملاء (FTS5) ---
+# النصوص تُخزن بعد fold_text (دالة SQL تُسجل على كل اتصال في _configure_connection)
+# فالبحث لا يتأثر بالتشكيل وأشكال الألف (أحمد = احمد) ولا بالحروف المنبورة (Hélène = helene).
+# تنبيه: مشغلات Clients_fts تستدعي fold_text، فأي برنامج آخر يكتب في Clients (sqlite3 CLI، سكربت صيانة)
+# يفشل بـ "no such function: fold_text" إلا إذا سجل الدالة أولاً: register_sql_functions(conn).
+CLIENT_SEARCH_SQL = [
+"""
+CREATE VIRTUAL TABLE IF NOT EXISTS "Clients_fts" USING fts5(
+    full_name, phone_number, email, notes,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'  -- فهارس جاهزة لبدايات الكلمات القصيرة (typeahead)
+);""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_fts_insert" AFTER INSERT ON "Clients" BEGIN
+    INSERT INTO Clients_fts (rowid, full_name, phone_number, email, notes)
+    VALUES (new.client_id, fold_text(new.full_name), fold_text(new.phone_number), fold_text(new.email), fold_text(new.notes));
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_fts_delete" AFTER DELETE ON "Clients" BEGIN
+    DELETE FROM Clients_fts WHERE rowid = old.client_id;
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_fts_update" AFTER UPDATE OF client_id, full_name, phone_number, email, notes ON "Clients" BEGIN
+    DELETE FROM Clients_fts WHERE rowid = old.client_id;
+    INSERT INTO Clients_fts (rowid, full_name, phone_number, email, notes)
+    VALUES (new.client_id, fold_text(new.full_name), fold_text(new.phone_number), fold_text(new.email), fold_text(new.notes));
+END;""",
+# تعبئة الفهرس بالعملاء الموجودين
+"DELETE FROM Clients_fts;",
+"""
+INSERT INTO Clients_fts (rowid, full_name, phone_number, email, notes)
+SELECT client_id, fold_text(full_name), fold_text(phone_number), fold_text(email), fold_text(notes) FROM Clients;""",
+]
+# أوزان الأعمدة في ترتيب النتائج (bm25): الاسم ثم الهاتف ثم البريد ثم الملاحظات
+CLIENT_SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+DEFAULT_SEARCH_LIMIT = 20
+# مصطلح أقصر من هذا يطابق آلاف العملاء، فتُرجع النتائج بدون ترتيب bm25 (الترتيب يكلف أكثر من البحث نفسه)
+RANKED_SEARCH_MIN_CHARS = 3
+
+
+# --- فهرس البحث الجزئي للعملاء (FTS5 trigram) ---
+# search_clients يطابق أي جزء من الاسم أو الهاتف (LIKE '%term%'، e.g. 'علوي' في 'محمد العلوي'
+# أو '3456' في وسط رقم الهاتف). فهرس trigram يجيب عن نفس السؤال بدون مسح Clients كلها.
+# الجدول بمحتوى خارجي (content='Clients') والمشغلات تنسخ النص كما هو، فلا تحتاج fold_text.
+CLIENT_SUBSTRING_SQL = [
+"""
+CREATE VIRTUAL TABLE IF NOT EXISTS "Clients_trgm" USING fts5(
+    full_name, phone_number,
+    content = 'Clients', content_rowid = 'client_id',
+    tokenize = 'trigram'
+);""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_trgm_insert" AFTER INSERT ON "Clients" BEGIN
+    INSERT INTO Clients_trgm (rowid, full_name, phone_number) VALUES (new.client_id, new.full_name, new.phone_number);
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_trgm_delete" AFTER DELETE ON "Clients" BEGIN
+    INSERT INTO Clients_trgm (Clients_trgm, rowid, full_name, phone_number)
+    VALUES ('delete', old.client_id, old.full_name, old.phone_number);
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Clients_trgm_update" AFTER UPDATE OF client_id, full_name, phone_number ON "Clients" BEGIN
+    INSERT INTO Clients_trgm (Clients_trgm, rowid, full_name, phone_number)
+    VALUES ('delete', old.client_id, old.full_name, old.phone_number);
+    INSERT INTO Clients_trgm (rowid, full_name, phone_number) VALUES (new.client_id, new.full_name, new.phone_number);
+END;""",
+# تعبئة الفهرس بالعملاء الموجودين
+"INSERT INTO Clients_trgm (Clients_trgm) VALUES ('rebuild');",
+]
+# trigram لا يطابق مصطلحاً أقصر من 3 أحرف، فيُبحث عنه بـ LIKE
+SUBSTRING_SEARCH_MIN_CHARS = 3
+
+
+def register_sql_functions(conn: sqlite3.Connection):
+    """تسجيل دوال SQL التي تستخدمها مشغلات قاعدة البيانات (fold_text) على اتصال sqlite3.
+    ضروري لأي اتصال يكتب في Clients من خارج DatabaseManager.
+    Args:
+        conn (sqlite3.Connection): e.g. sqlite3.connect('appointment_manager.db')
+    """
+    conn.create_function('fold_text', 1, fold_text, deterministic=True)
+
+
+def _create_client_search_index(db: 'DatabaseManager'):
+    """إنشاء Clients_fts إذا كانت نسخة SQLite تدعم FTS5 (وإلا يبقى البحث على LIKE)"""
+    supported = db.execute_query("SELECT sqlite_compileoption_used('ENABLE_FTS5')", fetch_one=True)
+    if not supported or not supported[0]:
+        logger.warning("⚠️ SQLite was built without FTS5, client search falls back to LIKE")
+        return
+    for statement in CLIENT_SEARCH_SQL:
+        db.execute_query(statement, commit=True)
+
+
+def _create_client_substring_index(db: 'DatabaseManager'):
+    """إنشاء Clients_trgm إذا كانت SQLite تدعم FTS5 و trigram (3.34+)، وإلا يبقى search_clients على LIKE"""
+    supported = db.execute_query("SELECT sqlite_compileoption_used('ENABLE_FTS5')", fetch_one=True)
+    if not supported or not supported[0] or sqlite3.sqlite_version_info < (3, 34, 0):
+        logger.warning("⚠️ SQLite %s has no FTS5 trigram tokenizer, substring client search uses LIKE",
+                       sqlite3.sqlite_version)
+        return
+    for statement in CLIENT_SUBSTRING_SQL:
+        db.execute_query(statement, commit=True)
+
+
+# --- ملخص يومي للتقارير (Daily_Stats) ---
+# صف لكل (تاريخ، حالة، ساعة، خدمة) يحتوي عدد المواعيد ومجموع فواتيرها، تحدثه المشغلات (triggers)
+# مع كل إضافة/تعديل/حذف في Appointments أو Invoices (بما في ذلك الإدخال الجماعي)،
+# فتقرير سنة كاملة يجمع بضع مئات من الصفوف بدلاً من مسح كل المواعيد.
+# service_id = 0 للمواعيد بدون خدمة (NULL لا يصلح في المفتاح الأساسي).
+DAILY_STATS_SQL = [
+"""
+CREATE TABLE IF NOT EXISTS "Daily_Stats" (
+	"date" TEXT NOT NULL,
+	"status" VARCHAR NOT NULL,
+	"hour" TEXT NOT NULL, -- '09'
+	"service_id" INTEGER NOT NULL DEFAULT 0,
+	"appointments" INTEGER NOT NULL DEFAULT 0,
+	"revenue" REAL NOT NULL DEFAULT 0.0,
+	PRIMARY KEY ("date", "status", "hour", "service_id")
+) WITHOUT ROWID;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_appointment_insert" AFTER INSERT ON "Appointments" BEGIN
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    VALUES (new.date, new.status, COALESCE(STRFTIME('%H', new.start_time), ''), COALESCE(new.service_id, 0), 1,
+            (SELECT COALESCE(SUM(total_amount), 0) FROM Invoices WHERE appointment_id = new.appointment_id))
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        appointments = appointments + excluded.appointments,
+        revenue = revenue + excluded.revenue;
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_appointment_delete" AFTER DELETE ON "Appointments" BEGIN
+    UPDATE Daily_Stats SET
+        appointments = appointments - 1,
+        revenue = revenue - (SELECT COALESCE(SUM(total_amount), 0) FROM Invoices WHERE appointment_id = old.appointment_id)
+    WHERE date = old.date AND status = old.status
+      AND hour = COALESCE(STRFTIME('%H', old.start_time), '') AND service_id = COALESCE(old.service_id, 0);
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_appointment_update" AFTER UPDATE OF date, start_time, status, service_id ON "Appointments" BEGIN
+    UPDATE Daily_Stats SET
+        appointments = appointments - 1,
+        revenue = revenue - (SELECT COALESCE(SUM(total_amount), 0) FROM Invoices WHERE appointment_id = old.appointment_id)
+    WHERE date = old.date AND status = old.status
+      AND hour = COALESCE(STRFTIME('%H', old.start_time), '') AND service_id = COALESCE(old.service_id, 0);
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    VALUES (new.date, new.status, COALESCE(STRFTIME('%H', new.start_time), ''), COALESCE(new.service_id, 0), 1,
+            (SELECT COALESCE(SUM(total_amount), 0) FROM Invoices WHERE appointment_id = new.appointment_id))
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        appointments = appointments + excluded.appointments,
+        revenue = revenue + excluded.revenue;
+END;""",
+# الفواتير: المبلغ يضاف إلى صف الموعد المرتبط بها
+# (WHERE في INSERT ... SELECT ضروري لتمييز ON CONFLICT عن شرط JOIN)
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_invoice_insert" AFTER INSERT ON "Invoices" BEGIN
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    SELECT A.date, A.status, COALESCE(STRFTIME('%H', A.start_time), ''), COALESCE(A.service_id, 0), 0, COALESCE(new.total_amount, 0)
+    FROM Appointments A WHERE A.appointment_id = new.appointment_id
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        revenue = revenue + excluded.revenue;
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_invoice_delete" AFTER DELETE ON "Invoices" BEGIN
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    SELECT A.date, A.status, COALESCE(STRFTIME('%H', A.start_time), ''), COALESCE(A.service_id, 0), 0, -COALESCE(old.total_amount, 0)
+    FROM Appointments A WHERE A.appointment_id = old.appointment_id
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        revenue = revenue + excluded.revenue;
+END;""",
+"""
+CREATE TRIGGER IF NOT EXISTS "Daily_Stats_invoice_update" AFTER UPDATE OF total_amount, appointment_id ON "Invoices" BEGIN
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    SELECT A.date, A.status, COALESCE(STRFTIME('%H', A.start_time), ''), COALESCE(A.service_id, 0), 0, -COALESCE(old.total_amount, 0)
+    FROM Appointments A WHERE A.appointment_id = old.appointment_id
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        revenue = revenue + excluded.revenue;
+    INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+    SELECT A.date, A.status, COALESCE(STRFTIME('%H', A.start_time), ''), COALESCE(A.service_id, 0), 0, COALESCE(new.total_amount, 0)
+    FROM Appointments A WHERE A.appointment_id = new.appointment_id
+    ON CONFLICT (date, status, hour, service_id) DO UPDATE SET
+        revenue = revenue + excluded.revenue;
+END;""",
+# تعبئة الملخص من البيانات الموجودة
+"DELETE FROM Daily_Stats;",
+"""
+INSERT INTO Daily_Stats (date, status, hour, service_id, appointments, revenue)
+SELECT A.date, A.status, COALESCE(STRFTIME('%H', A.start_time), ''), COALESCE(A.service_id, 0),
+       COUNT(*), COALESCE(SUM(I.total_amount), 0)
+FROM Appointments A
+LEFT JOIN Invoices I ON I.appointment_id = A.appointment_id
+GROUP BY 1, 2, 3, 4;""",
+]
+
+
+# --- ذاكرة التحقق من الترخيص (Licenses) ---
+# نتيجة آخر تحقق كامل (RSA) مع ما تم التحقق منه: بصمة ملف الترخيص والمفتاح العام ومعرف الجهاز،
+# ووصل HMAC يربطها معاً، فالتشغيل التالي يتخطى التحقق إذا لم يتغير أي منها ولم تنتهِ المدة.
+LICENSE_VERIFICATION_COLUMNS = {
+    'license_file_hash': 'TEXT',
+    'public_key_fingerprint': 'TEXT',
+    'verified_machine_id': 'TEXT',
+    'verified_at': 'TEXT',
+    'verification_receipt': 'TEXT',
 }
+
+
+def _add_license_verification_columns(db: 'DatabaseManager'):
+    """إضافة أعمدة ذاكرة التحقق إلى Licenses (ALTER TABLE لا يدعم IF NOT EXISTS)"""
+    existing = {row['name'] for row in db.execute_query('PRAGMA table_info("Licenses")')}
+    for column, column_type in LICENSE_VERIFICATION_COLUMNS.items():
+        if column not in existing:
+            db.execute_query(f'ALTER TABLE "Licenses" ADD COLUMN "{column}" {column_type}', commit=True)
+
+
+# --- الترحيلات المرقمة (PRAGMA user_version) ---
+# كل ترحيل: (رقم الإصدار، الوصف، الخطوات). الخطوة إما نص SQL أو دالة تستقبل DatabaseManager.
+# جميع الخطوات قابلة لإعادة التنفيذ بأمان، لأن قواعد البيانات التي أنشأها الإصدار القديم
+# (CREATE IF NOT EXISTS في كل تشغيل) تبدأ من الإصدار 0 رغم احتوائها على الجداول والبيانات.
+MIGRATIONS: List[Tuple[int, str, List[Any]]] = [
+    (1, 'baseline schema', SCHEMA_SQL),
+    (2, 'secondary indexes for appointment, client and audit-log queries', INDEX_SQL),
+    (3, 'default settings, license, translations and theme', [_seed_default_data]),
+    (4, 'full-text client search index (Clients_fts)', [_create_client_search_index]),
+    (5, 'daily report rollup (Daily_Stats) maintained by triggers', DAILY_STATS_SQL),
+    (6, 'license verification cache columns', [_add_license_verification_columns]),
+    (7, 'substring client search index (Clients_trgm)', [_create_client_substring_index]),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
                         
 # إدخال بيانات الألوان
 
@@ -350,24 +650,76 @@ class DatabaseManager:
     مدير قاعدة البيانات: مسؤول عن الاتصال بقاعدة البيانات وتنفيذ جميع عمليات CRUD والتقارير.
 """
 
-    def __init__(self, db_path: str = DB_NAME):
+    def __init__(self, db_path: str = DB_NAME, pooled: bool = True,
+                 pool_size: int = DEFAULT_POOL_SIZE, pool_timeout: float = DEFAULT_POOL_TIMEOUT,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+                 collect_stats: bool = True, slow_query_ms: Optional[float] = DEFAULT_SLOW_QUERY_MS,
+                 pragmas: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            db_path (str): مسار ملف قاعدة البيانات.
+            pooled (bool): True لاستخدام اتصالات طويلة العمر (اتصال لكل خيط)، False لفتح وإغلاق الاتصال مع كل استعلام (السلوك القديم).
+            pool_size (int): الحد الأقصى للاتصالات المفتوحة في نفس الوقت (لخيوط العمل).
+            pool_timeout (float): مدة انتظار اتصال متاح بالثواني.
+            cached_statements (int): عدد الجمل المُحضّرة التي يحتفظ بها كل اتصال (sqlite3 statement cache).
+            collect_stats (bool): تسجيل زمن وعدد صفوف كل استعلام (انظر stats()).
+            slow_query_ms (Optional[float]): أي استعلام يتجاوز هذا الزمن يُسجل مع خطة تنفيذه (EXPLAIN QUERY PLAN). None للتعطيل.
+            pragmas (Optional[Dict[str, Any]]): تعديلات على PRAGMA_PROFILE، e.g. {'journal_mode': 'DELETE', 'mmap_size': None}
+                (القيمة None تلغي الإعداد).
+        """
         self.db_path = db_path
+        self.pragmas = {name: value for name, value in {**PRAGMA_PROFILE, **(pragmas or {})}.items()
+                        if value is not None}
+        self.pooled = pooled
+        self.cached_statements = cached_statements
+        self._pool: Optional[ConnectionPool] = (
+            ConnectionPool(db_path, max_size=pool_size, timeout=pool_timeout,
+                           connect_kwargs={'cached_statements': cached_statements},
+                           on_connect=self._configure_connection)
+            if pooled else None
+        )
+        self._statements = StatementBuilder(self._load_table_columns)
+        self._search_indexes: Dict[str, bool] = {}  # هل يوجد Clients_fts / Clients_trgm؟ (يُفحص مرة واحدة)
+        self._tx = threading.local()  # حالة المعاملة المفتوحة لكل خيط (depth, error)
+        self._stats: Optional[QueryStats] = QueryStats() if collect_stats else None
+        self.slow_query_ms = slow_query_ms
+        self.availability = AvailabilityEngine(self)  # فحص تداخل المواعيد (يُحمّل كل يوم عند الحاجة)
+        self._analytics: Optional['AnalyticsEngine'] = None  # مؤشرات لوحة التحكم (تُنشأ عند أول استخدام)
+        self._analytics_lock = threading.Lock()
+        self.write_version = 0  # يزداد مع كل كتابة مؤكدة، لمعرفة صلاحية البيانات المحفوظة في الذاكرة
         self._conn = None
         self._cursor = None
         self._current_theme_cache = None
         self._current_theme_id = None
+        self._theme_index: Optional[ThemeIndex] = None  # فهرس الثيم الحالي (يُبنى عند أول get_color)
+        self.theme_cache = ThemeCache()  # بيانات الثيمات المنظمة (get_theme_data) لهذا الكائن فقط
         self.initialize_db()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """إغلاق جميع الاتصالات المفتوحة بقاعدة البيانات (المجمع أو الاتصال المؤقت)"""
+        if self._pool is not None:
+            self._pool.close()
+            logger.debug("Connection pool closed")
+        self._close()
+
     def _connect(self):
         try:
             """إنشاء اتصال بقاعدة البيانات"""
             if self._conn is None:
-                self._conn = sqlite3.connect(self.db_path)
+                self._conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements)
                 self._conn.row_factory = sqlite3.Row  # للوصول إلى الأعمدة بالاسم
+                self._configure_connection(self._conn)
                 self._cursor = self._conn.cursor()
-                print(f"DBM ✅ Connected to database at {self.db_path}")
+                logger.debug("✅ Connected to database at %s", self.db_path)
         except sqlite3.Error as e:
-            print(f"DBM ❌  Database Connection Error: {e}")
+            logger.error("❌ Database Connection Error: %s", e)
             return None
         
     
@@ -378,73 +730,352 @@ class DatabaseManager:
                 self._conn.close()
                 self._conn = None
                 self._cursor = None
-                print("DBM ❌ Connection closed")
+                logger.debug("Connection closed")
         except sqlite3.Error as e:
-            print(f"DBM ❌ Database Closing Error: {e}")
+            logger.error("❌ Database Closing Error: %s", e)
             return None
-        
+
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """تطبيق PRAGMA_PROFILE على اتصال جديد وتسجيل دوال SQL الخاصة بالتطبيق.
+        الإعداد الذي لا يمكن تطبيقه (e.g. WAL على قرص شبكي) يُسجل كتحذير ولا يمنع الاتصال.
+        """
+        # تستخدمها مشغلات Clients_fts
+        register_sql_functions(conn)
+        for name, value in self.pragmas.items():
+            if not name.isidentifier() or not str(value).lstrip('-').isalnum():
+                raise ValueError(f"Invalid PRAGMA: {name} = {value}")
+            try:
+                row = conn.execute(f"PRAGMA {name} = {value}").fetchone()
+            except sqlite3.Error as e:
+                logger.warning("⚠️ PRAGMA %s = %s not applied: %s", name, value, e)
+                continue
+            if name == 'journal_mode' and row and str(row[0]).upper() != str(value).upper():
+                # e.g. قاعدة بيانات في الذاكرة تبقى على journal_mode=memory
+                logger.warning("⚠️ journal_mode %s requested, database uses %s", value, row[0])
+
+    def _load_table_columns(self, table: str) -> List[str]:
+        """قراءة أسماء أعمدة جدول من المخطط (تستخدمها القائمة البيضاء في StatementBuilder)"""
+        rows = self.execute_query("SELECT name FROM pragma_table_info(?)", (table,))
+        return [row['name'] for row in rows] if rows else []
+
+    def _acquire_connection(self) -> sqlite3.Connection:
+        """الحصول على اتصال من المجمع (حتى _release_connection المقابلة)، أو اتصال مؤقت في الوضع القديم"""
+        if self._pool is not None:
+            return self._pool.acquire()
+        self._connect()
+        if self._conn is None:
+            raise sqlite3.OperationalError(f"unable to open database file {self.db_path}")
+        return self._conn
+
+    def _release_connection(self, conn: Optional[sqlite3.Connection]):
+        """إنهاء استخدام الاتصال بعد الاستعلام (كل _acquire_connection ناجحة تقابلها استدعاء واحد)"""
+        if self._pool is None:
+            if not self._in_transaction():
+                self._close()
+            return
+        if conn is None:
+            return
+        try:
+            # لا نترك معاملة ضمنية غير مؤكدة خارج transaction()
+            # (في الوضع القديم كان إغلاق الاتصال يلغيها تلقائياً)
+            if not self._in_transaction() and conn.in_transaction:
+                conn.rollback()
+        finally:
+            # داخل transaction() يبقى الاتصال مع الخيط لأن المعاملة نفسها تحمل acquire حتى نهايتها
+            self._pool.release()
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """_acquire_connection / _release_connection لمدة كتلة with"""
+        conn = self._acquire_connection()
+        try:
+            yield conn
+        finally:
+            self._release_connection(conn)
+
+    def _in_transaction(self) -> bool:
+        """هل يوجد transaction() مفتوح في الخيط الحالي؟"""
+        return getattr(self._tx, 'depth', 0) > 0
+
+    @contextmanager
+    def transaction(self) -> Iterator['DatabaseManager']:
+        """
+        تجميع عدة عمليات كتابة في معاملة واحدة (BEGIN ... COMMIT).
+
+        - داخل الكتلة، commit=True في execute_query لا يؤكد فوراً؛ التأكيد يتم مرة واحدة عند نهاية الكتلة.
+        - الكتل المتداخلة تستخدم SAVEPOINT، فالتراجع في كتلة داخلية لا يلغي الكتلة الخارجية.
+        - عند حدوث استثناء، أو فشل أي استعلام داخل الكتلة (حتى لو أرجعت الدالة None بدلاً من رفع الخطأ)،
+          يتم التراجع عن الكتلة كاملة ورفع الخطأ.
+
+        Example:
+            with db.transaction():
+                appointment_id = db.add_appointment({...})
+                db.add_invoice({'appointment_id': appointment_id, ...})
+        """
+        depth = getattr(self._tx, 'depth', 0)
+        # خطأ سابق في الكتلة الخارجية: التراجع عن الكتلة الداخلية لا يمحوه
+        outer_error = getattr(self._tx, 'error', None) if depth > 0 else None
+        conn = self._acquire_connection()
+        savepoint = f"tx_{depth}"
+        try:
+            if depth == 0:
+                conn.execute("BEGIN IMMEDIATE")
+                self._tx.error = None
+            else:
+                conn.execute(f"SAVEPOINT {savepoint}")
+        except sqlite3.Error:
+            self._release_connection(conn)
+            raise
+        self._tx.depth = depth + 1
+        try:
+            yield self
+            failure = self._tx.error
+            if failure is not None and failure is not outer_error:
+                raise sqlite3.DatabaseError(f"Transaction rolled back after a failed statement: {failure}")
+        except BaseException:
+            self._tx.error = outer_error
+            # ربما سُجلت مواعيد في محرك التوفر داخل الكتلة الملغاة
+            self.availability.invalidate()
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            logger.debug("↩️ Transaction rolled back (level %s)", depth)
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+                self.write_version += 1
+                logger.debug("💾 Transaction committed.")
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            self._tx.depth = depth
+            self._release_connection(conn)
+
     def execute_query(self, query: str, params: Optional[Tuple] = None, fetch_one: bool = False, commit: bool = False) -> Any:
         """دالة عامة لتنفيذ الاستعلامات"""
-        self._connect()
-        print(f"\n\n = ========DBM ⚙️ Executing query in table: {query[0:50]}  ")
+        conn = None
+        cursor = None
+        rows = 0
+        failed = False
+        started = time.perf_counter()
+        query_logger.debug("⚙️ Executing query: %.50s", query)
         try:
+            conn = self._acquire_connection()
+            cursor = conn.cursor()
             if params is None:
                 params = ()
-            self._cursor.execute(query, params)
-            print(f"DBM ⚙️ Executed query: ")
+            cursor.execute(query, params)
             if commit:
-                self._conn.commit()
+                if not self._in_transaction():
+                    conn.commit()
+                    self.write_version += 1
+                    query_logger.debug("💾 Changes committed to the database.")
+                rows = max(cursor.rowcount, 0)
                 # إرجاع معرّف آخر إدخال (لعمليات INSERT)
-                print("DBM commit 💾 Changes committed to the database.")
-                return self._cursor.lastrowid
+                return cursor.lastrowid
             
             if fetch_one:
-                print("DBM fetch_one 📥 Fetching one record.")
-                return self._cursor.fetchone()
+                query_logger.debug("📥 Fetching one record.")
+                result = cursor.fetchone()
+                rows = 0 if result is None else 1
             else:
-                print("DBM fetch_all 📥 Fetching all records.")
-                return self._cursor.fetchall()
+                query_logger.debug("📥 Fetching all records.")
+                result = cursor.fetchall()
+                rows = len(result)
+            return result
         
         except sqlite3.Error as e:
-            print(f"Database Error: {e}")
-            print(f"DBM except❗ Failed query: {query} | Params: {params}")
+            failed = True
+            logger.error("❌ Database Error: %s | Failed query: %.200s", e, query)
+            query_logger.debug("Params of failed query: %s", params)
+            if self._in_transaction():
+                # المعاملة المفتوحة سيتم التراجع عنها عند نهايتها
+                self._tx.error = e
             return None
         finally:
-            print(f"DBM finally❗ db close called.")
-            self._close()
-            print(f"=========DBM ⚙️ Query execution completed.\n\n")
+            if cursor is not None:
+                cursor.close()
+            if self._stats is not None or self.slow_query_ms is not None:
+                self._record_query(conn, query, params, started, rows, failed)
+            self._release_connection(conn)
+
+    def _record_query(self, conn: Optional[sqlite3.Connection], query: str, params: Optional[Tuple],
+                      started: float, rows: int, failed: bool):
+        """تسجيل قياس استعلام نفذته execute_query أو iter_query (يُستدعى قبل تحرير الاتصال)"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # 0 = هذه الدالة، 1 = execute_query/iter_query، 2 = الدالة التي استدعتها (أو التي استهلكت المولد)
+        try:
+            caller = sys._getframe(2).f_code.co_name
+        except ValueError:
+            caller = '<unknown>'
+        if self._stats is not None:
+            self._stats.record(query, elapsed_ms, rows, caller, failed)
+        if (self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+                and not failed and conn is not None):
+            self._log_slow_query(conn, query, params, elapsed_ms, caller)
+
+    @staticmethod
+    def _log_slow_query(conn: sqlite3.Connection, query: str, params: Optional[Tuple],
+                        elapsed_ms: float, caller: str):
+        """تسجيل استعلام بطيء مع خطة تنفيذه"""
+        plan: List[str] = []
+        if query.lstrip()[:6].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLAC'):
+            try:
+                # تنفيذ مباشر على نفس الاتصال: لا يُحتسب في الإحصائيات ولا يفسد معاملة مفتوحة
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ())]
+            except sqlite3.Error as e:
+                plan = [f"<unavailable: {e}>"]
+        logger.warning("🐢 Slow query (%.1f ms) in %s: %.200s | plan: %s",
+                       elapsed_ms, caller, normalize_sql(query), ' | '.join(plan) or '-')
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """إحصائيات الاستعلامات المنفذة حسب القالب (مرتبة حسب الزمن الكلي)
+        Args:
+            None
+        Returns:
+            Dict[str, Dict]: {'SELECT * FROM Clients WHERE client_id = ?': {'count': 12, 'errors': 0, 'rows': 12,
+                              'total_ms': 1.9, 'p50_ms': 0.1, 'p95_ms': 0.3, 'max_ms': 0.4,
+                              'callers': {'get_client_details': 12}}, ...}
+                قاموس فارغ إذا تم إنشاء المدير بـ collect_stats=False.
+        """
+        return self._stats.snapshot() if self._stats is not None else {}
+
+    def dump_stats(self, file_path: str = "query_stats.json") -> bool:
+        """حفظ إحصائيات الاستعلامات في ملف JSON
+        Args:
+            file_path (str): مسار الملف.
+        Returns:
+            bool: True عند النجاح.
+        """
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(self.stats(), f, ensure_ascii=False, indent=2)
+            logger.info("✅ Query stats written to %s", file_path)
+            return True
+        except OSError as e:
+            logger.error("❌ Error writing query stats: %s", e)
+            return False
+
+    def reset_stats(self):
+        """مسح إحصائيات الاستعلامات"""
+        if self._stats is not None:
+            self._stats.reset()
     
     
     def initialize_db(self):
-        """إنشاء الجداول إذا لم تكن موجودة"""
-        print("\n\n\n=========== DBM ⚙️ Initializing database schema... ==========")
+        """تجهيز قاعدة البيانات: تطبيق الترحيلات المعلقة فقط.
+        على قاعدة بيانات محدثة يكلف ذلك قراءة واحدة لـ PRAGMA user_version.
+        """
         try:
-            for i, schema in enumerate(SCHEMA_SQL):
-                self.execute_query(schema)
-                print(f"DBM ⚙️ Executed schema {i+1}/{len(SCHEMA_SQL)}")
-            self.set_default_settings()
-            self.set_default_license_info()
+            version = self.get_schema_version()
+            if version >= SCHEMA_VERSION:
+                return
+            logger.info("⚙️ Migrating database schema from version %s to %s...", version, SCHEMA_VERSION)
+            self.apply_migrations()
+            logger.info("✅ Database schema initialized.")
         except Exception as e:
-            print(f"Error initializing database: {e}")
-        print("=========== DBM ✅ Database schema initialized. ==========\n\n")
-
-        try: 
-            #check if default translation keys exist, if not insert them
-            existing_keys = self.execute_query("SELECT COUNT(*) as count FROM Translations")
-            if existing_keys and existing_keys[0]['count'] == 0:
-                self.execute_query(translations_keys, commit=True)
-                print("DBM ✅  Default translation keys ensured.")
-
-            #and if default theme values not exist insert them
-            if not self.get_default_theme():
-                for i in default_theme_values:
-                    self.execute_query(i, commit=True)
-                    print("DBM ✅  Default translation keys and theme values ensured.")
+            logger.error("❌ Error initializing database: %s", e)
 
-        except Exception as e:
-            print(f"DBM ❌ Error inserting default translation keys or theme values: {e}")
+    def get_schema_version(self) -> int:
+        """إرجاع إصدار مخطط قاعدة البيانات (PRAGMA user_version)"""
+        result = self.execute_query("PRAGMA user_version", fetch_one=True)
+        return result[0] if result else 0
 
+    def apply_migrations(self) -> int:
+        """تطبيق جميع الترحيلات المعلقة في معاملة واحدة (إما كلها أو لا شيء)
+        Args:
+            None
+        Returns:
+            int: إصدار المخطط بعد التطبيق.
+        """
+        with self.transaction():
+            # إعادة القراءة بعد أخذ قفل الكتابة: عملية أخرى ربما طبقت الترحيلات قبلنا
+            version = self.get_schema_version()
+            for target, description, steps in MIGRATIONS:
+                if target <= version:
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(self)
+                    else:
+                        self.execute_query(step, commit=True)
+                logger.info("⚙️ Migration %s applied: %s", target, description)
+            if version < SCHEMA_VERSION:
+                self.execute_query(f"PRAGMA user_version = {int(SCHEMA_VERSION)}", commit=True)
+        # أعمدة الجداول ربما تغيرت
+        self._statements.reset()
+        self._search_indexes.clear()
+        return max(version, SCHEMA_VERSION)
+
+    def explain_query_plan(self, query: str, params: Optional[Tuple] = None) -> List[str]:
+        """إرجاع خطة تنفيذ الاستعلام (EXPLAIN QUERY PLAN) كسطور نصية
+        Args:
+            query (str): الاستعلام.
+            params (Optional[Tuple]): معاملات الاستعلام.
+        Returns:
+            List[str]: e.g. ['SEARCH A USING INDEX idx_appointments_date_start (date=?)', 'SEARCH C USING INTEGER PRIMARY KEY (rowid=?)']
+        """
+        rows = self.execute_query(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row['detail'] for row in rows] if rows else []
 
+    def iter_query(self, query: str, params: Optional[Tuple] = None,
+                   batch_size: int = DEFAULT_FETCH_BATCH) -> Iterator[Dict]:
+        """تنفيذ استعلام SELECT وإرجاع الصفوف تدريجياً (fetchmany) بدلاً من تحميلها كلها في الذاكرة
+        Args:
+            query (str): الاستعلام.
+            params (Optional[Tuple]): معاملات الاستعلام.
+            batch_size (int): عدد الصفوف في كل دفعة.
+        Returns:
+            Iterator[Dict]: مولد (generator) يعطي صفاً واحداً (dict) في كل مرة. عند الخطأ يتوقف ويسجل الخطأ.
+        ملاحظة: المولد يحجز اتصالاً للخيط الذي بدأه حتى ينتهي، لذا يجب استهلاكه بالكامل أو إغلاقه (close())
+        في نفس الخيط. إذا أُغلق في خيط آخر (e.g. جمع القمامة) لا يُحرر الاتصال من هناك، ويعود إلى المجمع عند انتهاء خيطه.
+        """
+        own_conn = None
+        pooled_conn = None
+        cursor = None
+        conn = None
+        rows = 0
+        failed = False
+        owner = threading.get_ident()
+        started = time.perf_counter()
+        try:
+            if self._pool is None and not self._in_transaction():
+                # في الوضع القديم يُغلق الاتصال المشترك بعد كل استعلام، فالمولد يحتاج اتصالاً خاصاً به
+                own_conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements)
+                own_conn.row_factory = sqlite3.Row
+                self._configure_connection(own_conn)
+                conn = own_conn
+            else:
+                conn = pooled_conn = self._acquire_connection()
+            cursor = conn.execute(query, params or ())
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    rows += 1
+                    yield dict(row)
+        except sqlite3.Error as e:
+            failed = True
+            logger.error("❌ Database Error: %s | Failed query: %.200s", e, query)
+            if self._in_transaction():
+                self._tx.error = e
+        finally:
+            if threading.get_ident() != owner:
+                # release() في هذا الخيط ستنقص عداد اتصال خيط آخر
+                logger.warning("⚠️ iter_query closed outside its thread, connection left to its thread: %.200s", query)
+            else:
+                if cursor is not None:
+                    cursor.close()
+                if self._stats is not None or self.slow_query_ms is not None:
+                    self._record_query(conn, query, params, started, rows, failed)
+                if own_conn is not None:
+                    own_conn.close()
+                if pooled_conn is not None:
+                    self._release_connection(pooled_conn)
 
 
 # ----------------------------------------------------------------------
@@ -455,11 +1086,10 @@ class DatabaseManager:
         """إنشاء سجل إعدادات افتراضي إذا لم يكن موجودًا"""
         try:
             """إنشاء سجل إعدادات افتراضي إذا كان الجدول فارغًا"""
-            query = "INSERT INTO Settings (id, company_name, language,hardware_id) VALUES (1, 'Appointment Manager', 'ar', 'dummy_hardware_id')"
-            self.execute_query(query, commit=True)
-            print("DBM ✅  Default settings ensured.")
+            self.execute_query(DEFAULT_SETTINGS_SQL, commit=True)
+            logger.debug("✅ Default settings ensured.")
         except Exception as e:
-            print(f"DBM ❌ Error setting default settings: {e}")
+            logger.error("❌ Error setting default settings: %s", e)
 
     def get_settings(self) -> Optional[Dict]:
         """استرداد جميع الإعدادات
@@ -473,10 +1103,10 @@ class DatabaseManager:
         try:
             query = "SELECT * FROM Settings"
             result = self.execute_query(query, fetch_one=True)
-            print(f"DBM ⚙️ Retrieved settings: {result}")
+            logger.debug("⚙️ Retrieved settings: %s", result)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getter settings retrieving settings: {e}")
+            logger.error("❌ Error getter settings retrieving settings: %s", e)
             return None
     
     def update_settings(self, data: Dict) -> bool:
@@ -488,14 +1118,15 @@ class DatabaseManager:
         """
         try:
             """تحديث حقول الإعدادات (Setters)"""
-            # بناء جزء SET من الاستعلام ديناميكياً
-            set_parts = [f"{k} = ?" for k in data.keys() if k != 'id']
-            values = list(data.values())
-
-            query = f"UPDATE Settings SET {', '.join(set_parts)} WHERE id = 1"
-            return self.execute_query(query, tuple(values), commit=True) is not None
+            # بناء جملة UPDATE (نصها محفوظ لكل مجموعة أعمدة)
+            fields = {k: v for k, v in data.items() if k != 'id'}
+            query, values = self._statements.update('Settings', fields, {'id': 1})
+            updated = self.execute_query(query, values, commit=True) is not None
+            if updated:
+                self.availability.invalidate_settings()
+            return updated
         except Exception as e:
-            print(f"DBM ❌ Error setter settings updating settings: {e}")
+            logger.error("❌ Error setter settings updating settings: %s", e)
             return False
         
     def set_device_info(self, data: Dict) -> bool:
@@ -508,13 +1139,10 @@ class DatabaseManager:
 
         try:
             # يتم استخدام INSERT OR REPLACE لضمان وجود سجل واحد فقط (بسبب قيد UNIQUE)
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT OR REPLACE INTO Device_Info (id, {keys}) VALUES (1, {placeholders})"
+            query, values = self._statements.insert('Device_Info', {'id': 1, **data}, verb='INSERT OR REPLACE')
             return self.execute_query(query, values, commit=True) is not None
         except Exception as e:
-            print(f"DBM ❌ Error setter device info setting device info: {e}")
+            logger.error("❌ Error setter device info setting device info: %s", e)
             return False
         
     def get_device_info(self) -> Optional[Dict]:
@@ -530,7 +1158,7 @@ class DatabaseManager:
             result = self.execute_query(query, fetch_one=True)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getter device info retrieving device info: {e}")
+            logger.error("❌ Error getter device info retrieving device info: %s", e)
             return None
         
     def set_license_info(self, data: Dict) -> bool:
@@ -542,15 +1170,27 @@ class DatabaseManager:
         """
 
         try:
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT OR REPLACE INTO Licenses (id, {keys}) VALUES (1, {placeholders})"
+            query, values = self._statements.insert('Licenses', {'id': 1, **data}, verb='INSERT OR REPLACE')
             return self.execute_query(query, values, commit=True) is not None
         except Exception as e:
-            print(f"DBM ❌ Error setter license setting license info: {e}")
+            logger.error("❌ Error setter license setting license info: %s", e)
             return False
     
+    def update_license_info(self, data: Dict) -> bool:
+        """تحديث حقول محددة في سجل الترخيص دون استبدال السجل (e.g. ذاكرة التحقق)
+        Args:
+            data (Dict): e.g. {'verified_at': '2024-06-01T12:00:00', 'verification_receipt': 'hmac_hex'}
+        Returns:
+            bool: True إذا تم التحديث بنجاح، False خلاف ذلك.
+        """
+        try:
+            fields = {k: v for k, v in data.items() if k != 'id'}
+            query, values = self._statements.update('Licenses', fields, {'id': 1})
+            return self.execute_query(query, values, commit=True) is not None
+        except Exception as e:
+            logger.error("❌ Error setter license updating license info: %s", e)
+            return False
+
     def get_license_info(self) -> Optional[Dict]:
         """استرداد معلومات الترخيص
         Args:
@@ -564,16 +1204,15 @@ class DatabaseManager:
             result = self.execute_query(query, fetch_one=True)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getter license retrieving license info: {e}")
+            logger.error("❌ Error getter license retrieving license info: %s", e)
             return None
 
     def set_default_license_info(self):
         """إنشاء سجل ترخيص افتراضي إذا كان الجدول فارغًا"""
         try:
-            query = "INSERT OR IGNORE INTO Licenses (id, is_active) VALUES (1, 0)"
-            self.execute_query(query, commit=True)
+            self.execute_query(DEFAULT_LICENSE_SQL, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error setting default license info: {e}")
+            logger.error("❌ Error setting default license info: %s", e)
             return False
 # أضف هذه الدوال في القسم الخاص بـ "دوال الإعدادات والتراخيص" في DatabaseManager
 
@@ -592,13 +1231,13 @@ class DatabaseManager:
             bool: True إذا تم الإدخال بنجاح، False خلاف ذلك.
         """
         try:
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO theme ({keys}) VALUES ({placeholders})"
-            return self.execute_query(query, values, commit=True) is not None
+            query, values = self._statements.insert('theme', data)
+            if self.execute_query(query, values, commit=True) is None:
+                return False
+            self._theme_changed()
+            return True
         except Exception as e:
-            print(f"❌ Error inserting theme: {e}")
+            logger.error("❌ Error inserting theme: %s", e)
             return False
 
     def get_default_theme(self) -> Optional[int]:
@@ -615,7 +1254,7 @@ class DatabaseManager:
             result = self.execute_query(query)
             return result[0]['theme_id'] if result else None
         except Exception as e:
-            print(f"❌ Error getting default theme: {e}")
+            logger.error("❌ Error getting default theme: %s", e)
             return None
 
     def get_last_theme(self) -> Optional[int]:
@@ -629,10 +1268,10 @@ class DatabaseManager:
         """
         try:
             query = "SELECT theme_id FROM theme ORDER BY ROWID DESC LIMIT 1"
-            result = self.execute_query(query)
-            return result if result else None
+            result = self.execute_query(query, fetch_one=True)
+            return result['theme_id'] if result else None
         except Exception as e :
-            print(f"DBM ❌ Error getting the last theme id : {e}")
+            logger.error("❌ Error getting the last theme id : %s", e)
             return None
 
     def set_default_theme(self, theme_id: int) -> bool:
@@ -645,73 +1284,101 @@ class DatabaseManager:
             bool: True إذا تم التعيين بنجاح، False خلاف ذلك.
         """
         try:
-            # أولاً، إعادة تعيين الثيم الافتراضي الحالي
-            reset_query = "UPDATE theme SET is_default = 0 WHERE is_default = 1"
-            self.execute_query(reset_query, commit=True)
-            
-            # ثم تعيين الثيم الجديد كافتراضي
-            set_query = "UPDATE theme SET is_default = 1 WHERE theme_id = ?"
-            return self.execute_query(set_query, (theme_id,), commit=True) is not None
+            with self.transaction():
+                # أولاً، إعادة تعيين الثيم الافتراضي الحالي
+                reset_query = "UPDATE theme SET is_default = 0 WHERE is_default = 1"
+                self.execute_query(reset_query, commit=True)
+
+                # ثم تعيين الثيم الجديد كافتراضي
+                set_query = "UPDATE theme SET is_default = 1 WHERE theme_id = ?"
+                self.execute_query(set_query, (theme_id,), commit=True)
+            # get_theme_data() بدون معرف يعني ثيماً آخر الآن؛ بيانات الثيمات نفسها لم تتغير
+            self.theme_cache.discard(None)
+            self._current_theme_cache = None
+            self._theme_index = None
+            return True
         except Exception as e:
-            print(f"❌ Error setting default theme: {e}")
+            logger.error("❌ Error setting default theme: %s", e)
             return False
     
-    def update_theme_settings(self, data: Dict) -> bool:
+    def update_theme_settings(self, data: Dict, theme_id: Optional[int] = None) -> bool:
         """
         تحديث إعدادات التنسيق (Setter)
 
         Args:
             data (Dict): قاموس يحتوي على الحقول التي سيتم تحديثها، مثل {'theme_name': 'Dark Theme', 'state': 'active', 'is_default': 0}
+            theme_id (Optional[int]): الثيم المراد تحديثه؛ None = الثيم الحالي (الافتراضي).
         Returns:
             bool: True إذا تم التحديث بنجاح، False خلاف ذلك.
         
         """
         try:
-            if not data:
+            fields = {k: v for k, v in data.items() if k not in ('id', 'theme_id')}
+            if not fields:
                 return False
-
-            # بناء جزء SET من الاستعلام ديناميكياً
-            set_parts = [f"{k} = ?" for k in data.keys() if k != 'id']
-            values = list(data.values())
-
-            query = f"UPDATE theme SET {', '.join(set_parts)} WHERE id = 1"
-            return self.execute_query(query, tuple(values), commit=True) is not None
+            if theme_id is None:
+                theme_id = self.get_default_theme()
+                if theme_id is None:
+                    return False
+            query, values = self._statements.update('theme', fields, {'theme_id': theme_id})
+            if self.execute_query(query, values, commit=True) is None:
+                return False
+            self._theme_changed()
+            return True
         except Exception as e:
-            print(f"DBM ❌ Error setter theme updating theme settings: {e}")
+            logger.error("❌ Error setter theme updating theme settings: %s", e)
             return False
     #=========== theme elements ==========
-    @lru_cache(maxsize=10)
+    def _theme_changed(self):
+        """بعد أي كتابة على theme / theme_details: إصدار جديد للذاكرة المؤقتة وإعادة بناء الثيم الحالي عند الطلب"""
+        self.theme_cache.bump()
+        self._current_theme_cache = None
+        self._theme_index = None
+
     def get_theme_data(self, theme_id: Optional[int] = None) -> Dict[str, Dict]:
-        """استرداد بيانات الثيم مع caching"""
+        """استرداد بيانات الثيم مع caching (self.theme_cache، المفتاح None = الثيم الافتراضي)"""
+        cached = self.theme_cache.get(theme_id)
+        if cached is not None:
+            return cached
+        version = self.theme_cache.version
         try:
+            requested_id = theme_id
             if theme_id is None:
                 theme_id = self.get_default_theme()
                 if theme_id is None:
                     return {}
             
-            query = """
-            SELECT td.category, td.subcategory, td.element_name, 
-                   td.property_name, td.property_value, td.language,
-                   td.font_weight, td.font_size, t.theme_name
-            FROM theme_details td
-            JOIN theme t ON td.theme_id = t.theme_id
-            WHERE td.theme_id = ?
-            """
-            results = self.execute_query(query, (theme_id,))
+            results = self._fetch_theme_rows(theme_id)
             
             if not results:
                 return {}
             
             organized_theme = self._organize_theme_data(results)
+            self.theme_cache.put(requested_id, organized_theme, version)
             self._current_theme_cache = organized_theme
+            if theme_id != self._current_theme_id:
+                self._theme_index = None
             self._current_theme_id = theme_id
             
             return organized_theme
             
         except Exception as e:
-            print(f"❌ Error retrieving theme data: {e}")
+            logger.error("❌ Error retrieving theme data: %s", e)
             return {}
     
+    def _fetch_theme_rows(self, theme_id: int) -> Optional[List]:
+        """صفوف theme_details لثيم بترتيب إدخالها (نفس الترتيب لـ _organize_theme_data و ThemeIndex)"""
+        query = """
+        SELECT td.category, td.subcategory, td.element_name, 
+               td.property_name, td.property_value, td.language,
+               td.font_weight, td.font_size, t.theme_name
+        FROM theme_details td
+        JOIN theme t ON td.theme_id = t.theme_id
+        WHERE td.theme_id = ?
+        ORDER BY td.category, td.id
+        """
+        return self.execute_query(query, (theme_id,))
+
     def _organize_theme_data(self, results: List) -> Dict[str, Dict]:
         """تنظيم بيانات الثيم في هيكل هرمي"""
         theme_dict = {}
@@ -770,40 +1437,51 @@ class DatabaseManager:
         theme_data = self.get_current_theme()
         return theme_data.get(category, {})
     
-    def get_color(self, color_name: str) -> str:
+    @property
+    def analytics(self) -> 'AnalyticsEngine':
+        """مؤشرات لوحة التحكم (أعمدة محفوظة لكل فترة)، تُنشأ مع استيراد NumPy عند أول استخدام
+        Returns:
+            AnalyticsEngine: نفس الكائن في كل استدعاء.
+        """
+        if self._analytics is None:
+            with self._analytics_lock:
+                if self._analytics is None:
+                    from db.analytics import AnalyticsEngine
+                    self._analytics = AnalyticsEngine(self)
+        return self._analytics
+
+    def get_theme_index(self) -> ThemeIndex:
+        """فهرس الثيم الحالي (يُبنى مرة واحدة ثم يُعاد استخدامه حتى تعديل الثيم أو تبديله)
+        Returns:
+            ThemeIndex: فهرس فارغ إذا لم يوجد ثيم.
+        """
+        index = self._theme_index
+        if index is None:
+            theme_id = self._current_theme_id or self.get_default_theme()
+            rows = self._fetch_theme_rows(theme_id) if theme_id is not None else None
+            index = self._theme_index = ThemeIndex(rows or [], theme_id)
+        return index
+
+    def get_color(self, color_name: str, fuzzy: bool = True) -> str:
         """استرداد لون محدد بسهولة
         Args:
             color_name (str): اسم اللون الذي سيتم استرداده (مثل 'blue_trust', 'pure_white').
+            fuzzy (bool): إذا لم يوجد الاسم بالضبط، أول لون يحتوي اسمه على color_name (السلوك القديم).
         Returns:
             str: قيمة اللون (مثل '#2E86AB') أو سلسلة فارغة إذا لم يتم العثور عليه.
         """
-        colors = self.get_theme_by_category('color')
-        for subcategory in colors.values():
-            for element_name, properties in subcategory.items():
-                if color_name in element_name and 'property_value' in properties:
-                    return properties['property_value']
-        return ''
+        return self.get_theme_index().color(color_name, fuzzy)
     
-    def get_font_style(self, language: str, font_type: str) -> Dict:
+    def get_font_style(self, language: str, font_type: str, fuzzy: bool = True) -> Dict:
         """استرداد إعدادات الخط
         Args:
             language (str): اللغة (مثل 'ar' أو 'en').
             font_type (str): نوع الخط (مثل 'main_title', 'subtitle', 'normal', 'secondary').
+            fuzzy (bool): إذا لم يوجد النوع بالضبط (اسم عنصر أو فئة فرعية)، أول عنصر يحتوي "{font_type}_{language}".
         Returns:
             Dict: قاموس يحتوي على إعدادات الخط (مثل {'font_family': 'IBM Plex Sans Arabic', 'font_weight': 'Bold', 'font_size': '24px'}) أو قاموس فارغ إذا لم يتم العثور عليه.
         """
-        typography = self.get_theme_by_category('typography')
-        search_key = f"{font_type}_{language}"
-        
-        for subcategory in typography.values():
-            for element_name, properties in subcategory.items():
-                if search_key in element_name:
-                    return {
-                        'font_family': properties.get('property_value', ''),
-                        'font_weight': properties.get('font_weight', ''),
-                        'font_size': properties.get('font_size', '')
-                    }
-        return {}
+        return self.get_theme_index().font_style(language, font_type, fuzzy)
     
     def export_theme_to_json(self, theme_id: Optional[int] = None, file_path: str = "theme_export.json") -> bool:
         """تصدير الثيم إلى ملف JSON
@@ -827,10 +1505,10 @@ class DatabaseManager:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(export_data, f, indent=2, ensure_ascii=False)
             
-            print(f"✅ Theme exported successfully to {file_path}")
+            logger.info("✅ Theme exported successfully to %s", file_path)
             return True
         except Exception as e:
-            print(f"❌ Error exporting theme to JSON: {e}")
+            logger.error("❌ Error exporting theme to JSON: %s", e)
             return False
         
     def import_theme_from_json(self, file_path: str, theme_name: str = "imported_theme") -> Optional[int]:
@@ -847,32 +1525,36 @@ class DatabaseManager:
             
             theme_data = import_data.get('theme', {})
             
-            # إنشاء ثيم جديد
-            query = "INSERT INTO theme (theme_name, state) VALUES (?, 'active') RETURNING theme_id"
-            result = self.db_manager.execute_query(query, (theme_name,))
-            
-            if not result:
-                return None
-            
-            new_theme_id = result[0]['theme_id']
-            
-            # إدخال البيانات التفصيلية
-            self._insert_theme_details(new_theme_id, theme_data)
+            with self.transaction():
+                # إنشاء ثيم جديد
+                query = "INSERT INTO theme (theme_name, state) VALUES (?, 'active') RETURNING theme_id"
+                result = self.execute_query(query, (theme_name,))
+
+                if not result:
+                    return None
+
+                new_theme_id = result[0]['theme_id']
+
+                # إدخال البيانات التفصيلية
+                self._insert_theme_details(new_theme_id, theme_data)
             
             # مسح الكاش
-            self.get_theme_data.cache_clear()
-            self._current_theme_cache = None
+            self._theme_changed()
             
-            print(f"✅ Theme imported successfully with ID: {new_theme_id}")
+            logger.info("✅ Theme imported successfully with ID: %s", new_theme_id)
             return new_theme_id
             
         except Exception as e:
-            print(f"❌ Error importing theme from JSON: {e}")
+            logger.error("❌ Error importing theme from JSON: %s", e)
             return None
     
 
     def _insert_theme_details(self, theme_id: int, theme_data: Dict):
-        """إدخال البيانات التفصيلية للثيم (دالة مساعدة)"""
+        """إدخال البيانات التفصيلية للثيم (دالة مساعدة) في معاملة واحدة"""
+        with self.transaction():
+            self._insert_theme_rows(theme_id, theme_data)
+
+    def _insert_theme_rows(self, theme_id: int, theme_data: Dict):
         for category, category_data in theme_data.items():
             if isinstance(category_data, dict):
                 for subcategory, subcategory_data in category_data.items():
@@ -888,7 +1570,8 @@ class DatabaseManager:
                                         """
                                         self.execute_query(
                                             query, 
-                                            (theme_id, category, subcategory, element_name, property_name, property_value)
+                                            (theme_id, category, subcategory, element_name, property_name, property_value),
+                                            commit=True
                                         )
     
     def switch_theme(self, theme_id: int) -> bool:
@@ -905,19 +1588,19 @@ class DatabaseManager:
             result = self.execute_query(query, (theme_id,))
             
             if not result:
-                print(f"❌ Theme with ID {theme_id} not found or not active")
+                logger.warning("⚠️ Theme with ID %s not found or not active", theme_id)
                 return False
             
-            # مسح الكاش وتحميل الثيم الجديد
-            self.get_theme_data.cache_clear()
-            self._current_theme_cache = self.get_theme_data(theme_id)
+            # تحميل الثيم الجديد (من الكاش إذا كان محملاً من قبل)
             self.set_default_theme(theme_id)
+            self._current_theme_cache = self.get_theme_data(theme_id)
+            self._current_theme_id = theme_id
 
-            print(f"✅ Switched to theme ID: {theme_id}")
+            logger.info("✅ Switched to theme ID: %s", theme_id)
             return True
             
         except Exception as e:
-            print(f"❌ Error switching theme: {e}")
+            logger.error("❌ Error switching theme: %s", e)
             return False
 
     def _get_default_theme_id(self) -> Optional[int]:
@@ -927,7 +1610,7 @@ class DatabaseManager:
             result = self.execute_query(query)
             return result[0]['theme_id'] if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getting default theme ID: {e}")
+            logger.error("❌ Error getting default theme ID: %s", e)
             return None
 
         
@@ -958,7 +1641,7 @@ class DatabaseManager:
             if theme_id is None:
                 theme_id = self.get_default_theme()
                 if theme_id is None:
-                    print("❌ No default theme found")
+                    logger.warning("⚠️ No default theme found")
                     return False
             
             # بناء بيانات التحديث
@@ -1006,16 +1689,15 @@ class DatabaseManager:
             
             if result is not None:
                 # مسح الكاش لإجبار إعادة التحميل
-                self.get_theme_data.cache_clear()
-                self._current_theme_cache = None
-                print(f"✅ Theme element updated successfully: {category}.{subcategory}.{element_name}.{property_name}")
+                self._theme_changed()
+                logger.info("✅ Theme element updated successfully: %s.%s.%s.%s", category, subcategory, element_name, property_name)
                 return True
             else:
-                print("❌ Failed to update theme element")
+                logger.error("❌ Failed to update theme element")
                 return False
                 
         except Exception as e:
-            print(f"❌ Error updating theme element: {e}")
+            logger.error("❌ Error updating theme element: %s", e)
             return False
 
 
@@ -1027,24 +1709,22 @@ class DatabaseManager:
         
         Args:
             data (dict): { 'category': 'color', 'subcategory': 'status', 'element_name': 'danger_red', 'property_name': 'hex', 'property_value': '#F44336','language':'fr','font_weight':'' , 'font_size':'', 'theme_id': 1 }
+                بدون theme_id يُضاف العنصر إلى الثيم الافتراضي.
         
         Returns:
             bool: True إذا تم الإدخال بنجاح، False خلاف ذلك.
         """
 
         try:
-            default_theme_values = self.get_default_theme()
-            keys = ', '.join(data.keys())
-            data['theme_id'] = default_theme_values
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-
-            query = f"""
-                INSERT INTO theme_details ({keys}) VALUES ({placeholders})
-            """
-            return self.execute_query(query, values, commit=True) is not None
+            if data.get('theme_id') is None:
+                data = {**data, 'theme_id': self.get_default_theme()}
+            query, values = self._statements.insert('theme_details', data)
+            if self.execute_query(query, values, commit=True) is None:
+                return False
+            self._theme_changed()
+            return True
         except Exception as e:
-            print(f"DBM ❌ Error inserting theme_details: {e}")
+            logger.error("❌ Error inserting theme_details: %s", e)
             return False
 
     def add_complete_theme(self,data:dict,data_theme:dict) -> bool:
@@ -1066,18 +1746,25 @@ class DatabaseManager:
 
         """
         
-        self.add_theme(data)
         try:
             if not data_theme:
                 return False
-            for key, value in data_theme.items():
-                data_element = value
-                data_element['theme_id'] = self.get_last_theme()
-                self.add_theme_details_element(data_element)
+            with self.transaction():
+                # معرّف الثيم من الإدخال نفسه (lastrowid)، لا من get_last_theme / الثيم الافتراضي
+                query, values = self._statements.insert('theme', data)
+                theme_id = self.execute_query(query, values, commit=True)
+                if theme_id is None:
+                    raise sqlite3.OperationalError(f"theme {data.get('theme_name')!r} was not inserted")
+                for value in data_theme.values():
+                    if not self.add_theme_details_element({**value, 'theme_id': theme_id}):
+                        raise sqlite3.OperationalError(f"theme element {value.get('element_name')!r} was not inserted")
+            # مرة أخرى بعد التأكيد: قراءة من خيط آخر أثناء المعاملة ربما حفظت البيانات القديمة
+            self._theme_changed()
+            return True
 
 
         except Exception as e:
-            print(f"DBM ❌ Error inserting the complet theme {e}")
+            logger.error("❌ Error inserting the complet theme %s", e)
             return False
 
     
@@ -1098,13 +1785,10 @@ class DatabaseManager:
 
         try:
             """إضافة موظف استقبال جديد"""
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Users ({keys}) VALUES ({placeholders})"
+            query, values = self._statements.insert('Users', data)
             return self.execute_query(query, values, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error adding user: {e}")
+            logger.error("❌ Error adding user: %s", e)
             return None
 
     def get_user_by_username(self, username: str) -> Optional[Dict]:
@@ -1120,7 +1804,7 @@ class DatabaseManager:
             result = self.execute_query(query, (username,), fetch_one=True)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getting user by username: {e}")
+            logger.error("❌ Error getting user by username: %s", e)
             return None
     
     def add_client(self, data: Dict) -> Optional[int]:
@@ -1132,13 +1816,10 @@ class DatabaseManager:
         """
         try:
             data['created_at'] = datetime.now().isoformat()
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Clients ({keys}) VALUES ({placeholders})"
+            query, values = self._statements.insert('Clients', data)
             return self.execute_query(query, values, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error adding client: {e}")
+            logger.error("❌ Error adding client: %s", e)
             return None
         
     def get_client_details(self, client_id: int) -> Optional[Dict]:
@@ -1155,24 +1836,110 @@ class DatabaseManager:
             result = self.execute_query(query, (client_id,), fetch_one=True)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getting client details: {e}")
+            logger.error("❌ Error getting client details: %s", e)
             return None
     
     def search_clients(self, search_term: str) -> List[Dict]:
         """البحث عن عملاء بالاسم أو الهاتف (للإدخال و التقارير)
+        يطابق أي جزء من الاسم أو الهاتف (LIKE '%term%')، عبر فهرس Clients_trgm إن وجد.
+        للبحث أثناء الكتابة (بداية الكلمات، مرتب، بدون تأثر بالتشكيل) استخدم search_clients_ranked.
         Args:
             search_term (str): مصطلح البحث للبحث في حقول full_name أو phone_number.
         Returns:
             List[Dict]: [{'client_id': 1, 'full_name': 'Client One', 'phone_number': '123456789', 'email': 'client@example.com', 'notes': 'VIP client', 'created_at': '2024-06-01T12:00:00'}]"""
       
         try:
-            term = f'%{search_term}%'
-            query = "SELECT client_id, full_name, phone_number, email FROM Clients WHERE full_name LIKE ? OR phone_number LIKE ?"
-            results = self.execute_query(query, (term, term))
+            results = self.execute_query(*self._client_substring_query(search_term))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error searching clients: {e}")
+            logger.error("❌ Error searching clients: %s", e)
+            return []
+
+    def _client_substring_query(self, search_term: str) -> Tuple[str, Tuple]:
+        """استعلام search_clients / iter_search_clients: Clients_trgm إن أمكن، وإلا LIKE (مسح Clients)"""
+        if len(search_term or '') >= SUBSTRING_SEARCH_MIN_CHARS and self._has_search_index('Clients_trgm'):
+            # عبارة بين علامتي تنصيص = النص كما هو، في عمودي الاسم والهاتف فقط
+            match = '{full_name phone_number} : "' + search_term.replace('"', '""') + '"'
+            query = """
+                SELECT C.client_id, C.full_name, C.phone_number, C.email
+                FROM Clients_trgm
+                JOIN Clients C ON C.client_id = Clients_trgm.rowid
+                WHERE Clients_trgm MATCH ?
+            """
+            return query, (match,)
+        term = f'%{search_term}%'
+        query = "SELECT client_id, full_name, phone_number, email FROM Clients WHERE full_name LIKE ? OR phone_number LIKE ?"
+        return query, (term, term)
+
+    def _has_search_index(self, table: str) -> bool:
+        """هل تم إنشاء Clients_fts / Clients_trgm؟ (الترحيلان 4 و 7 يتخطيانه إذا لم تدعمه SQLite)"""
+        if table not in self._search_indexes:
+            row = self.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,), fetch_one=True)
+            self._search_indexes[table] = row is not None
+        return self._search_indexes[table]
+
+    @staticmethod
+    def _client_match_expression(tokens: List[str]) -> str:
+        """تعبير MATCH لـ FTS5: كل كلمة بين علامتي تنصيص (لتعطيل صيغة FTS5 داخلها) مع * للبحث ببداية الكلمة"""
+        return ' '.join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+    def search_clients_ranked(self, search_term: str, limit: Optional[int] = DEFAULT_SEARCH_LIMIT) -> List[Dict]:
+        """بحث سريع عن العملاء أثناء الكتابة (typeahead) عبر فهرس FTS5
+        كل كلمة في مصطلح البحث تطابق بداية كلمة في الاسم أو الهاتف أو البريد أو الملاحظات،
+        بعد توحيد النص (أحمد = احمد، Hélène = helene). النتائج مرتبة حسب الصلة (bm25).
+        Args:
+            search_term (str): e.g. 'ahm', 'احمد سع', '0666'
+            limit (Optional[int]): الحد الأقصى للنتائج (None = بدون حد).
+        Returns:
+            List[Dict]: [{'client_id': 1, 'full_name': 'أحمد سعيد', 'phone_number': '0666112233', 'email': 'ahmed@example.com', 'notes': 'VIP client'}]
+        """
+        tokens = search_tokens(search_term)
+        if not tokens:
             return []
+        if not self._has_search_index('Clients_fts'):
+            results = self.search_clients(search_term)
+            return results if limit is None else results[:limit]
+        match = self._client_match_expression(tokens)
+        if sum(map(len, tokens)) < RANKED_SEARCH_MIN_CHARS:
+            score = "Clients_fts.rowid"
+        else:
+            score = f"bm25(Clients_fts, {', '.join(map(str, CLIENT_SEARCH_WEIGHTS))})"
+        # الترتيب والحد داخل FTS5 أولاً، ثم قراءة صفوف Clients للنتائج فقط
+        query = f"""
+            SELECT C.client_id, C.full_name, C.phone_number, C.email, C.notes
+            FROM (
+                SELECT Clients_fts.rowid AS client_id, {score} AS score
+                FROM Clients_fts
+                WHERE Clients_fts MATCH ?
+                ORDER BY score
+                LIMIT ?
+            ) F
+            JOIN Clients C ON C.client_id = F.client_id
+            ORDER BY F.score
+        """
+        results = self.execute_query(query, (match, -1 if limit is None else limit))
+        return [dict(row) for row in results] if results else []
+
+    def iter_search_clients(self, search_term: str, batch_size: int = DEFAULT_FETCH_BATCH) -> Iterator[Dict]:
+        """كل العملاء المطابقين لبحث (بدون حد) كمولد يقرأ على دفعات، e.g. للتصدير
+        Args:
+            search_term (str): نفس صيغة search_clients (أي جزء من الاسم أو الهاتف).
+            batch_size (int): عدد الصفوف في كل fetchmany.
+        Returns:
+            Iterator[Dict]: [{'client_id': 1, 'full_name': 'Client One', 'phone_number': '123456789', 'email': 'client@example.com'}, ...]
+        """
+        query, params = self._client_substring_query(search_term)
+        return self.iter_query(query, params, batch_size)
+
+    # نص الاستعلام مشترك بين get_ و iter_ و _page
+    _CLIENT_HISTORY_SQL = """
+            SELECT A.*, S.name_ar as service_name
+            FROM Appointments A
+            LEFT JOIN Services S ON A.service_id = S.service_id
+            WHERE A.client_id = ? {after}
+            ORDER BY A.date DESC, A.start_time DESC, A.appointment_id DESC
+            """
 
     def get_client_appointments_history(self, client_id: int) -> List[Dict]:
         """استرداد جميع مواعيد عميل محدد (لتتبع العميل)
@@ -1183,19 +1950,56 @@ class DatabaseManager:
         """
 
         try:
-            query = """
-            SELECT A.*, S.name_ar as service_name
-            FROM Appointments A
-            LEFT JOIN Services S ON A.service_id = S.service_id
-            WHERE A.client_id = ?
-            ORDER BY A.date DESC, A.start_time DESC
-            """
+            query = self._CLIENT_HISTORY_SQL.format(after='')
             results = self.execute_query(query, (client_id,))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting client appointments history: {e}")
+            logger.error("❌ Error getting client appointments history: %s", e)
             return []
 
+    def iter_client_appointments_history(self, client_id: int, batch_size: int = DEFAULT_FETCH_BATCH) -> Iterator[Dict]:
+        """نفس get_client_appointments_history لكن كمولد يقرأ الصفوف على دفعات (لعميل قديم بتاريخ طويل)
+        Args:
+            client_id (int): معرف العميل.
+            batch_size (int): عدد الصفوف في كل fetchmany.
+        Returns:
+            Iterator[Dict]: نفس صيغة صفوف get_client_appointments_history.
+        """
+        return self.iter_query(self._CLIENT_HISTORY_SQL.format(after=''), (client_id,), batch_size)
+
+    def get_client_appointments_page(self, client_id: int, after: Optional[Tuple[str, str, int]] = None,
+                                     limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """صفحة من تاريخ مواعيد عميل (الأحدث أولاً) بترقيم keyset، للتمرير اللانهائي
+        Args:
+            client_id (int): معرف العميل.
+            after (Optional[Tuple[str, str, int]]): next_cursor من الصفحة السابقة، None للصفحة الأولى.
+            limit (int): عدد المواعيد في الصفحة.
+        Returns:
+            Dict[str, Any]: {'items': [...نفس صيغة get_client_appointments_history...], 'next_cursor': ('2024-06-10', '10:00', 42)}
+                next_cursor = None إذا لم تبقَ صفحات.
+        """
+        try:
+            params: Tuple = (client_id,)
+            condition = ''
+            if after is not None:
+                condition = "AND (A.date, A.start_time, A.appointment_id) < (?, ?, ?)"
+                params += tuple(after)
+            query = self._CLIENT_HISTORY_SQL.format(after=condition) + " LIMIT ?"
+            return self._keyset_page(self.execute_query(query, params + (limit + 1,)), limit)
+        except Exception as e:
+            logger.error("❌ Error getting client appointments page: %s", e)
+            return {'items': [], 'next_cursor': None}
+
+    @staticmethod
+    def _keyset_page(rows: Optional[List], limit: int) -> Dict[str, Any]:
+        """تحويل limit + 1 صف إلى صفحة ومؤشر للصفحة التالية (date, start_time, appointment_id)"""
+        items = [dict(row) for row in rows[:limit]] if rows else []
+        next_cursor = None
+        if rows and len(rows) > limit:
+            last = items[-1]
+            next_cursor = (last['date'], last['start_time'], last['appointment_id'])
+        return {'items': items, 'next_cursor': next_cursor}
+
 # ----------------------------------------------------------------------
 # 3. دوال المواعيد والخدمات (Appointments & Services)
 # ----------------------------------------------------------------------
@@ -1209,13 +2013,10 @@ class DatabaseManager:
          
 
         try:
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Services ({keys}) VALUES ({placeholders})"
+            query, values = self._statements.insert('Services', data)
             return self.execute_query(query, values, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error adding service: {e}")
+            logger.error("❌ Error adding service: %s", e)
             return None
     
     def add_appointment(self, data: Dict) -> Optional[int]:
@@ -1223,20 +2024,32 @@ class DatabaseManager:
         Args:
             data (Dict):{'client_id': 1, 'user_id': 1, 'service_id': 2, 'date': '2024-06-10', 'start_time': '10:00', 'duration_minutes': 30, 'status': 'confirmed', 'notes': '', 'is_paid': 0, 'reminder_set': 0, 'created_at': '2024-06-01T12:00:00', 'updated_at': '2024-06-01T12:00:00'}
         Returns:
-            Optional[int]: معرف الموعد الجديد إذا تم الإدخال بنجاح، None خلاف ذلك.
+            Optional[int]: معرف الموعد الجديد إذا تم الإدخال بنجاح، None عند خطأ في قاعدة البيانات.
+        Raises:
+            AppointmentConflictError: إذا تداخل الموعد مع موعد موجود (لم يُكتب شيء).
         """
         try:
-            """إضافة موعد جديد"""
+            """إضافة موعد جديد (يُرفض إذا تداخل مع موعد موجود)"""
             now = datetime.now().isoformat()
             data['created_at'] = now
             data['updated_at'] = now
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Appointments ({keys}) VALUES ({placeholders})"
-            return self.execute_query(query, values, commit=True)
+            # قفل الكتابة (BEGIN IMMEDIATE) يمنع أي اتصال آخر (خيط أو كائن أو عملية) من الكتابة بين
+            # الفحص والإدخال، والفحص يعيد قراءة اليوم داخل المعاملة فيرى ما أكده الآخرون قبلها
+            with self.transaction():
+                if self._appointment_conflicts(data):
+                    logger.warning("⚠️ Appointment rejected, time slot taken: %s %s",
+                                   data.get('date'), data.get('start_time'))
+                    raise AppointmentConflictError(data.get('date'), data.get('start_time'))
+                query, values = self._statements.insert('Appointments', data)
+                appointment_id = self.execute_query(query, values, commit=True)
+                if appointment_id is not None:
+                    self.availability.add(appointment_id, data['date'], data['start_time'],
+                                          data.get('duration_minutes'), data.get('status'), data.get('service_id'))
+            return appointment_id
+        except AppointmentConflictError:
+            raise
         except Exception as e:
-            print(f"DBM ❌ Error adding appointment: {e}")
+            logger.error("❌ Error adding appointment: %s", e)
             return None
 
     def update_appointment(self, appointment_id: int, data: Dict) -> bool:
@@ -1246,22 +2059,110 @@ class DatabaseManager:
             appointment_id (int): معرف الموعد الذي سيتم تحديثه.
             data (Dict): قاموس يحتوي على الحقول التي سيتم تحديثها، e.g {'status': 'canceled', 'notes': 'Client called to cancel'}{'client_id': 1, 'user_id': 1, 'service_id': 2, 'date': '2024-06-10', 'start_time': '10:00', 'duration_minutes': 30, 'status': 'confirmed', 'notes': '', 'is_paid': 0, 'reminder_set': 0, 'created_at': '2024-06-01T12:00:00', 'updated_at': '2024-06-01T12:00:00'}
         Returns:
-            bool: True إذا تم التحديث بنجاح، False خلاف ذلك.       
+            bool: True إذا تم التحديث بنجاح، False عند خطأ في قاعدة البيانات.
+        Raises:
+            AppointmentConflictError: إذا كان الوقت الجديد يتداخل مع موعد آخر (لم يُعدل شيء).
         """
         try:
             
             """تحديث موعد موجود (تغيير الحالة، الوقت، إلخ)"""
             data['updated_at'] = datetime.now().isoformat()
-            set_parts = [f"{k} = ?" for k in data.keys()]
-            values = list(data.values())
-            values.append(appointment_id)
-        
-            query = f"UPDATE Appointments SET {', '.join(set_parts)} WHERE appointment_id = ?"
-            return self.execute_query(query, tuple(values), commit=True) is not None
+            query, values = self._statements.update('Appointments', data, {'appointment_id': appointment_id})
+            with self.transaction():
+                current = None
+                if not SCHEDULE_FIELDS.isdisjoint(data):
+                    current = self.execute_query(
+                        "SELECT date, start_time, duration_minutes, status, service_id FROM Appointments WHERE appointment_id = ?",
+                        (appointment_id,), fetch_one=True)
+                if current is not None:
+                    current = {**dict(current), **data}
+                    if self._appointment_conflicts(current, exclude_id=appointment_id):
+                        logger.warning("⚠️ Appointment %s not moved, time slot taken: %s %s",
+                                       appointment_id, current.get('date'), current.get('start_time'))
+                        raise AppointmentConflictError(current.get('date'), current.get('start_time'),
+                                                       appointment_id)
+                updated = self.execute_query(query, values, commit=True) is not None
+                if updated and current is not None:
+                    self.availability.add(appointment_id, current['date'], current['start_time'],
+                                          current.get('duration_minutes'), current.get('status'), current.get('service_id'))
+            return updated
+        except AppointmentConflictError:
+            raise
         except Exception as e:
-            print(f"DBM ❌ Error updating appointment: {e}")
+            logger.error("❌ Error updating appointment: %s", e)
             return False
         
+    def _appointment_conflicts(self, data: Dict, exclude_id: Optional[int] = None) -> bool:
+        """هل يتداخل الموعد (بيانات add_appointment) مع موعد آخر؟ المواعيد الملغاة لا تتداخل.
+        تُستدعى داخل معاملة الكتابة: اليوم يُقرأ من قاعدة البيانات وليس من ذاكرة هذا الكائن."""
+        if str(data.get('status') or '').lower() in FREE_STATUSES:
+            return False
+        if not data.get('date') or not data.get('start_time'):
+            return False  # سيرفضه قيد NOT NULL
+        return self.availability.has_conflict(data['date'], data['start_time'], data.get('duration_minutes'),
+                                              data.get('service_id'), exclude_id, fresh=True)
+
+    def has_conflict(self, date: str, start_time: str, duration_minutes: Optional[int] = None,
+                     service_id: Optional[int] = None, exclude_id: Optional[int] = None) -> bool:
+        """هل يتداخل موعد مقترح مع موعد موجود؟
+        Args:
+            date (str): '2024-06-10'
+            start_time (str): '10:00'
+            duration_minutes (Optional[int]): المدة بالدقائق (وإلا مدة الخدمة).
+            service_id (Optional[int]): الخدمة.
+            exclude_id (Optional[int]): موعد يُستثنى (عند تعديل موعد موجود).
+        Returns:
+            bool: True إذا كان الوقت محجوزاً.
+        """
+        return self.availability.has_conflict(date, start_time, duration_minutes, service_id, exclude_id)
+
+    def find_free_slots(self, date: str, duration: Optional[int] = None, service_id: Optional[int] = None) -> List[str]:
+        """الأوقات المتاحة لبدء موعد ضمن ساعات العمل (Settings.start_time/end_time/working_days)
+        Args:
+            date (str): '2024-06-10'
+            duration (Optional[int]): مدة الموعد بالدقائق (وإلا مدة الخدمة).
+            service_id (Optional[int]): الخدمة.
+        Returns:
+            List[str]: e.g. ['09:00', '09:15', '11:30', ...]
+        """
+        try:
+            return self.availability.find_free_slots(date, duration, service_id)
+        except Exception as e:
+            logger.error("❌ Error finding free slots: %s", e)
+            return []
+
+    def book_appointment(self, appointment: Dict, invoice: Optional[Dict] = None,
+                         user_id: Optional[int] = None) -> Optional[int]:
+        """حجز موعد مع فاتورته وسجل التدقيق في معاملة واحدة (إما أن تنجح كلها أو لا شيء)
+        Args:
+            appointment (Dict): بيانات الموعد بنفس صيغة add_appointment.
+            invoice (Optional[Dict]): بيانات الفاتورة بنفس صيغة add_invoice (بدون appointment_id)، e.g., {'created_by_user_id': 1, 'total_amount': 150.0, 'payment_status': 'unpaid'}
+            user_id (Optional[int]): المستخدم المسجل في سجل التدقيق (افتراضياً user_id الخاص بالموعد).
+        Returns:
+            Optional[int]: معرف الموعد الجديد إذا نجحت العملية كاملة، None خلاف ذلك.
+        Raises:
+            AppointmentConflictError: إذا كان الوقت محجوزاً (لم يُكتب شيء).
+        """
+        try:
+            with self.transaction():
+                appointment_id = self.add_appointment(appointment)
+                if appointment_id is None:
+                    raise sqlite3.DatabaseError("appointment insert failed")
+                if invoice is not None:
+                    if self.add_invoice({**invoice, 'appointment_id': appointment_id}) is None:
+                        raise sqlite3.DatabaseError("invoice insert failed")
+                self.create_audit_log({
+                    'user_id': user_id if user_id is not None else appointment.get('user_id'),
+                    'action_type': 'BOOK_APPOINTMENT',
+                    'details': f"Booked appointment {appointment_id} for client_id {appointment.get('client_id')}",
+                })
+            return appointment_id
+        except AppointmentConflictError:
+            raise
+        except Exception as e:
+            logger.error("❌ Error booking appointment: %s", e)
+            return None
+
     def get_daily_appointments(self, date: str) -> List[Dict]:
         """استرداد جميع المواعيد ليوم محدد (للرؤية اليومية)
         Args:
@@ -1287,37 +2188,78 @@ class DatabaseManager:
             results = self.execute_query(query, (date,))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting daily appointments: {e}")
+            logger.error("❌ Error getting daily appointments: %s", e)
             return []
         
+    # نص الاستعلام مشترك بين get_ و iter_ و _page
+    _RANGE_APPOINTMENTS_SQL = """
+            SELECT 
+                A.appointment_id, A.date, A.start_time, A.duration_minutes, A.status,
+                C.full_name as client_name, 
+                S.name_ar as service_name_ar,
+                S.name_fr as service_name_fr
+            FROM Appointments A
+            JOIN Clients C ON A.client_id = C.client_id
+            LEFT JOIN Services S ON A.service_id = S.service_id
+            WHERE {lower_bound} AND A.date <= ?
+            ORDER BY A.date, A.start_time, A.appointment_id
+            """
+
     def get_weekly_appointments(self, start_date: str, end_date: str) -> List[Dict]:
         """استرداد جميع المواعيد لمدى زمني محدد (للرؤية الأسبوعية/الشهرية)
         Args:
             start_date (str): 'YYYY-MM-DD' format بداية المدى الزمني.
             end_date (str): 'YYYY-MM-DD' format نهاية المدى الزمني.
         Returns:the result will be a list of dictionaries containing the appointment fields along with client_name, service_name_ar, service_name_fr, date BETWEEN start_date, end_date ORDER BY appointments date, appointments start_time e.g.,
-            List[Dict]:[{'date': '2024-06-10', 'start_time': '10:00', 'duration_minutes': 30, 'status': 'confirmed', 'client_name': 'Client One', 'service_name_ar': 'Service One', 'service_name_fr': 'Service Un'}]
+            List[Dict]:[{'appointment_id': 1, 'date': '2024-06-10', 'start_time': '10:00', 'duration_minutes': 30, 'status': 'confirmed', 'client_name': 'Client One', 'service_name_ar': 'Service One', 'service_name_fr': 'Service Un'}]
         """
   
         try:
             """استرداد جميع المواعيد لمدى زمني محدد (للرؤية الأسبوعية/الشهرية)"""
-            query = """
-            SELECT 
-                A.date, A.start_time, A.duration_minutes, A.status,
-                C.full_name as client_name, 
-                S.name_ar as service_name_ar,
-                S.name_fr as service_name_fr
-            FROM Appointments A
-            JOIN Clients C ON A.client_id = C.client_id
-            LEFT JOIN Services S ON A.service_id = S.service_id
-            WHERE A.date BETWEEN ? AND ?
-            ORDER BY A.date, A.start_time
-            """
+            query = self._RANGE_APPOINTMENTS_SQL.format(lower_bound='A.date >= ?')
             results = self.execute_query(query, (start_date, end_date))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting weekly appointments: {e}")
+            logger.error("❌ Error getting weekly appointments: %s", e)
             return []
+
+    def iter_weekly_appointments(self, start_date: str, end_date: str,
+                                 batch_size: int = DEFAULT_FETCH_BATCH) -> Iterator[Dict]:
+        """نفس get_weekly_appointments لكن كمولد يقرأ الصفوف على دفعات (لمدى سنة كاملة مثلاً)
+        Args:
+            start_date (str): 'YYYY-MM-DD' بداية المدى الزمني.
+            end_date (str): 'YYYY-MM-DD' نهاية المدى الزمني.
+            batch_size (int): عدد الصفوف في كل fetchmany.
+        Returns:
+            Iterator[Dict]: نفس صيغة صفوف get_weekly_appointments.
+        """
+        return self.iter_query(self._RANGE_APPOINTMENTS_SQL.format(lower_bound='A.date >= ?'),
+                               (start_date, end_date), batch_size)
+
+    def get_appointments_page(self, start_date: str, end_date: str, after: Optional[Tuple[str, str, int]] = None,
+                              limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+        """صفحة من مواعيد مدى زمني بترقيم keyset على (date, start_time, appointment_id)، للتمرير اللانهائي.
+        بعكس OFFSET، تكلفة الصفحة لا تزيد كلما تقدمنا في القائمة.
+        Args:
+            start_date (str): 'YYYY-MM-DD' بداية المدى الزمني.
+            end_date (str): 'YYYY-MM-DD' نهاية المدى الزمني.
+            after (Optional[Tuple[str, str, int]]): next_cursor من الصفحة السابقة، None للصفحة الأولى.
+            limit (int): عدد المواعيد في الصفحة.
+        Returns:
+            Dict[str, Any]: {'items': [...نفس صيغة get_weekly_appointments...], 'next_cursor': ('2024-06-10', '10:00', 42)}
+                next_cursor = None إذا لم تبقَ صفحات.
+        """
+        try:
+            if after is None:
+                lower_bound, params = 'A.date >= ?', (start_date,)
+            else:
+                # المؤشر يحل محل بداية المدى، فيبدأ الفهرس من آخر صف في الصفحة السابقة مباشرة
+                lower_bound, params = '(A.date, A.start_time, A.appointment_id) > (?, ?, ?)', tuple(after)
+            query = self._RANGE_APPOINTMENTS_SQL.format(lower_bound=lower_bound) + " LIMIT ?"
+            return self._keyset_page(self.execute_query(query, params + (end_date, limit + 1)), limit)
+        except Exception as e:
+            logger.error("❌ Error getting appointments page: %s", e)
+            return {'items': [], 'next_cursor': None}
         
     def get_all_services(self) -> List[Dict]:
         """استرداد جميع الخدمات المتاحة
@@ -1332,7 +2274,7 @@ class DatabaseManager:
             results = self.execute_query(query)
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting all services: {e}")
+            logger.error("❌ Error getting all services: %s", e)
             return []
 
 
@@ -1353,15 +2295,16 @@ class DatabaseManager:
             query = """
             SELECT 
                 status, 
-                COUNT(appointment_id) as count
-            FROM Appointments
+                SUM(appointments) as count
+            FROM Daily_Stats
             WHERE date BETWEEN ? AND ?
             GROUP BY status
+            HAVING count > 0
             """
             results = self.execute_query(query, (start_date, end_date))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting attendance stats: {e}")
+            logger.error("❌ Error getting attendance stats: %s", e)
             return []
         
     def get_peak_hours_stats(self, start_date: str, end_date: str) -> List[Dict]:
@@ -1375,11 +2318,12 @@ class DatabaseManager:
  
         query = """
         SELECT 
-            STRFTIME('%H', start_time) as hour, 
-            COUNT(appointment_id) as count
-        FROM Appointments
+            hour, 
+            SUM(appointments) as count
+        FROM Daily_Stats
         WHERE date BETWEEN ? AND ? AND status IN ('Confirmed', 'Attended')
         GROUP BY hour
+        HAVING count > 0
         ORDER BY count DESC
         """
         
@@ -1387,9 +2331,53 @@ class DatabaseManager:
             results = self.execute_query(query, (start_date, end_date))
             return [dict(row) for row in results] if results else []
         except Exception as e:
-            print(f"DBM ❌ Error getting peak hours stats: {e}")
+            logger.error("❌ Error getting peak hours stats: %s", e)
+            return []
+
+    def get_revenue_stats(self, start_date: str, end_date: str) -> List[Dict]:
+        """إحصائية الإيرادات وعدد المواعيد لكل يوم (المواعيد الملغاة لا تُحسب في العدد)
+        Args:
+            start_date (str): 'YYYY-MM-DD' format بداية المدى الزمني.
+            end_date (str): 'YYYY-MM-DD' format نهاية المدى الزمني.
+        Returns:
+            List[Dict]: [{'date': '2024-06-10', 'appointments': 12, 'revenue': 1500.0}, ...]
+        """
+
+        query = """
+        SELECT 
+            date, 
+            SUM(CASE WHEN LOWER(status) IN ('cancelled', 'canceled') THEN 0 ELSE appointments END) as appointments,
+            SUM(revenue) as revenue
+        FROM Daily_Stats
+        WHERE date BETWEEN ? AND ?
+        GROUP BY date
+        HAVING SUM(appointments) > 0 OR SUM(revenue) != 0
+        ORDER BY date
+        """
+
+        try:
+            results = self.execute_query(query, (start_date, end_date))
+            return [dict(row) for row in results] if results else []
+        except Exception as e:
+            logger.error("❌ Error getting revenue stats: %s", e)
             return []
 
+    def get_dashboard_kpis(self, start_date: str, end_date: str) -> Dict[str, Any]:
+        """مؤشرات لوحة التحكم لفترة زمنية (نسبة الحضور، الغياب حسب اليوم، الإيرادات حسب الخدمة، ...)
+        Args:
+            start_date (str): 'YYYY-MM-DD' format بداية المدى الزمني.
+            end_date (str): 'YYYY-MM-DD' format نهاية المدى الزمني.
+        Returns:
+            Dict[str, Any]: {'appointments': 120, 'attendance_rate': 0.87, 'no_show_rate_by_weekday': {0: 0.1, ...},
+                             'revenue_by_service': {2: 6000.0}, 'avg_lead_time_days': 4.2, 'utilization': 0.375, ...}
+                (التفاصيل في AnalyticsEngine.kpis)، أو {} عند الخطأ.
+        """
+        try:
+            return self.analytics.kpis(start_date, end_date)
+        except Exception as e:
+            logger.error("❌ Error getting dashboard KPIs: %s", e)
+            return {}
+
 # ----------------------------------------------------------------------
 # 5. دوال الترجمة والفواتير (Translations & Invoices)
 # ----------------------------------------------------------------------
@@ -1411,7 +2399,7 @@ class DatabaseManager:
                 translation_dict[row['key']] = {'ar': row['ar'], 'fr': row['fr'], 'en': row['en']}
             return translation_dict
         except Exception as e:
-            print(f"DBM ❌ Error getting translations: {e}")
+            logger.error("❌ Error getting translations: %s", e)
             return {}
 
     def insert_translation(self, key: str, ar_text: str, fr_text: str, en_text: str) -> Optional[int]:
@@ -1428,7 +2416,7 @@ class DatabaseManager:
             query = "INSERT INTO Translations (key, ar, fr, en) VALUES (?, ?, ?, ?)"
             return self.execute_query(query, (key, ar_text, fr_text, en_text), commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error inserting translation: {e}")
+            logger.error("❌ Error inserting translation: %s", e)
             return None
 
     def add_invoice(self, data: Dict) -> Optional[int]:
@@ -1442,13 +2430,16 @@ class DatabaseManager:
         try:
             """إنشاء فاتورة جديدة"""
             data['issue_date'] = datetime.now().isoformat()
-            keys = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Invoices ({keys}) VALUES ({placeholders})"
-            return self.execute_query(query, values, commit=True)
+            with self.transaction():
+                if 'invoice_number' not in data:
+                    # الرقم التسلسلي التالي (المعاملة تمنع حصول فاتورتين على نفس الرقم)
+                    result = self.execute_query(
+                        "SELECT COALESCE(MAX(invoice_number), 1000) + 1 AS next_number FROM Invoices", fetch_one=True)
+                    data['invoice_number'] = result['next_number']
+                query, values = self._statements.insert('Invoices', data)
+                return self.execute_query(query, values, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error adding invoice: {e}")
+            logger.error("❌ Error adding invoice: %s", e)
             return None
         
     def get_invoice_by_appointment(self, appointment_id: int) -> Optional[Dict]:
@@ -1473,7 +2464,7 @@ class DatabaseManager:
             result = self.execute_query(query, (appointment_id,), fetch_one=True)
             return dict(result) if result else None
         except Exception as e:
-            print(f"DBM ❌ Error getting invoice by appointment: {e}")
+            logger.error("❌ Error getting invoice by appointment: %s", e)
             return None
 # ----------------------------------------------------------------------
 # 6. دوال  (Audit_Logs & )
@@ -1490,14 +2481,160 @@ class DatabaseManager:
 
         try:
             data['timestamp'] = datetime.now().isoformat()
-            key = ', '.join(data.keys())
-            placeholders = ', '.join(['?'] * len(data))
-            values = tuple(data.values())
-            query = f"INSERT INTO Audit_Logs ({key}) VALUES ({placeholders})"
+            query, values = self._statements.insert('Audit_Logs', data)
             return self.execute_query(query, values, commit=True)
         except Exception as e:
-            print(f"DBM ❌ Error creating audit log: {e}")
+            logger.error("❌ Error creating audit log: %s", e)
             return None
 
+# ----------------------------------------------------------------------
+# 7. دوال الإدخال الجماعي (Bulk inserts)
+# ----------------------------------------------------------------------
+
+    def _bulk_insert(self, table: str, rows: Iterable[Dict], defaults: Optional[Dict] = None,
+                     chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إدخال صفوف كثيرة باستخدام executemany على دفعات، كل دفعة في معاملة واحدة.
+
+        الصفوف المتتالية التي لها نفس الأعمدة تُرسل في استدعاء executemany واحد. إذا فشل
+        استدعاء بسبب قيد (مثل UNIQUE phone_number) يتم التراجع عن الدفعة كاملة وإعادة إدخال
+        صفوفها واحداً واحداً في معاملة جديدة لتحديد الصفوف المتعارضة فقط.
+        Args:
+            table (str): اسم الجدول.
+            rows (Iterable[Dict]): الصفوف (قائمة أو مولد generator).
+            defaults (Optional[Dict]): قيم افتراضية تضاف للصف إذا لم يحتوِ على العمود.
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [1, 2, ...], 'conflicts': [{'index': 5, 'row': {...}, 'error': 'UNIQUE constraint failed: Clients.phone_number'}]}
+        """
+        result = {'inserted_ids': [], 'conflicts': []}
+        primary_keys = {row['name'] for row in self.execute_query(
+            "SELECT name FROM pragma_table_info(?) WHERE pk > 0", (table,)) or []}
+        try:
+            numbered = enumerate(rows)
+            while True:
+                chunk = list(islice(numbered, chunk_size))
+                if not chunk:
+                    break
+                chunk_result = {'inserted_ids': [], 'conflicts': []}
+                try:
+                    with self.transaction(), self._connection() as conn:  # commit للدفعة أو rollback عند خطأ
+                        self._insert_chunk(conn, table, chunk, defaults or {}, primary_keys, chunk_result)
+                except sqlite3.IntegrityError:
+                    # لا نستخدم SAVEPOINT لكل executemany: مع مشغلات الجدول (Daily_Stats, Clients_fts)
+                    # يصبح كل صف داخله أبطأ عدة مرات (statement journal في الذاكرة)، والتعارض نادر
+                    chunk_result = {'inserted_ids': [], 'conflicts': []}
+                    with self.transaction(), self._connection() as conn:
+                        self._insert_chunk(conn, table, chunk, defaults or {}, primary_keys, chunk_result,
+                                           batched=False)
+                result['inserted_ids'].extend(chunk_result['inserted_ids'])
+                result['conflicts'].extend(chunk_result['conflicts'])
+                logger.debug("📦 Bulk insert into %s: %s rows so far", table, len(result['inserted_ids']))
+        except sqlite3.Error as e:
+            logger.error("❌ Bulk insert into %s stopped: %s", table, e)
+        return result
+
+    def _insert_chunk(self, conn: sqlite3.Connection, table: str, chunk: List[Tuple[int, Dict]],
+                      defaults: Dict, primary_keys: set, result: Dict[str, List], batched: bool = True):
+        """إدخال دفعة واحدة: تجميع الصفوف حسب الأعمدة ثم executemany لكل مجموعة
+        (batched=False: صفاً صفاً مع تسجيل الصفوف المتعارضة بدلاً من رفع IntegrityError)"""
+        group: List[Tuple[int, Dict]] = []
+        group_columns = None
+        for index, row in chunk:
+            row = {**defaults, **row}
+            columns = tuple(row.keys())
+            if group and columns != group_columns:
+                self._insert_group(conn, table, group_columns, group, primary_keys, result, batched)
+                group = []
+            group_columns = columns
+            group.append((index, row))
+        if group:
+            self._insert_group(conn, table, group_columns, group, primary_keys, result, batched)
+
+    def _insert_group(self, conn: sqlite3.Connection, table: str, columns: Tuple[str, ...],
+                      group: List[Tuple[int, Dict]], primary_keys: set, result: Dict[str, List],
+                      batched: bool = True):
+        """إدخال مجموعة صفوف لها نفس الأعمدة"""
+        try:
+            query = self._statements.insert_sql(table, columns)
+        except ValueError as e:
+            result['conflicts'].extend({'index': i, 'row': row, 'error': str(e)} for i, row in group)
+            return
+
+        cursor = conn.cursor()
+        try:
+            # المعرفات متتالية فقط إذا لم يحدد الصف المفتاح الأساسي بنفسه
+            if batched and not primary_keys.intersection(columns):
+                # IntegrityError يصل إلى _bulk_insert الذي يعيد الدفعة صفاً صفاً
+                cursor.executemany(query, (tuple(row.values()) for _, row in group))
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                result['inserted_ids'].extend(range(last_id - len(group) + 1, last_id + 1))
+                return
+
+            # صف بصف لتحديد التعارضات
+            for index, row in group:
+                try:
+                    cursor.execute(query, tuple(row.values()))
+                    result['inserted_ids'].append(cursor.lastrowid)
+                except sqlite3.IntegrityError as e:
+                    result['conflicts'].append({'index': index, 'row': row, 'error': str(e)})
+        finally:
+            cursor.close()
+
+    def bulk_add_clients(self, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إضافة عملاء بشكل جماعي (للترحيل من الأنظمة القديمة)
+        Args:
+            rows (Iterable[Dict]): [{'full_name': 'Client One', 'phone_number': '123456789', 'email': 'client@example.com', 'notes': '', 'created_at': '2024-06-01T12:00:00'}, ...]
+                created_at اختياري (يستخدم الوقت الحالي إذا لم يحدد).
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [...], 'conflicts': [{'index': 3, 'row': {...}, 'error': 'UNIQUE constraint failed: Clients.phone_number'}]}
+        """
+        return self._bulk_insert('Clients', rows, {'created_at': datetime.now().isoformat()}, chunk_size)
+
+    def bulk_add_appointments(self, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إضافة مواعيد بشكل جماعي
+        Args:
+            rows (Iterable[Dict]): [{'client_id': 1, 'user_id': 1, 'service_id': 2, 'date': '2024-06-10', 'start_time': '10:00', 'duration_minutes': 30, 'status': 'Confirmed'}, ...]
+                created_at و updated_at اختياريان. لا يتم فحص تداخل المواعيد (استيراد بيانات موجودة).
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [...], 'conflicts': [...]}
+        """
+        now = datetime.now().isoformat()
+        try:
+            return self._bulk_insert('Appointments', rows, {'created_at': now, 'updated_at': now}, chunk_size)
+        finally:
+            self.availability.invalidate()
 
-    
\ No newline at end of file
+    def bulk_add_services(self, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إضافة خدمات بشكل جماعي
+        Args:
+            rows (Iterable[Dict]): [{'name_ar': 'Service One', 'name_fr': 'Service Un', 'price': 50.0, 'duration_minutes': 30, 'is_active': 1}, ...]
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [...], 'conflicts': [...]}
+        """
+        return self._bulk_insert('Services', rows, None, chunk_size)
+
+    def bulk_add_audit_logs(self, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إضافة سجلات تدقيق بشكل جماعي
+        Args:
+            rows (Iterable[Dict]): [{'user_id': 1, 'action_type': 'IMPORT', 'details': '...', 'timestamp': '2024-06-01T12:00:00'}, ...]
+                timestamp اختياري.
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [...], 'conflicts': [...]}
+        """
+        return self._bulk_insert('Audit_Logs', rows, {'timestamp': datetime.now().isoformat()}, chunk_size)
+
+    def bulk_add_invoices(self, rows: Iterable[Dict], chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, List]:
+        """إضافة فواتير بشكل جماعي
+        Args:
+            rows (Iterable[Dict]): [{'invoice_number': 1001, 'appointment_id': 1, 'created_by_user_id': 1, 'issue_date': '2024-06-10', 'total_amount': 150.0, 'payment_status': 'paid'}, ...]
+                invoice_number إلزامي (بعكس add_invoice لا يتم توليده)؛ issue_date و payment_status اختياريان.
+            chunk_size (int): عدد الصفوف في كل معاملة.
+        Returns:
+            Dict[str, List]: {'inserted_ids': [...], 'conflicts': [...]}
+        """
+        return self._bulk_insert('Invoices', rows, {'issue_date': datetime.now().isoformat(),
+                                                    'payment_status': 'unpaid'}, chunk_size)
@@ -0,0 +1,137 @@
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, Optional, Any
+
+"""
+QS = Query Stats: قياس زمن الاستعلامات وتجميعها حسب قالب الاستعلام (query template).
+- كل تنفيذ يسجل: الزمن الفعلي (ms)، عدد الصفوف، واسم الدالة المستدعية.
+- القالب هو نص الاستعلام بعد توحيد المسافات واستبدال القيم الحرفية بـ ?، فتُجمع
+  الاستعلامات المتشابهة (e.g. "... WHERE id = 5" و "... WHERE id = 7") في سجل واحد.
+- النسب المئوية (p50, p95) تحسب من آخر sample_size قياس لكل قالب (ذاكرة محدودة).
+"""
+
+DEFAULT_SAMPLE_SIZE = 512       # عدد القياسات المحفوظة لكل قالب
+DEFAULT_SLOW_QUERY_MS = 100.0   # حد الاستعلام البطيء بالمللي ثانية
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(query: str) -> str:
+    """
+    تحويل نص استعلام إلى قالبه.
+
+    Args:
+        query (str): e.g. "SELECT * FROM Clients WHERE client_id = 5 AND name IN (?, ?, ?)"
+    Returns:
+        str: e.g. "SELECT * FROM Clients WHERE client_id = ? AND name IN (?...)"
+    """
+    sql = _WHITESPACE_RE.sub(' ', query).strip()
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _IN_LIST_RE.sub('(?...)', sql)
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    """النسبة المئوية بطريقة nearest-rank على قائمة مرتبة"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class _TemplateStats:
+    """إحصائيات قالب استعلام واحد"""
+
+    __slots__ = ('count', 'errors', 'total_ms', 'max_ms', 'rows', 'samples', 'callers')
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+        self.callers: Dict[str, int] = {}
+
+
+class QueryStats:
+    """
+    مجمع قياسات الاستعلامات (آمن للاستخدام من عدة خيوط).
+    """
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        """
+        Args:
+            sample_size (int): عدد القياسات الأخيرة المحفوظة لكل قالب لحساب p50/p95.
+        """
+        self.sample_size = sample_size
+        self._templates: Dict[str, _TemplateStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, elapsed_ms: float, rows: int = 0,
+               caller: Optional[str] = None, error: bool = False):
+        """
+        تسجيل تنفيذ استعلام واحد.
+
+        Args:
+            query (str): نص الاستعلام (يتم تحويله إلى قالب).
+            elapsed_ms (float): الزمن الفعلي بالمللي ثانية.
+            rows (int): عدد الصفوف المُرجعة أو المتأثرة.
+            caller (Optional[str]): اسم الدالة المستدعية، e.g. 'get_daily_appointments'.
+            error (bool): True إذا فشل الاستعلام.
+        """
+        template = normalize_sql(query)
+        with self._lock:
+            stats = self._templates.get(template)
+            if stats is None:
+                stats = self._templates[template] = _TemplateStats(self.sample_size)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.rows += rows
+            stats.samples.append(elapsed_ms)
+            if elapsed_ms > stats.max_ms:
+                stats.max_ms = elapsed_ms
+            if error:
+                stats.errors += 1
+            if caller:
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        نسخة من الإحصائيات الحالية، مرتبة تنازلياً حسب الزمن الكلي.
+
+        Returns:
+            Dict[str, Dict]: {'SELECT * FROM Clients WHERE client_id = ?': {'count': 12, 'errors': 0, 'rows': 12,
+                              'total_ms': 1.9, 'p50_ms': 0.1, 'p95_ms': 0.3, 'max_ms': 0.4,
+                              'callers': {'get_client_details': 12}}, ...}
+        """
+        with self._lock:
+            items = [(template, stats.count, stats.errors, stats.rows, stats.total_ms,
+                      stats.max_ms, list(stats.samples), dict(stats.callers))
+                     for template, stats in self._templates.items()]
+        result = {}
+        for template, count, errors, rows, total_ms, max_ms, samples, callers in sorted(
+                items, key=lambda item: item[4], reverse=True):
+            samples.sort()  # خارج القفل حتى لا نؤخر الخيوط التي تسجل قياسات
+            result[template] = {
+                'count': count,
+                'errors': errors,
+                'rows': rows,
+                'total_ms': round(total_ms, 3),
+                'p50_ms': round(_percentile(samples, 0.50), 3),
+                'p95_ms': round(_percentile(samples, 0.95), 3),
+                'max_ms': round(max_ms, 3),
+                'callers': callers,
+            }
+        return result
+
+    def reset(self):
+        """مسح جميع القياسات"""
+        with self._lock:
+            self._templates.clear()
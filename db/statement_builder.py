@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, Optional, Tuple, Any
+
+"""
+SB = Statement Builder: بناء نصوص INSERT/UPDATE الديناميكية مرة واحدة لكل (جدول، أعمدة).
+- أسماء الأعمدة يتم التحقق منها مقابل مخطط الجدول (PRAGMA table_info) قبل إدخالها في نص SQL.
+- النص الناتج ثابت لنفس مجموعة الأعمدة، لذلك يستفيد من ذاكرة sqlite3 المؤقتة للجمل المُحضّرة
+  (cached_statements) فلا يعاد تحليل الجملة وتخطيطها مع كل استدعاء.
+"""
+
+DEFAULT_SQL_CACHE_SIZE = 256
+
+
+class StatementBuilder:
+    """
+    مولد جمل SQL مع ذاكرة مؤقتة لنص الجملة وقائمة بيضاء للأعمدة.
+    """
+
+    def __init__(self, column_loader: Callable[[str], Iterable[str]], max_entries: int = DEFAULT_SQL_CACHE_SIZE):
+        """
+        Args:
+            column_loader (Callable[[str], Iterable[str]]): دالة تُرجع أسماء أعمدة جدول معين.
+            max_entries (int): الحد الأقصى لعدد نصوص SQL المحفوظة.
+        """
+        self._column_loader = column_loader
+        self._max_entries = max_entries
+        self._columns: Dict[str, FrozenSet[str]] = {}
+        self._sql_cache: 'OrderedDict[Tuple, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def columns(self, table: str) -> FrozenSet[str]:
+        """أسماء أعمدة الجدول (تُقرأ من المخطط مرة واحدة)"""
+        columns = self._columns.get(table)
+        if columns is None:
+            columns = frozenset(self._column_loader(table))
+            if not columns:
+                raise ValueError(f"Unknown table: {table}")
+            self._columns[table] = columns
+        return columns
+
+    def _check_columns(self, table: str, columns: Tuple[str, ...]):
+        """رفض أي عمود غير موجود في مخطط الجدول"""
+        unknown = [c for c in columns if c not in self.columns(table)]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table}: {', '.join(unknown)}")
+
+    def _cached(self, key: Tuple, build: Callable[[], str]) -> str:
+        with self._lock:
+            sql = self._sql_cache.get(key)
+            if sql is not None:
+                self._sql_cache.move_to_end(key)
+                return sql
+        sql = build()
+        with self._lock:
+            self._sql_cache[key] = sql
+            if len(self._sql_cache) > self._max_entries:
+                self._sql_cache.popitem(last=False)
+        return sql
+
+    def insert_sql(self, table: str, columns: Tuple[str, ...], verb: str = "INSERT") -> str:
+        """
+        نص جملة INSERT لمجموعة أعمدة.
+
+        Args:
+            table (str): اسم الجدول.
+            columns (Tuple[str, ...]): أسماء الأعمدة بالترتيب.
+            verb (str): 'INSERT' أو 'INSERT OR REPLACE' أو 'INSERT OR IGNORE'.
+        Returns:
+            str: e.g. "INSERT INTO Clients (full_name, phone_number) VALUES (?, ?)"
+        """
+        def build():
+            self._check_columns(table, columns)
+            placeholders = ', '.join(['?'] * len(columns))
+            return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        return self._cached(('insert', verb, table, columns), build)
+
+    def update_sql(self, table: str, columns: Tuple[str, ...], where_columns: Tuple[str, ...]) -> str:
+        """
+        نص جملة UPDATE لمجموعة أعمدة مع شروط مساواة.
+
+        Returns:
+            str: e.g. "UPDATE Appointments SET status = ?, notes = ? WHERE appointment_id = ?"
+        """
+        def build():
+            self._check_columns(table, columns + where_columns)
+            set_parts = ', '.join(f"{c} = ?" for c in columns)
+            where_parts = ' AND '.join(f"{c} = ?" for c in where_columns)
+            return f"UPDATE {table} SET {set_parts} WHERE {where_parts}"
+        return self._cached(('update', table, columns, where_columns), build)
+
+    def insert(self, table: str, data: Dict[str, Any], verb: str = "INSERT") -> Tuple[str, Tuple]:
+        """إرجاع (نص INSERT، القيم) لقاموس بيانات"""
+        if not data:
+            raise ValueError(f"No columns given for {table}")
+        return self.insert_sql(table, tuple(data.keys()), verb), tuple(data.values())
+
+    def update(self, table: str, data: Dict[str, Any], where: Dict[str, Any]) -> Tuple[str, Tuple]:
+        """إرجاع (نص UPDATE، القيم) لقاموس بيانات وقاموس شروط"""
+        if not data:
+            raise ValueError(f"No columns given for {table}")
+        sql = self.update_sql(table, tuple(data.keys()), tuple(where.keys()))
+        return sql, tuple(data.values()) + tuple(where.values())
+
+    def reset(self, table: Optional[str] = None):
+        """مسح الذاكرة المؤقتة (بعد تعديل المخطط)"""
+        with self._lock:
+            if table is None:
+                self._columns.clear()
+                self._sql_cache.clear()
+            else:
+                self._columns.pop(table, None)
+                for key in [k for k in self._sql_cache if table in k]:
+                    del self._sql_cache[key]
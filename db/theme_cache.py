@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Any
+
+"""
+TC = Theme Cache: ذاكرة مؤقتة لبيانات الثيمات خاصة بكل DatabaseManager (بدلاً من lru_cache على الدالة).
+- المفتاح صريح (theme_id، و None للثيم الافتراضي)، والإخلاء LRU بعد maxsize ثيم.
+- رقم الإصدار (version) يزداد مع كل كتابة على الثيمات؛ النتيجة المحملة قبل الكتابة لا تُحفظ بعدها.
+- عدادات hits / misses لمعرفة فعالية الذاكرة (stats()).
+"""
+
+DEFAULT_THEME_CACHE_SIZE = 10
+
+
+class ThemeCache:
+    """
+    ذاكرة LRU محدودة لبيانات الثيمات (آمنة للاستخدام من عدة خيوط).
+
+    Example:
+        version = cache.version
+        data = cache.get(theme_id)
+        if data is None:
+            data = load(theme_id)
+            cache.put(theme_id, data, version)
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_THEME_CACHE_SIZE):
+        """
+        Args:
+            maxsize (int): الحد الأقصى لعدد الثيمات المحفوظة.
+        """
+        self.maxsize = maxsize
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """القيمة المحفوظة أو None (مع تحديث العدادات)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: int):
+        """
+        حفظ قيمة تم تحميلها عندما كان رقم الإصدار version.
+
+        Args:
+            key (Hashable): e.g. theme_id
+            value (Any): البيانات.
+            version (int): قيمة self.version قبل بدء التحميل؛ إذا تغيرت (كتابة أثناء التحميل) لا تُحفظ القيمة.
+        """
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def bump(self) -> int:
+        """تسجيل كتابة على الثيمات: زيادة رقم الإصدار ومسح كل القيم"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+
+    def discard(self, key: Hashable) -> int:
+        """مثل bump لكن يمسح مفتاحاً واحداً، e.g. None بعد تغيير الثيم الافتراضي"""
+        with self._lock:
+            self.version += 1
+            self._entries.pop(key, None)
+            return self.version
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: {'hits': 120, 'misses': 3, 'size': 2, 'maxsize': 10, 'version': 4}
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                    'maxsize': self.maxsize, 'version': self.version}
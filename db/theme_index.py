@@ -0,0 +1,160 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+
+"""
+TI = Theme Index: فهرس مسطح لعناصر الثيم يُبنى مرة واحدة لكل ثيم.
+- كل قيمة محفوظة بمفتاح كامل (category, subcategory, element, property, language)، فالقراءة O(1).
+- get_color و get_font_style تبحث أولاً بالاسم الدقيق (اسم العنصر أو الفئة الفرعية).
+- البحث التقريبي (fuzzy) خطوة منفصلة وصريحة (fuzzy=True): أول عنصر يحتوي الاسم حسب ترتيب
+  صفوف الثيم، ونتيجته تُحفظ فلا يتكرر المسح.
+- الفهرس لا يتغير بعد بنائه؛ DatabaseManager يبني فهرساً جديداً عند تعديل الثيم أو تبديله.
+"""
+
+logger = logging.getLogger('DBM')
+
+ThemeKey = Tuple[str, Optional[str], str, str, Optional[str]]
+
+
+class ThemeIndex:
+    """
+    فهرس ثيم واحد.
+
+    Example:
+        index = ThemeIndex(rows)   # صفوف theme_details (category, subcategory, element_name, property_name, ...)
+        index.color('blue_trust')                       # '#2E86AB'
+        index.font_style('ar', 'main_title')            # {'font_family': 'IBM Plex Sans Arabic', ...}
+        index.get('button', 'primary', 'primary_button', 'border_radius')   # '8px'
+    """
+
+    def __init__(self, rows: Iterable[Any], theme_id: Optional[int] = None):
+        """
+        Args:
+            rows (Iterable): صفوف theme_details تحتوي category, subcategory, element_name, property_name,
+                property_value, language, font_weight, font_size (sqlite3.Row أو dict).
+            theme_id (Optional[int]): معرف الثيم (للمعلومات فقط).
+        """
+        self.theme_id = theme_id
+        self._values: Dict[ThemeKey, str] = {}
+        # (category, element, language) -> {property: value} بترتيب الصفوف
+        self._elements: Dict[Tuple[str, str, Optional[str]], Dict[str, str]] = {}
+        self._subcategories: Dict[Tuple[str, str, Optional[str]], Optional[str]] = {}
+        self._colors: Dict[str, str] = {}
+        self._fonts: Dict[Tuple[str, Optional[str]], Dict[str, str]] = {}
+        # مرشحو البحث التقريبي بنفس ترتيب get_theme_data (الفئة الفرعية ثم العنصر): subcategory -> [(الاسم، القيمة)]
+        self._color_names: Dict[Optional[str], list] = {}
+        self._font_names: Dict[Optional[str], list] = {}
+        self._fuzzy: Dict[Tuple[str, str], Any] = {}
+
+        for row in rows:
+            row = dict(row)
+            category = row.get('category')
+            subcategory = row.get('subcategory')
+            element = row.get('element_name') or ''
+            language = row.get('language') or None
+            properties = self._elements.setdefault((category, element, language), {})
+            self._subcategories.setdefault((category, element, language), subcategory)
+            self._values[(category, subcategory, element, row.get('property_name'), language)] = row.get('property_value')
+            properties.setdefault(row.get('property_name'), row.get('property_value'))
+            for extra in ('font_weight', 'font_size'):
+                if row.get(extra):
+                    self._values[(category, subcategory, element, extra, language)] = row[extra]
+                    properties.setdefault(extra, row[extra])
+
+            if category == 'color' and element not in self._colors:
+                # قيمة اللون = أول خاصية للعنصر (hex)، كما في get_color القديمة
+                self._colors[element] = row.get('property_value')
+                self._color_names.setdefault(subcategory, []).append(
+                    (f"{element}_{language}" if language and subcategory else element, row.get('property_value')))
+            elif category == 'typography':
+                font = {'font_family': row.get('property_value') or '',
+                        'font_weight': row.get('font_weight') or '',
+                        'font_size': row.get('font_size') or ''}
+                for name in (element, subcategory):
+                    if name:
+                        self._fonts.setdefault((name, language), font)
+                self._font_names.setdefault(subcategory, []).append(
+                    (f"{element}_{language}" if language and subcategory else element, font))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, category: str, subcategory: Optional[str], element: str, property_name: str,
+            language: Optional[str] = None, default: Optional[str] = None) -> Optional[str]:
+        """
+        قيمة خاصية بالمفتاح الكامل.
+
+        Args:
+            category (str): e.g. 'button'
+            subcategory (Optional[str]): e.g. 'primary'
+            element (str): e.g. 'primary_button'
+            property_name (str): e.g. 'border_radius' (أو 'font_weight' / 'font_size')
+            language (Optional[str]): e.g. 'ar' لعناصر typography
+            default (Optional[str]): القيمة إذا لم يوجد المفتاح.
+        Returns:
+            Optional[str]: e.g. '8px'
+        """
+        return self._values.get((category, subcategory, element, property_name, language), default)
+
+    def element(self, category: str, element: str, language: Optional[str] = None) -> Dict[str, str]:
+        """
+        كل خصائص عنصر (بدون الحاجة للفئة الفرعية).
+
+        Returns:
+            Dict[str, str]: e.g. {'background': '#2E86AB', 'text_color': '#FFFFFF', 'border_radius': '8px', ...}
+        """
+        return self._elements.get((category, element, language), {})
+
+    def elements(self, category: str) -> List[Tuple[Optional[str], str, Optional[str], Dict[str, str]]]:
+        """
+        كل عناصر فئة بترتيب صفوف الثيم (لبناء كائنات الواجهة مرة واحدة، e.g. ThemeCompiler).
+
+        Returns:
+            List[Tuple]: [(subcategory, element, language, {property: value}), ...]
+                e.g. [('primary', 'primary_button', None, {'background': '#2E86AB', ...}), ...]
+        """
+        return [(self._subcategories[key], key[1], key[2], properties)
+                for key, properties in self._elements.items() if key[0] == category]
+
+    def color(self, name: str, fuzzy: bool = False) -> str:
+        """
+        قيمة لون باسم العنصر، e.g. 'blue_trust' -> '#2E86AB'.
+
+        Args:
+            name (str): اسم عنصر اللون.
+            fuzzy (bool): إذا لم يوجد الاسم بالضبط: أول لون يحتوي اسمه على name (e.g. 'blue' -> 'blue_trust').
+        Returns:
+            str: قيمة اللون أو '' إذا لم يوجد.
+        """
+        value = self._colors.get(name)
+        if value is not None:
+            return value
+        if not fuzzy:
+            return ''
+        return self._fuzzy_lookup('color', name, self._color_names, '')
+
+    def font_style(self, language: str, font_type: str, fuzzy: bool = False) -> Dict[str, str]:
+        """
+        إعدادات خط حسب النوع واللغة.
+
+        Args:
+            language (str): e.g. 'ar'
+            font_type (str): اسم العنصر أو الفئة الفرعية، e.g. 'main_title' أو 'arabic_main_title'.
+            fuzzy (bool): إذا لم يوجد بالضبط: أول عنصر يحتوي اسمه على f"{font_type}_{language}" (e.g. 'normal').
+        Returns:
+            Dict[str, str]: {'font_family': 'IBM Plex Sans Arabic', 'font_weight': 'Bold', 'font_size': '24px'} أو {}.
+        """
+        font = self._fonts.get((font_type, language))
+        if font is not None:
+            return dict(font)
+        if not fuzzy:
+            return {}
+        return dict(self._fuzzy_lookup('typography', f"{font_type}_{language}", self._font_names, {}))
+
+    def _fuzzy_lookup(self, kind: str, term: str, candidates: Dict[Optional[str], list], default: Any) -> Any:
+        """أول مرشح يحتوي اسمه على term (مرة واحدة لكل term)"""
+        key = (kind, term)
+        if key not in self._fuzzy:
+            self._fuzzy[key] = next((value for group in candidates.values() for name, value in group
+                                     if term in name), default)
+            logger.debug("🎨 Theme %s %r resolved by substring match", kind, term)
+        return self._fuzzy[key]
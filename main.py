@@ -1,20 +1,30 @@
 ﻿import hashlib
 import flet as ft
 import os
+import logging
 from typing import Optional, Dict, Any
-from datetime import datetime
 
 # استيراد المديرات والإعدادات
-from config.settings import DB_PATH, APP_TITLE,LICENSE_FILE_PATH,PUBLIC_KEY_PATH,DEFAULT_THEME,ALL_TRANSLATION,ALL_SETTINGS
+from config.settings import DB_PATH, APP_TITLE,LICENSE_FILE_PATH,PUBLIC_KEY_PATH,STARTUP_TIMINGS_PATH,app_settings
 from db.database_manager import DatabaseManager
 from utils.license_handler import LicenseManager
 from utils.translation_manager import TranslationManager
+from utils.client_search_service import ClientSearchService
+from utils.theme_compiler import ThemeCompiler, CompiledTheme
+from utils.startup import StartupPipeline
+from utils.logger import configure_logging
 
 # استيراد الواجهات (نفترض وجودها)
 from views.login_view import LoginView
 from views.license_view import LicenseView
+from views.clients_view import ClientsView
 #from views.dashboard_view import DashboardView # سنستخدمها كواجهة رئيسية
 
+logger = logging.getLogger('app')
+
+# أقصى انتظار للمراحل الاختيارية (e.g. self_test) قبل كتابة تقرير التوقيتات، بالثواني
+STARTUP_REPORT_TIMEOUT = 60.0
+
 
 class AppState:
     """لتخزين حالة التطبيق والمديرات عالمياً."""
@@ -25,38 +35,55 @@ class AppState:
         self.theme: Dict[str, str] = theme_settings
         self.logged_in_user: Optional[Dict] = None # معلومات موظف الاستقبال
         self.page: Optional[ft.Page] = None # حفظ مرجع لصفحة Flet الرئيسية
+        self._client_search: Optional[ClientSearchService] = None
+        self.styles: ThemeCompiler = ThemeCompiler(db) # كائنات Flet الجاهزة للثيم الحالي: compiled_theme()
+
+    @property
+    def client_search(self) -> ClientSearchService:
+        """البحث عن العملاء أثناء الكتابة (خارج خيط الواجهة)، يُنشأ عند أول واجهة تحتاجه"""
+        if self._client_search is None:
+            self._client_search = ClientSearchService(self.db)
+        return self._client_search
+
+    def compiled_theme(self) -> CompiledTheme:
+        """الثيم المترجم للواجهات؛ ثيم فارغ إذا فشلت الترجمة (الواجهات تستخدم قيمها الافتراضية)"""
+        try:
+            return self.styles.compile()
+        except Exception as e:
+            logger.error("❌ Error compiling the current theme: %s", e)
+            return CompiledTheme(None, -1)
 
 
 
 
 def setup_test_files():
-    print("\n\nstf 0 -- Setting up test files...")
+    logger.debug("stf 0 -- Setting up test files...")
     """تهيئة ملفات ضرورية للاختبار."""
     if not os.path.exists('config'):
         os.makedirs('config')
-        print("\n\nstf 0--the OS mkdir config file")
+        logger.debug("stf 0 -- the OS mkdir config file")
     # إنشاء ملف مفتاح عام وهمي (لا يُستخدم للتشفير الفعلي هنا)
     if not os.path.exists(PUBLIC_KEY_PATH):
         with open(PUBLIC_KEY_PATH, 'w') as f:
             f.write("---BEGIN PUBLIC KEY---TEST---END PUBLIC KEY---")
-            print("\n\nstf 0--the OS create public key file")
+            logger.debug("stf 0 -- the OS create public key file")
     # إنشاء ملف ترخيص وهمي
     if not os.path.exists(LICENSE_FILE_PATH):
         with open(LICENSE_FILE_PATH, 'w') as f:
             f.write("{}")
-            print("\n\nstf 0-- the OS create license file")
+            logger.debug("stf 0 -- the OS create license file")
 
 
-def run_database_tests():
+def run_database_tests(db_manager: Optional[DatabaseManager] = None):
     """تنفيذ سلسلة اختبارات للتحقق من عمل الدوال."""
     # تهيئة الملفات قبل الاختبار
     setup_test_files()
-    print("\n\nrtf 0 -- Beginning database tests... and setup test files done.")
+    logger.debug("rtf 0 -- Beginning database tests... and setup test files done.")
     # 1. الاتصال والتهيئة (يجب أن ينشئ الجداول تلقائياً)
     try:
-        db_manager = DatabaseManager(db_path=DB_PATH)
+        db_manager = db_manager or DatabaseManager(db_path=DB_PATH)
 
-        print("✅ rtf 1 -- the DB /conn has created , path is:", DB_PATH)
+        logger.info("✅ rtf 1 -- the DB /conn has created , path is: %s", DB_PATH)
         pass_hashed = hashlib.sha256('password_123'.encode()).hexdigest()
         db_manager.add_user({
             'username': 'user',
@@ -65,87 +92,133 @@ def run_database_tests():
             'is_active': 1
         })
     except Exception as e:
-        print("❌ rtf 1 -- failed to connect to DB",e)
+        logger.error("❌ rtf 1 -- failed to connect to DB: %s", e)
         return
 
 
-db_manager = DatabaseManager(db_path=DB_PATH)
 def main(page: ft.Page):
-    # 1. تهيئة قاعدة البيانات والمديرات
-    #db_manager = DatabaseManager(db_path=DB_PATH)
-    run_database_tests()
-    #db_manager = DatabaseManager(db_path=DB_PATH)
-    # تحميل إعدادات التنسيق واللغة
-    theme_settings = DEFAULT_THEME
-    settings = ALL_SETTINGS
-    
-    license_manager = LicenseManager(db_manager=db_manager)
-    translation_manager = TranslationManager(db_manager=db_manager)
-    
-    # تحديث اللغة بناءً على الإعدادات المخزنة
-    if settings and settings.get('language'):
-        translation_manager.set_language(settings['language'])
-        
-    # تهيئة حالة التطبيق
-    app_state = AppState(db_manager, license_manager, translation_manager, theme_settings)
-    app_state.page = page # حفظ مرجع الصفحة
-
-    # 2. دالة التوجيه الرئيسية بين المشاهد (Views)
+    # 1. أول رسم فوراً: شاشة بداية، وكل التهيئة تعمل في الخلفية (utils/startup.py)
+    page.title = APP_TITLE
+    page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
+    page.vertical_alignment = ft.MainAxisAlignment.CENTER
+    splash_status = ft.Text("", size=12)
+    page.add(ft.Column(
+        [ft.ProgressRing(), ft.Text(APP_TITLE, size=20, weight=ft.FontWeight.BOLD), splash_status],
+        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+    ))
+    page.update()
+
+    def _on_phase_done(name: str, result: Any, error: Optional[BaseException]):
+        """تحديث شاشة البداية مع انتهاء كل مرحلة (من خيط العمل)"""
+        splash_status.value = f"{name} ✓" if error is None else f"❌ {name}: {error}"
+        page.update()
+
+    startup = StartupPipeline(on_phase_done=_on_phase_done)
+    startup.mark('first_paint')
+
+    # 2. مراحل البدء: بعد قاعدة البيانات تعمل المراحل المستقلة بالتوازي
+    def _open_database() -> DatabaseManager:
+        db = DatabaseManager(db_path=DB_PATH)
+        app_settings.bind(db)
+        return db
+
+    def _db() -> DatabaseManager:
+        return startup.result('database')
+
+    def _compile_styles() -> ThemeCompiler:
+        styles = ThemeCompiler(_db())
+        styles.compile()
+        return styles
+
+    # المراحل الضرورية لأول واجهة: database, translations, license, activation.
+    # الباقي اختياري (فشله لا يمنع تسجيل الدخول): self_test يعمل بالتوازي، theme و styles لها بدائل.
+    startup.add('files', setup_test_files)
+    startup.add('database', _open_database)
+    startup.add('self_test', lambda: run_database_tests(_db()), after=['files', 'database'])
+    startup.add('theme', lambda: app_settings.DEFAULT_THEME, after=['database'])
+    startup.add('styles', _compile_styles, after=['database'])
+    startup.add('translations', lambda: TranslationManager(db_manager=_db()), after=['database'])
+    startup.add('license', lambda: LicenseManager(db_manager=_db()), after=['files', 'database'])
+    startup.add('activation', lambda: startup.result('license').check_activation_status(), after=['license'])
+
+    # 3. دالة التوجيه الرئيسية بين المشاهد (Views)
     def _change_view(view_control: ft.Control):
         """تنظيف الصفحة وعرض واجهة مستخدم جديدة."""
         page.clean()
         page.add(view_control)
         page.update()
 
-    # 3. دوال الانتقال الخاصة بنجاح العمليات
-    def _on_auth_success(user_data: Optional[Dict]):
-        """تُستدعى بعد التفعيل الناجح أو تسجيل الدخول الناجح."""
-        if user_data:
-            # نجاح تسجيل الدخول
-            app_state.logged_in_user = user_data
-            #_change_view(DashboardView(app_state))
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] User '{user_data.get('username')}' logged in successfully.")
-            return False
-        else:
-            # نجاح التفعيل، يجب أن ننتقل لشاشة تسجيل الدخول
+    def _show_first_view() -> AppState:
+        """بعد اكتمال المراحل الضرورية: حالة التطبيق، التنسيق العام، ثم أول واجهة"""
+        theme_settings = startup.result_or('theme', {})
+        app_state = AppState(_db(), startup.result('license'), startup.result('translations'), theme_settings)
+        app_state.page = page # حفظ مرجع الصفحة
+        # الثيم المترجم مسبقاً إن نجح، وإلا يُترجم عند أول استخدام
+        app_state.styles = startup.result_or('styles', app_state.styles)
+        # الفحص الخلفي للبصمة قد يلغي التفعيل (ملف بصمة من جهاز آخر): العودة إلى شاشة التفعيل
+        app_state.license.on_revoked(lambda: _change_view(LicenseView(app_state, _on_auth_success)))
+
+        # دوال الانتقال الخاصة بنجاح العمليات
+        def _on_auth_success(user_data: Optional[Dict]):
+            """تُستدعى بعد التفعيل الناجح أو تسجيل الدخول الناجح."""
+            if user_data:
+                # نجاح تسجيل الدخول
+                app_state.logged_in_user = user_data
+                #_change_view(DashboardView(app_state))
+                # إلى أن تكتمل لوحة التحكم: شاشة العملاء (بحث أثناء الكتابة عبر client_search)
+                _change_view(ClientsView(app_state))
+                logger.info("User '%s' logged in successfully.", user_data.get('username'))
+                return False
+            else:
+                # نجاح التفعيل، يجب أن ننتقل لشاشة تسجيل الدخول
+                _change_view(LoginView(app_state, _on_auth_success))
+
+        # تطبيق التنسيق العام (Flet Page Setup)
+        if theme_settings:
+            # Flet يستخدم الألوان بتنسيق #RRGGBB
+            primary_color = theme_settings.get('Primary', ft.Colors.BLUE_700) 
+            background_color = theme_settings.get('Background', ft.Colors.WHITE)
+            surface_color = theme_settings.get('Surface_Cards', ft.Colors.WHITE)
+            error_color = theme_settings.get('Error', ft.Colors.RED_500)
+
+            page.theme = ft.Theme(
+                color_scheme=ft.ColorScheme(
+                    primary=primary_color,
+                    background=background_color,
+                    surface=surface_color,
+                    error=error_color,
+                ),
+            )
+
+        # التحقق الأولي من الترخيص (نتيجة مرحلة activation)
+        if startup.result('activation'):
+            # إذا كان مفعلاً: اعرض شاشة تسجيل الدخول
             _change_view(LoginView(app_state, _on_auth_success))
-
-
-    # 4. تطبيق التنسيق العام (Flet Page Setup)
-    page.title = APP_TITLE
-    page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
-    page.vertical_alignment = ft.MainAxisAlignment.CENTER
-
-    if theme_settings:
-        # Flet يستخدم الألوان بتنسيق #RRGGBB
-        primary_color = theme_settings.get('Primary', ft.Colors.BLUE_700) 
-        background_color = theme_settings.get('Background', ft.Colors.WHITE)
-        surface_color = theme_settings.get('Surface_Cards', ft.Colors.WHITE)
-        error_color = theme_settings.get('Error', ft.Colors.RED_500)
-
-        page.theme = ft.Theme(
-            color_scheme=ft.ColorScheme(
-                primary=primary_color,
-                background=background_color,
-                surface=surface_color,
-                error=error_color,
-            ),
-        )
-
-    # 5. بدء التشغيل: التحقق الأولي من الترخيص
-    is_activated = license_manager.check_activation_status()
-    
-    if is_activated:
-        # إذا كان مفعلاً: اعرض شاشة تسجيل الدخول
-        _change_view(LoginView(app_state, _on_auth_success))
-    else:
-        # إذا لم يكن مفعلاً: اعرض شاشة التفعيل
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Application is NOT activated. Showing License View.")
-        _change_view(LicenseView(app_state, _on_auth_success))
-
-    page.update()
+        else:
+            # إذا لم يكن مفعلاً: اعرض شاشة التفعيل
+            logger.warning("Application is NOT activated. Showing License View.")
+            _change_view(LicenseView(app_state, _on_auth_success))
+        return app_state
+
+    startup.add('ui', _show_first_view, after=['database', 'translations', 'license', 'activation'])
+
+    def _on_ready(name: str, app_state: Optional[AppState], error: Optional[BaseException]):
+        startup.mark('interactive')
+        # التقرير بعد المراحل الاختيارية أيضاً (الواجهة معروضة، هذا الخيط لا يؤخرها)
+        startup.wait(STARTUP_REPORT_TIMEOUT)
+        # الملف يُكتب دائماً؛ الجدول في السجل يظهر فقط من مستوى INFO (RNDV_DEBUG=1)
+        startup.write_report(STARTUP_TIMINGS_PATH)
+        startup.log_report()
+        startup.shutdown()
+        if error is not None:
+            # شاشة البداية تبقى مع رسالة الخطأ (من _on_phase_done)
+            logger.error("❌ app startup failed: %s", error)
+
+    startup.on_done('ui', _on_ready)
 
 # تشغيل التطبيق
 if __name__ == "__main__":
+    # RNDV_DEBUG=1 لإظهار تفاصيل التصحيح
+    configure_logging()
     # يجب تشغيل التطبيق في وضع سطح المكتب (Desktop Mode)
     ft.app(target=main)
\ No newline at end of file
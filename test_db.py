@@ -1,9 +1,19 @@
 import os
+import sqlite3
+import sys
+import tempfile
+import threading
 from datetime import datetime
-from db.database_manager import DatabaseManager
+from db.database_manager import DatabaseManager, register_sql_functions
+from db.availability import AppointmentConflictError
+from utils.client_search_service import ClientSearchService
+from utils.translation_manager import compile_tables
 from utils.license_handler import LicenseManager # سنستدعي مدير الترخيص للتأكد من التكامل
+from utils import license_handler
+from utils.machine_fingerprint import FingerprintProvider, generate_machine_id_hash, _fingerprint_hash
 from config.settings import DEFAULT_LANGUAGE
 import hashlib # للاختبارات
+import json
 
 DB_NAME = 'appointment_manager.db'
 DB_PATH = os.path.join(os.path.dirname(__file__), DB_NAME)
@@ -21,7 +31,21 @@ rtf 2 --- test default settings and theme
 rtf 3 --- test add/retrieve user for login
 rtf 4 --- test license manager integration
 rtf 5 --- test add client
+rtf 6 --- test query plans: every public query method must use an index on the hot tables
+rtf 7 --- test connection pool: more long-lived threads than pool_size, iter_query stats and lease
+rtf 8 --- test nested transactions: savepoint rollback keeps an earlier failure of the outer block
+rtf 9 --- test availability: double booking across managers, has_conflict / find_free_slots edges
+rtf 10 -- test client search: substring search_clients, ranked prefix search, writers outside the app
+rtf 11 -- test client search service: cached results are dropped after a write
+rtf 12 -- test translation fallbacks: missing Arabic text keeps the view's default_text
+rtf 13 -- test license binding: a fingerprint cache copied from another host is not trusted
+rtf 14 -- test add_complete_theme: the details land under the new theme, not the default one
 """
+
+# الجداول الكبيرة التي لا يُسمح بقراءتها كاملة (SCAN) مع أسمائها المختصرة في الاستعلامات
+HOT_TABLES = {'Appointments', 'A', 'Clients', 'C', 'theme_details', 'td', 'Audit_Logs', 'Invoices', 'I', 'Daily_Stats'}
+# دوال مستثناة مع السبب
+PLAN_CHECK_EXEMPT = {}
 def setup_test_files():
     print("\n\nstf 0 -- Setting up test files...")
     """تهيئة ملفات ضرورية للاختبار."""
@@ -119,6 +143,7 @@ def run_database_tests():
             print(f"✅ rtf 4 -- status: {'active' if license_info.get('is_active') == 1 else 'inactive'}")
         else:
             print("❌ rtf 4 -- failed to generate or store license/machine information.")
+        license_manager.close()
 
     except Exception as e:
         print(f"❌ rtf 4 -- failed to initialize/run LicenseManager: {e}")
@@ -135,10 +160,497 @@ def run_database_tests():
     print("\n--- ✅ database tests completed successfully ---")
 
 
+def _scanned_table(plan_line: str):
+    """اسم الجدول في سطر SCAN من الخطة: 'SCAN A' (SQLite >= 3.36) أو 'SCAN TABLE Appointments AS A' (أقدم)"""
+    words = plan_line.split()
+    if not words or words[0] != 'SCAN' or len(words) < 2:
+        return None
+    if words[1] == 'TABLE' and len(words) > 2:
+        # الصيغة القديمة: الاسم المختصر (AS A) إن وجد وإلا اسم الجدول
+        return words[4] if len(words) > 4 and words[3] == 'AS' else words[2]
+    return words[1]
+
+
+def run_query_plan_checks(db_manager: DatabaseManager = None) -> bool:
+    """التحقق من أن كل استعلام في الدوال العامة يستخدم فهرساً (EXPLAIN QUERY PLAN).
+
+    الاستعلامات تُسجل من execute_query و iter_query. قبل كل دالة تُفرغ ذاكرة الثيم و AvailabilityEngine
+    و AnalyticsEngine، فالدوال التي تُخدم عادة من الذاكرة تنفذ استعلاماتها فعلاً، ومولدات iter_* تُستهلك
+    كاملة. دالة لم يُسجل لها أي استعلام تُعتبر فشلاً (إلا إذا كانت في PLAN_CHECK_EXEMPT).
+    """
+    print("\n--- 🔎 rtf 6 -- checking query plans ---")
+    if db_manager is None:
+        db_manager = DatabaseManager(db_path=DB_PATH)
+
+    # تسجيل الاستعلامات التي تنفذها كل دالة
+    recorded = []
+    original_execute = db_manager.execute_query
+    original_iter = db_manager.iter_query
+
+    def recording_execute(query, params=None, *args, **kwargs):
+        recorded.append((current_method, query, params))
+        return original_execute(query, params, *args, **kwargs)
+
+    def recording_iter(query, params=None, *args, **kwargs):
+        recorded.append((current_method, query, params))
+        return original_iter(query, params, *args, **kwargs)
+
+    def reset_caches():
+        db_manager._theme_changed()
+        db_manager.availability.invalidate()
+        db_manager.analytics.invalidate()
+
+    public_queries = {
+        'get_settings': (),
+        'get_license_info': (),
+        'get_device_info': (),
+        'get_user_by_username': ('test_reception',),
+        'get_client_details': (1,),
+        'search_clients': ('ahm',),
+        'search_clients_ranked': ('ahm',),
+        'iter_search_clients': ('ahm',),
+        'get_client_appointments_history': (1,),
+        'iter_client_appointments_history': (1,),
+        'get_daily_appointments': ('2024-06-10',),
+        'get_weekly_appointments': ('2024-06-10', '2024-06-16'),
+        'iter_weekly_appointments': ('2024-06-10', '2024-06-16'),
+        'get_appointments_page': ('2024-06-01', '2024-06-30', ('2024-06-10', '10:00', 1)),
+        'get_client_appointments_page': (1, ('2024-06-10', '10:00', 1)),
+        'has_conflict': ('2024-06-10', '10:00', 30),
+        'find_free_slots': ('2024-06-10', 30),
+        'get_all_services': (),
+        'get_attendance_stats': ('2024-01-01', '2024-12-31'),
+        'get_peak_hours_stats': ('2024-01-01', '2024-12-31'),
+        'get_revenue_stats': ('2024-01-01', '2024-12-31'),
+        'get_dashboard_kpis': ('2024-01-01', '2024-12-31'),
+        'get_invoice_by_appointment': (1,),
+        'get_translations': (),
+        'get_theme_data': (1,),
+        'get_current_theme': (),
+        'get_theme_by_category': ('color',),
+        'get_theme_index': (),
+        'get_color': ('primary',),
+        'get_font_style': ('ar', 'main_title'),
+        'get_default_theme': (),
+    }
+    db_manager.execute_query = recording_execute
+    db_manager.iter_query = recording_iter
+    try:
+        for current_method, args in public_queries.items():
+            reset_caches()
+            result = getattr(db_manager, current_method)(*args)
+            if current_method.startswith('iter_'):
+                for _ in result:
+                    pass
+    finally:
+        db_manager.execute_query = original_execute
+        db_manager.iter_query = original_iter
+
+    all_ok = True
+    silent = [method for method in public_queries
+              if method not in PLAN_CHECK_EXEMPT and not any(m == method for m, _, _ in recorded)]
+    for method in silent:
+        print(f"❌ rtf 6 -- {method}: no SQL recorded, its queries were not checked")
+        all_ok = False
+    for method, query, params in recorded:
+        if method in PLAN_CHECK_EXEMPT or not query.lstrip().upper().startswith(('SELECT', 'WITH')):
+            continue
+        plan = db_manager.explain_query_plan(query, params)
+        if not plan:
+            print(f"❌ rtf 6 -- {method}: could not explain query")
+            all_ok = False
+            continue
+        full_scans = [line for line in plan if _scanned_table(line) in HOT_TABLES]
+        if full_scans:
+            print(f"❌ rtf 6 -- {method}: full table scan {full_scans}")
+            all_ok = False
+        else:
+            print(f"✅ rtf 6 -- {method}: {plan}")
+
+    for method, reason in PLAN_CHECK_EXEMPT.items():
+        print(f"⚠️ rtf 6 -- {method} skipped: {reason}")
+    print(f"--- {'✅' if all_ok else '❌'} query plan checks completed ---")
+    return all_ok
+
+
+def _temp_db(**kwargs) -> DatabaseManager:
+    """قاعدة بيانات جديدة في مجلد مؤقت (لا تلمس DB_PATH)"""
+    return DatabaseManager(db_path=os.path.join(tempfile.mkdtemp(prefix='test_db_'), DB_NAME), **kwargs)
+
+
+def run_pool_checks() -> bool:
+    """خيوط دائمة أكثر من pool_size: كل خيط يأخذ الاتصال أثناء الاستعلام فقط ولا يحجزه طوال عمره."""
+    print("\n--- 🔌 rtf 7 -- checking the connection pool ---")
+    db_manager = _temp_db(pool_size=2, pool_timeout=1.0)
+    threads_count, rounds = 7, 20
+    started = threading.Barrier(threads_count)
+    failures = []
+
+    def worker(index):
+        started.wait()  # كل الخيوط حية في نفس الوقت
+        for round_number in range(rounds):
+            if db_manager.execute_query("SELECT COUNT(*) FROM Settings", fetch_one=True) is None:
+                failures.append((index, round_number))
+        with db_manager.transaction():
+            db_manager.create_audit_log({'user_id': None, 'action_type': 'POOL_TEST', 'details': str(index)})
+        started.wait()  # لا ينتهي أي خيط قبل أن ينهي الجميع (خيوط دائمة)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logs = db_manager.execute_query("SELECT COUNT(*) FROM Audit_Logs WHERE action_type = 'POOL_TEST'",
+                                    fetch_one=True)[0]
+    pool_stats = db_manager._pool.stats()
+
+    # iter_query يظهر في stats() مثل execute_query، وإغلاقه من خيط آخر لا يحرر اتصال هذا الخيط من هناك
+    iter_sql = "SELECT action_type AS iter_check FROM Audit_Logs WHERE action_type = ?"
+    iterated = sum(1 for _ in db_manager.iter_query(iter_sql, ('POOL_TEST',), batch_size=2))
+    iter_stats = next((v for k, v in db_manager.stats().items() if 'iter_check' in k), None)
+    iter_recorded = iterated == threads_count and iter_stats is not None and iter_stats['rows'] == threads_count
+    rows = db_manager.iter_query(iter_sql, ('POOL_TEST',))
+    next(rows)
+    closer = threading.Thread(target=rows.close)
+    closer.start()
+    closer.join()
+    still_usable = db_manager.execute_query("SELECT COUNT(*) FROM Settings", fetch_one=True) is not None
+    db_manager.close()
+
+    ok = not failures and logs == threads_count and pool_stats['open'] <= 2
+    if ok:
+        print(f"✅ rtf 7 -- {threads_count} threads x {rounds} queries on pool_size 2: {pool_stats}")
+    else:
+        print(f"❌ rtf 7 -- failed queries {failures[:5]}, audit logs {logs}/{threads_count}, pool {pool_stats}")
+    iter_ok = iter_recorded and still_usable
+    print(f"{'✅' if iter_ok else '❌'} rtf 7 -- iter_query recorded in stats ({iter_stats and iter_stats['rows']} rows), "
+          f"usable after a close on another thread: {still_usable}")
+    return ok and iter_ok
+
+
+
+def run_transaction_checks() -> bool:
+    """كتلة داخلية ملغاة لا تؤثر على الخارجية، ولا تمحو خطأً سابقاً فيها."""
+    print("\n--- 🧾 rtf 8 -- checking nested transactions ---")
+    db_manager = _temp_db()
+
+    def log(action):
+        return db_manager.create_audit_log({'user_id': None, 'action_type': action, 'details': ''})
+
+    def count(action):
+        return db_manager.execute_query("SELECT COUNT(*) FROM Audit_Logs WHERE action_type = ?",
+                                        (action,), fetch_one=True)[0]
+
+    # 1. الكتلة الداخلية تتراجع، الخارجية تؤكد ما قبلها وما بعدها
+    with db_manager.transaction():
+        log('TX_OUTER')
+        try:
+            with db_manager.transaction():
+                log('TX_INNER')
+                raise ValueError("inner block fails")
+        except ValueError:
+            pass
+        log('TX_OUTER')
+    savepoint_ok = count('TX_OUTER') == 2 and count('TX_INNER') == 0
+
+    # 2. استعلام فاشل في الكتلة الخارجية، ثم كتلة داخلية ملغاة: الخارجية يجب أن تتراجع كاملة
+    outer_rolled_back = False
+    try:
+        with db_manager.transaction():
+            log('TX_PARTIAL')
+            db_manager.execute_query("INSERT INTO No_Such_Table VALUES (1)", commit=True)
+            try:
+                with db_manager.transaction():
+                    raise ValueError("inner block fails")
+            except ValueError:
+                pass
+    except Exception:
+        outer_rolled_back = True
+    error_kept = outer_rolled_back and count('TX_PARTIAL') == 0
+    db_manager.close()
+
+    ok = savepoint_ok and error_kept
+    print(f"{'✅' if savepoint_ok else '❌'} rtf 8 -- inner rollback keeps the outer block")
+    print(f"{'✅' if error_kept else '❌'} rtf 8 -- outer failure survives an inner rollback "
+          f"(rolled back: {outer_rolled_back})")
+    return ok
+
+
+def run_availability_checks() -> bool:
+    """التداخل يُفحص داخل معاملة الكتابة (حتى بين كائنين على نفس الملف)، وحدود has_conflict / find_free_slots."""
+    print("\n--- 📅 rtf 9 -- checking availability ---")
+    first = _temp_db()
+    second = DatabaseManager(db_path=first.db_path)
+    user_id = first.add_user({'username': 'availability', 'password_hash': 'x'})
+    client_id = first.add_client({'full_name': 'Availability Client', 'phone_number': '0500000009'})
+    service_id = first.add_service({'name_ar': 'خدمة ساعة', 'duration_minutes': 60, 'price': 100.0})
+    first.update_settings({'start_time': '09:00', 'end_time': '12:00', 'working_days': 'Monday,Tuesday'})
+    monday, wednesday = '2026-11-02', '2026-11-04'
+
+    def appointment(start_time, **extra):
+        return {'client_id': client_id, 'user_id': user_id, 'date': monday, 'start_time': start_time,
+                'duration_minutes': 30, 'status': 'Confirmed', **extra}
+
+    results = {}
+    # 1. كلا الكائنين حمّل اليوم في ذاكرته قبل الحجز
+    first.availability.has_conflict(monday, '10:00', 30)
+    second.availability.has_conflict(monday, '10:00', 30)
+    booked_id = first.add_appointment(appointment('10:00'))
+    try:
+        second.add_appointment(appointment('10:00'))
+        results['second manager is refused'] = False
+    except AppointmentConflictError as e:
+        results['second manager is refused'] = (e.date, e.start_time) == (monday, '10:00')
+    results['one row for the slot'] = first.execute_query(
+        "SELECT COUNT(*) FROM Appointments WHERE date = ? AND start_time = '10:00'",
+        (monday,), fetch_one=True)[0] == 1
+    try:
+        moved = second.add_appointment(appointment('11:00'))
+        second.update_appointment(moved, {'start_time': '10:15'})
+        results['move onto a taken slot is refused'] = False
+    except AppointmentConflictError as e:
+        results['move onto a taken slot is refused'] = e.appointment_id == moved
+
+    # 2. حدود has_conflict (موعد 10:00 - 10:30 قائم)
+    engine = first.availability
+    results['end == start is free'] = (not engine.has_conflict(monday, '09:30', 30)
+                                       and not engine.has_conflict(monday, '10:30', 30))
+    results['one minute overlap'] = (engine.has_conflict(monday, '09:31', 30)
+                                     and engine.has_conflict(monday, '10:29', 30))
+    results['exclude_id'] = not engine.has_conflict(monday, '10:00', 30, exclude_id=booked_id)
+    results['service duration'] = engine.has_conflict(monday, '09:15', service_id=service_id)
+    cancelled = first.add_appointment(appointment('09:00', status='Cancelled'))
+    results['cancelled does not block'] = cancelled is not None and not engine.has_conflict(monday, '09:00', 30)
+
+    # 3. find_free_slots: الدوام 09:00 - 12:00، مشغول 10:00 - 10:30 و 11:00 - 11:30
+    # (موعد 11:00 حجزه الكائن الآخر، فلا يظهر في ذاكرة هذا الكائن قبل invalidate)
+    engine.invalidate(monday)
+    slots = engine.find_free_slots(monday, 30, step=30)
+    results['free slots'] = slots == ['09:00', '09:30', '10:30', '11:30']
+    results['non-working day'] = engine.find_free_slots(wednesday, 30) == []
+    results['longer than the gaps'] = engine.find_free_slots(monday, service_id=service_id) == ['09:00']
+    second.close()
+    first.close()
+
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 9 -- {name}")
+    return all(results.values())
+
+
+def run_client_search_checks() -> bool:
+    """search_clients يطابق أي جزء من الاسم أو الهاتف، و search_clients_ranked بداية الكلمات بعد التوحيد."""
+    print("\n--- 🔍 rtf 10 -- checking client search ---")
+    db_manager = _temp_db()
+    for name, phone in [('محمد العلوي', '0612345678'), ('Martin Dupont', '0700112233'),
+                        ('أحمد سعيد', '0555000111'), ('Hélène Martin', None)]:
+        db_manager.add_client({'full_name': name, 'phone_number': phone})
+
+    def names(results):
+        return sorted(row['full_name'] for row in results)
+
+    results = {
+        'arabic substring': names(db_manager.search_clients('علوي')) == ['محمد العلوي'],
+        'latin substring': names(db_manager.search_clients('artin')) == ['Hélène Martin', 'Martin Dupont'],
+        'middle of a phone number': names(db_manager.search_clients('2345')) == ['محمد العلوي'],
+        'short term (LIKE)': names(db_manager.search_clients('up')) == ['Martin Dupont'],
+        'iter matches search': (names(db_manager.iter_search_clients('artin'))
+                                == names(db_manager.search_clients('artin'))),
+        'ranked prefix, folded': names(db_manager.search_clients_ranked('احمد')) == ['أحمد سعيد'],
+        'ranked accents': names(db_manager.search_clients_ranked('helene')) == ['Hélène Martin'],
+        'ranked is prefix only': names(db_manager.search_clients_ranked('artin')) == [],
+    }
+
+    # تعديل الاسم يحدث الفهرسين
+    db_manager.execute_query("UPDATE Clients SET full_name = 'Martin Durand' WHERE full_name = 'Martin Dupont'",
+                             commit=True)
+    results['rename'] = (names(db_manager.search_clients('Dupont')) == []
+                         and names(db_manager.search_clients_ranked('durand')) == ['Martin Durand'])
+
+    # برنامج آخر يكتب في Clients: يحتاج دوال SQL الخاصة بالتطبيق (مشغلات Clients_fts)
+    conn = sqlite3.connect(db_manager.db_path)
+    try:
+        conn.execute("INSERT INTO Clients (full_name, phone_number) VALUES ('Outside Writer', NULL)")
+        results['outside writer needs fold_text'] = False
+    except sqlite3.OperationalError as e:
+        results['outside writer needs fold_text'] = 'fold_text' in str(e)
+    register_sql_functions(conn)
+    with conn:
+        conn.execute("INSERT INTO Clients (full_name, phone_number) VALUES ('Outside Writer', NULL)")
+    conn.close()
+    results['outside writer is indexed'] = (names(db_manager.search_clients('side Wri')) == ['Outside Writer']
+                                            and names(db_manager.search_clients_ranked('outs')) == ['Outside Writer'])
+    db_manager.close()
+
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 10 -- {name}")
+    return all(results.values())
+
+
+def run_client_search_service_checks() -> bool:
+    """نتائج ClientSearchService المحفوظة (مطابقة تامة أو بادئة) لا تُستخدم بعد كتابة في قاعدة البيانات."""
+    print("\n--- ⌨️ rtf 11 -- checking the client search service ---")
+    db_manager = _temp_db()
+    db_manager.add_client({'full_name': 'Marc Petit', 'phone_number': '0611111111'})
+    service = ClientSearchService(db_manager, debounce_ms=0)
+
+    def names(term):
+        return sorted(row['full_name'] for row in service.search_now(term))
+
+    before = names('mar'), names('marw')  # نتيجة 'mar' كاملة، فـ 'marw' تُحسب منها
+    db_manager.add_client({'full_name': 'Marwan Haddad', 'phone_number': '0622222222'})
+    results = {
+        'cached before the write': before == (['Marc Petit'], []),
+        'exact hit refreshed': names('mar') == ['Marc Petit', 'Marwan Haddad'],
+        'prefix hit refreshed': names('marwa') == ['Marwan Haddad'],
+    }
+    service.close()
+    db_manager.close()
+
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 11 -- {name}")
+    return all(results.values())
+
+
+def run_translation_fallback_checks() -> bool:
+    """نص عربي ناقص لا يُملأ بالإنجليزية (يبقى default_text العربي من الواجهة)، والفرنسية تأخذ الإنجليزية."""
+    print("\n--- 🌐 rtf 12 -- checking translation fallbacks ---")
+    tables, fallbacks = compile_tables({'login_button': {'ar': None, 'fr': None, 'en': 'Login'},
+                                        'save': {'ar': 'حفظ', 'fr': 'Enregistrer', 'en': 'Save'}})
+    results = {
+        'arabic uses default_text': 'login_button' not in tables['ar'] and tables['ar']['save'] == 'حفظ',
+        'french falls back to english': tables['fr']['login_button'] == 'Login' and fallbacks['fr'] == {'login_button'},
+    }
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 12 -- {name}")
+    return all(results.values())
+
+
+def run_forged_fingerprint_checks() -> bool:
+    """ملف بصمة منسوخ من جهاز آخر (Hash سليم لمكوناته) لا يربط الترخيص بمعرف ذلك الجهاز."""
+    print("\n--- 🔑 rtf 13 -- checking license binding with a forged fingerprint cache ---")
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+    work_dir = tempfile.mkdtemp(prefix='test_license_')
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_key_path = os.path.join(work_dir, 'public_key.pem')
+    with open(public_key_path, 'wb') as f:
+        f.write(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                      serialization.PublicFormat.SubjectPublicKeyInfo))
+    license_path = os.path.join(work_dir, 'license.json')
+
+    def write_license(machine_id):
+        data = {'machine_id': machine_id, 'license_key': 'TEST-KEY', 'issued_at': '2026-01-01T00:00:00'}
+        signature = private_key.sign(json.dumps(data, sort_keys=True).encode('utf-8'),
+                                     padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+                                     hashes.SHA256())
+        with open(license_path, 'w', encoding='utf-8') as f:
+            json.dump({**data, 'signature': signature.hex()}, f)
+
+    # بصمة جهاز آخر، متسقة مع مكوناتها، في ملف الذاكرة
+    other_host = {'bios_uuid': 'other-host-0xabc', 'disk_serial': 'D-99999-XYZ',
+                  'mac_address': '0xabc', 'current_year': '2076'}
+    other_host['machine_id_hash'] = _fingerprint_hash(other_host)
+    forged_cache = os.path.join(work_dir, 'machine_fingerprint.json')
+    this_host = generate_machine_id_hash()['machine_id_hash']
+
+    def forged_provider(background_refresh):
+        # الفحص الفعلي يستبدل الملف بمكونات هذا الجهاز، فيُكتب الملف المزور من جديد لكل حالة
+        with open(forged_cache, 'w', encoding='utf-8') as f:
+            json.dump(other_host, f)
+        return FingerprintProvider(cache_path=forged_cache, probe=generate_machine_id_hash,
+                                   background_refresh=background_refresh)
+
+    saved_paths = license_handler.PUBLIC_KEY_PATH, license_handler.LICENSE_FILE_PATH
+    license_handler.PUBLIC_KEY_PATH, license_handler.LICENSE_FILE_PATH = public_key_path, license_path
+    results = {}
+    try:
+        # 1. ترخيص الجهاز الآخر + ملف بصمته: التفعيل يفحص هذا الجهاز ويرفض
+        db_manager = _temp_db()
+        write_license(other_host['machine_id_hash'])
+        manager = LicenseManager(db_manager, fingerprint=forged_provider(False))
+        results['activation rejects the copied license'] = (
+            not manager.activate_from_file()
+            and db_manager.get_license_info().get('signature_status') == 'ID Mismatch')
+        results['machine id is this host'] = (manager.get_current_machine_id(verified=True) == this_host
+                                              and manager.get_current_machine_id() == this_host)
+        manager.close()
+        db_manager.close()
+
+        # 2. نسخة كاملة (قاعدة بيانات مفعلة + ملف البصمة) من الجهاز الآخر: الفحص الخلفي يلغي التفعيل
+        db_manager = _temp_db()
+        other_manager = LicenseManager(db_manager, fingerprint=FingerprintProvider(
+            cache_path=None, probe=lambda: dict(other_host)))
+        other_manager.activate_from_file()
+        other_manager.close()
+        provider = forged_provider(False)
+        manager = LicenseManager(db_manager, fingerprint=provider)
+        revoked = []
+        manager.on_revoked(lambda: revoked.append(True))
+        manager.check_activation_status()  # نتيجة التحقق المحفوظة (بدون فحص الجهاز)
+        provider.refresh()                 # ما يفعله الفحص الخلفي عند بدء التطبيق
+        license_info = db_manager.get_license_info()
+        results['copied activation is revoked'] = (license_info.get('is_active') == 0 and revoked == [True]
+                                                   and license_info.get('signature_status') == 'ID Mismatch')
+        manager.close()
+        results['closed manager leaves the provider'] = manager._on_fingerprint_change not in provider._listeners
+        db_manager.close()
+
+        # 3. ترخيص هذا الجهاز مع نفس الملف المزور: يُفعّل بمعرف هذا الجهاز
+        db_manager = _temp_db()
+        write_license(this_host)
+        manager = LicenseManager(db_manager, fingerprint=forged_provider(False))
+        results['own license binds to this host'] = (
+            manager.activate_from_file()
+            and db_manager.get_license_info().get('machine_id_used') == this_host)
+        manager.close()
+        db_manager.close()
+    finally:
+        license_handler.PUBLIC_KEY_PATH, license_handler.LICENSE_FILE_PATH = saved_paths
+
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 13 -- {name}")
+    return all(results.values())
+
+
+def run_complete_theme_checks() -> bool:
+    """تفاصيل add_complete_theme تُربط بمعرّف الثيم الجديد؛ add_theme_details_element بدون theme_id يبقى للافتراضي."""
+    print("\n--- 🎨 rtf 14 -- checking add_complete_theme ---")
+    db_manager = _temp_db()
+    default_id = db_manager.get_default_theme()
+
+    def element(name):
+        return {'category': 'color', 'subcategory': 'rtf14', 'element_name': name, 'property_name': 'hex',
+                'property_value': '#123456', 'language': '', 'font_weight': '', 'font_size': ''}
+
+    added = db_manager.add_complete_theme({'theme_name': 'rtf14 theme', 'state': 'inactive', 'is_default': 0},
+                                          {1: element('rtf14_a'), 2: {**element('rtf14_b'), 'theme_id': default_id}})
+    new_id = db_manager.get_last_theme()
+    db_manager.add_theme_details_element(element('rtf14_default'))
+    owners = {row['element_name']: row['theme_id'] for row in db_manager.execute_query(
+        "SELECT element_name, theme_id FROM theme_details WHERE subcategory = 'rtf14'")}
+    db_manager.close()
+
+    results = {
+        'complete theme added': added and new_id is not None and new_id != default_id,
+        'details under the new theme': owners.get('rtf14_a') == new_id and owners.get('rtf14_b') == new_id,
+        'element without theme_id goes to the default theme': owners.get('rtf14_default') == default_id,
+    }
+    for name, passed in results.items():
+        print(f"{'✅' if passed else '❌'} rtf 14 -- {name}")
+    print(f"   themes: default {default_id}, new {new_id}, details {owners}")
+    return all(results.values())
+
+
 if __name__ == "__main__":
     # تنظيف قاعدة البيانات القديمة (اختياري، للتأكد من اختبار الإنشاء)
     if os.path.exists(DB_PATH):
         os.remove(DB_PATH)
         print(f"Test :🗑️ the old database has been removed: {DB_PATH}")
         
-    run_database_tests()
\ No newline at end of file
+    run_database_tests()
+    checks = [run_query_plan_checks(), run_pool_checks(), run_transaction_checks(), run_availability_checks(),
+              run_client_search_checks(), run_client_search_service_checks(),
+              run_translation_fallback_checks(), run_forged_fingerprint_checks(), run_complete_theme_checks()]
+    # رمز خروج غير صفري عند فشل أي فحص (e.g. في CI)
+    sys.exit(0 if all(checks) else 1)
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db.database_manager import DatabaseManager, DEFAULT_SEARCH_LIMIT
+from utils.text_normalizer import search_tokens
+
+"""
+CSS = Client Search Service: بحث العملاء أثناء الكتابة بدون إيقاف واجهة Flet.
+- search() تُستدعى مع كل ضغطة مفتاح وتعود فوراً؛ الاستعلام ينفذ في خيط عمل واحد.
+- debounce: ينتظر الخيط debounce_ms بعد آخر ضغطة قبل البحث، فالكتابة السريعة تنتج استعلاماً واحداً.
+- الطلب الذي يأتي بعده طلب أحدث يُلغى: لا يُنفذ إن لم يبدأ، ونتيجته تُهمل إن كان قد بدأ.
+- ذاكرة مؤقتة حسب البادئة: إذا كانت نتيجة "Ah" كاملة (أقل من limit)، فنتيجة "Ahm" تُحسب بتصفيتها في الذاكرة.
+- كل نتيجة محفوظة تحمل write_version الخاص بقاعدة البيانات وقت الحفظ؛ بعد أي كتابة (e.g. add_client) لا تُستخدم.
+"""
+
+logger = logging.getLogger('CSS')
+
+DEFAULT_DEBOUNCE_MS = 200
+DEFAULT_CACHE_SIZE = 64
+DEFAULT_CACHE_TTL = 30.0  # ثوانٍ قبل اعتبار نتيجة محفوظة قديمة (كتابات من برامج أخرى)
+
+SearchCallback = Callable[[str, List[Dict]], None]
+
+
+def _row_matches(row: Dict, tokens: List[str]) -> bool:
+    """نفس قاعدة FTS5: كل كلمة في البحث تطابق بداية كلمة في أحد حقول العميل"""
+    words = search_tokens(' '.join(str(row.get(field) or '')
+                                   for field in ('full_name', 'phone_number', 'email', 'notes')))
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+class ClientSearchService:
+    """
+    خدمة بحث غير متزامنة فوق DatabaseManager.search_clients_ranked.
+
+    Example:
+        service = ClientSearchService(db)
+        def show(term, results):      # تُستدعى من خيط العمل
+            results_list.controls = [ft.Text(r['full_name']) for r in results]
+            page.update()
+        search_field.on_change = lambda e: service.search(e.control.value, show)
+    """
+
+    def __init__(self, db_manager: DatabaseManager, debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+                 limit: int = DEFAULT_SEARCH_LIMIT, cache_size: int = DEFAULT_CACHE_SIZE,
+                 cache_ttl: float = DEFAULT_CACHE_TTL):
+        """
+        Args:
+            db_manager (DatabaseManager): مدير قاعدة البيانات.
+            debounce_ms (int): مدة الانتظار بعد آخر ضغطة مفتاح قبل البحث.
+            limit (int): الحد الأقصى للنتائج.
+            cache_size (int): عدد نتائج البحث المحفوظة.
+            cache_ttl (float): عمر النتيجة المحفوظة بالثواني.
+        """
+        self._db = db_manager
+        self.debounce_ms = debounce_ms
+        self.limit = limit
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        # المفتاح: كلمات البحث بعد التوحيد -> (وقت الحفظ، write_version، النتائج، هل النتيجة كاملة؟)
+        self._cache: 'OrderedDict[Tuple[str, ...], Tuple[float, int, List[Dict], bool]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._pending: Optional[Tuple[int, str, SearchCallback, float]] = None
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='client-search', daemon=True)
+        self._worker.start()
+
+    # --- الواجهة العامة ---
+
+    def search(self, term: str, callback: SearchCallback):
+        """
+        طلب بحث (من خيط الواجهة). يعود فوراً؛ callback(term, results) يُستدعى من خيط العمل
+        فقط إذا لم يأتِ بعده طلب أحدث.
+
+        Args:
+            term (str): نص البحث الحالي، e.g. 'Ahm'.
+            callback (Callable[[str, List[Dict]], None]): دالة عرض النتائج.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._generation += 1
+            due = time.monotonic() + self.debounce_ms / 1000
+            self._pending = (self._generation, term, callback, due)
+            self._condition.notify()
+
+    def cancel(self):
+        """إلغاء أي بحث معلق أو جارٍ (e.g. عند إغلاق قائمة الاقتراحات)"""
+        with self._condition:
+            self._generation += 1
+            self._pending = None
+
+    def search_now(self, term: str) -> List[Dict]:
+        """بحث متزامن يستخدم نفس الذاكرة المؤقتة (للاستخدام خارج الواجهة)"""
+        return self._lookup(term)
+
+    def invalidate(self):
+        """مسح النتائج المحفوظة (الكتابات عبر DatabaseManager تُكتشف تلقائياً عبر write_version)"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def close(self):
+        """إيقاف خيط العمل"""
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+        self._worker.join(timeout=1.0)
+
+    # --- خيط العمل ---
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._pending is not None:
+                        wait = self._pending[3] - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)  # ضغطة جديدة توقظنا وتؤجل الموعد
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                generation, term, callback, _ = self._pending
+                self._pending = None
+
+            try:
+                results = self._lookup(term)
+            except Exception as e:
+                logger.error("❌ Client search failed for %r: %s", term, e)
+                continue
+
+            with self._condition:
+                if generation != self._generation:
+                    logger.debug("Client search for %r superseded, result dropped", term)
+                    continue
+            try:
+                callback(term, results)
+            except Exception as e:
+                logger.error("❌ Client search callback failed: %s", e)
+
+    # --- الذاكرة المؤقتة ---
+
+    def _lookup(self, term: str) -> List[Dict]:
+        """النتائج من الذاكرة (مطابقة تامة أو تصفية بادئة كاملة) أو من قاعدة البيانات"""
+        tokens = tuple(search_tokens(term))
+        if not tokens:
+            return []
+        now = time.monotonic()
+        # يُقرأ قبل الاستعلام: كتابة أثناء البحث تجعل النتيجة قديمة عند أول استخدام لاحق
+        version = self._db.write_version
+        with self._cache_lock:
+            hit = self._cache.get(tokens)
+            if hit is not None and self._is_fresh(hit, version, now):
+                self._cache.move_to_end(tokens)
+                return list(hit[2])
+            base = self._complete_prefix(tokens, version, now)
+
+        if base is not None:
+            results = [row for row in base if _row_matches(row, list(tokens))]
+            complete = True
+            logger.debug("Client search %r served from prefix cache", term)
+        else:
+            results = self._db.search_clients_ranked(term, limit=self.limit)
+            complete = len(results) < self.limit
+
+        with self._cache_lock:
+            self._cache[tokens] = (now, version, results, complete)
+            self._cache.move_to_end(tokens)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return list(results)
+
+    def _is_fresh(self, entry: Tuple[float, int, List[Dict], bool], version: int, now: float) -> bool:
+        """نتيجة محفوظة صالحة: لم تتغير قاعدة البيانات منذ حفظها ولم ينتهِ عمرها"""
+        return entry[1] == version and now - entry[0] < self._cache_ttl
+
+    def _complete_prefix(self, tokens: Tuple[str, ...], version: int, now: float) -> Optional[List[Dict]]:
+        """
+        أضيق نتيجة محفوظة وكاملة لبحث أعم من tokens، e.g. ('ah',) لـ ('ahm',) أو ('ahmed',) لـ ('ahmed', 'b').
+        كل نتيجة للبحث الأضيق موجودة حتماً ضمنها.
+        """
+        best = None
+        for key, entry in self._cache.items():
+            results, complete = entry[2], entry[3]
+            if not complete or not self._is_fresh(entry, version, now):
+                continue
+            # كل كلمة من البحث المحفوظ هي بداية لكلمة من البحث الجديد
+            if all(any(token.startswith(part) for token in tokens) for part in key):
+                if best is None or len(results) < len(best):
+                    best = results
+        return best
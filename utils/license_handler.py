@@ -1,8 +1,11 @@
+import hashlib
+import hmac
 import json
+import logging
 import os
 from datetime import datetime, date
 import sys
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 
 # مكتبات التشفير
 from cryptography.hazmat.primitives import hashes
@@ -24,13 +27,14 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 #     DatabaseManager = None
 from db.database_manager import DatabaseManager  # تأكد من المسار الصحيح
 
-# استيراد الدوال المساعدة لتوليد بصمة الجهاز
-from utils.machine_fingerprint import generate_machine_id_hash 
-a = generate_machine_id_hash()
-print("🔧 Imported generate_machine_id_hash from utils.machine_fingerprint is \n", a)
+# مزود بصمة الجهاز (لا يفحص الجهاز عند الاستيراد)
+from utils.machine_fingerprint import FingerprintProvider, default_provider
+logger = logging.getLogger('lm')
 # مسارات الملفات (يجب تعريفها في مجلد config/settings.py)
 LICENSE_FILE_PATH = 'license.json' 
 PUBLIC_KEY_PATH = 'config/public_key.pem' 
+# أقصى مدة (بالثواني) لاستخدام نتيجة التحقق المحفوظة قبل إعادة التحقق الكامل (RSA)؛ 0 = التحقق في كل تشغيل
+DEFAULT_VERIFY_INTERVAL = 24 * 3600
 """
 lm = License Manager: مسؤول عن توليد Machine ID، والتحقق من التوقيع، وتفعيل البرنامج.
 lm-lpk = License Manager - Load Public Key: تحميل المفتاح العام للتحقق من التوقيع.
@@ -41,6 +45,12 @@ lm-rlf = License Manager - Read License File: قراءة ملف الترخيص.
 lm-vs = License Manager - Verify Signature: التحقق من التوقيع.
 lm-uls = License Manager - Update Local License Status: تحديث حالة الترخيص المحلية.
 lm-la = License Manager - Log Audit: تسجيل التدقيق.
+lm-vc = License Manager - Verification Cache: نتيجة آخر تحقق كامل محفوظة في Licenses مع وصل HMAC.
+    المفتاح: بصمة محتوى license.json + بصمة المفتاح العام + معرف الجهاز. التحقق الكامل (JSON + RSA-PSS)
+    يُعاد فقط إذا تغير أحدها أو مرت verify_interval ثانية.
+lm-fc = License Manager - Fingerprint Change: ملف البصمة المحفوظ قد يكون منسوخاً من جهاز آخر، لذلك
+    التفعيل والتحقق الكامل يستخدمان بصمة مؤكدة بفحص فعلي (verified=True). إذا كشف الفحص الخلفي أن البصمة
+    تغيرت، يُعاد check_activation_status بالبصمة الفعلية وتُستدعى on_revoked إذا لم يعد الترخيص صالحاً.
 
 """
 class LicenseManager:
@@ -48,38 +58,66 @@ class LicenseManager:
     مدير الترخيص: مسؤول عن توليد Machine ID، والتحقق من التوقيع، وتفعيل البرنامج.
     """
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, verify_interval: float = DEFAULT_VERIFY_INTERVAL,
+                 fingerprint: Optional[FingerprintProvider] = None):
+        """
+        Args:
+            db_manager (DatabaseManager): مدير قاعدة البيانات.
+            verify_interval (float): مدة صلاحية نتيجة التحقق المحفوظة بالثواني (0 = بدون ذاكرة).
+            fingerprint (Optional[FingerprintProvider]): مزود بصمة الجهاز (الافتراضي مشترك للعملية).
+        """
         self.db = db_manager
-        self.public_key = self._load_public_key()
+        self.verify_interval = verify_interval
+        self.fingerprint = fingerprint or default_provider()
+        self._device_info_synced: Optional[str] = None
+        self._revoked_listeners: List[Callable[[], None]] = []
+        self.fingerprint.on_change(self._on_fingerprint_change)
+        # محتوى ملف المفتاح يُقرأ الآن (للبصمة)، وتحليله (تشفير) يؤجل حتى أول تحقق كامل
+        self._public_key_pem = self._read_public_key_file()
+        self._public_key: Optional[Any] = None
 
-    def _load_public_key(self) -> Optional[Any]:
-        print("\n\n🔑 lm-lpk loading public key...")
-        """تحميل المفتاح العام المستخدم للتحقق من التوقيع"""
+    @property
+    def public_key(self) -> Optional[Any]:
+        """المفتاح العام (يُحلل عند أول استخدام فقط)"""
+        if self._public_key is None and self._public_key_pem is not None:
+            self._public_key = self._load_public_key()
+        return self._public_key
+
+    def _read_public_key_file(self) -> Optional[bytes]:
+        logger.debug("🔑 lm-lpk reading public key file...")
+        """قراءة ملف المفتاح العام كما هو (بدون تحليل)"""
         try:
             with open(PUBLIC_KEY_PATH, "rb") as key_file:
                 key_content = key_file.read()
-                print("🔑 lm-lpk Public key opened successfully.")
-                print("🔑 lm-lpk Public Key Path:", PUBLIC_KEY_PATH)
-                print("🔑 lm-lpk Key File Content Preview:", key_content)
-                return serialization.load_pem_public_key(key_content)
+                logger.debug("🔑 lm-lpk Public key opened successfully: %s", PUBLIC_KEY_PATH)
+                logger.debug("🔑 lm-lpk Key File Content Preview: %s", key_content)
+                return key_content
         except FileNotFoundError:
             # يجب أن يكون المفتاح العام متوفراً دائماً لتشغيل التحقق
-            print(f"🔑 lm-lpk Key ERROR: Public key file not found at {PUBLIC_KEY_PATH}")
+            logger.error("🔑 lm-lpk Key ERROR: Public key file not found at %s", PUBLIC_KEY_PATH)
             self.db.execute_query(
                 "INSERT INTO Audit_Logs (timestamp, action_type, details) VALUES (?, ?, ?)",
                 (datetime.now().isoformat(), 'LICENSE_ERROR', 'Public Key file missing'),
                 commit=True
             )
             return None
+        except OSError as e:
+            logger.error("🔑 lm-lpk Key ERROR: Failed to read public key %s: %s", PUBLIC_KEY_PATH, e)
+            return None
+
+    def _load_public_key(self) -> Optional[Any]:
+        logger.debug("🔑 lm-lpk loading public key...")
+        """تحميل المفتاح العام المستخدم للتحقق من التوقيع"""
+        try:
+            return serialization.load_pem_public_key(self._public_key_pem)
         except Exception as e:
-            print(f"🔑 lm-lpk Key ERROR: {e}")
-            print("🔑 lm-lpk Key ERROR: Failed to load public key.",PUBLIC_KEY_PATH)
+            logger.error("🔑 lm-lpk Key ERROR: Failed to load public key %s: %s", PUBLIC_KEY_PATH, e)
             return None
 
 # --- الدوال الرئيسية للتفعيل والتحقق ---
 
     def check_activation_status(self) -> bool:
-        print("\n\n🔑 lm-cas checking activation status...")
+        logger.debug("🔑 lm-cas checking activation status...")
         """
         1. التحقق من حالة التفعيل المخزنة محلياً.
         2. إجراء تحقق دوري عبر ملف الترخيص.
@@ -99,72 +137,90 @@ class LicenseManager:
             try:
                 expires_date = datetime.strptime(expires_at_str, '%Y-%m-%dT%H:%M:%S').date()
                 if expires_date < date.today():
-                    print("🔑 lm-cas License expired.")
+                    logger.warning("🔑 lm-cas License expired.")
                     self._update_local_license_status(is_active=False, status_msg='Expired')
                     return False
             except Exception as e:
-                print("⚠️ lm-cas Expiration date parse error:", e)
+                logger.warning("⚠️ lm-cas Expiration date parse error: %s", e)
         
         
         
-        # 4. تحقق من التوقيع والمفتاح العام دائماً
-        license_data = self._read_license_file()
+        # 4. نتيجة التحقق المحفوظة: بدون JSON ولا RSA إذا لم يتغير الملف أو المفتاح أو الجهاز
+        license_bytes = self._read_license_bytes()
+        if license_bytes is None:
+            logger.error("🔑 lm-cas ERROR: License file missing.")
+            return False
+
+        state = self._verification_state(license_bytes)
+        if self._cached_verification_valid(license_info, state):
+            logger.info("🔑 lm-cas License valid (verified at %s).", license_info.get('verified_at'))
+            return True
+
+        # 5. تحقق كامل من التوقيع والمفتاح العام
+        license_data = self._parse_license(license_bytes)
         if not license_data:
-            print("🔑 lm-cas ERROR: License file missing.")
+            logger.error("🔑 lm-cas ERROR: License file invalid.")
             return False
     
         if not self._verify_signature(license_data):
-            print("🔑 lm-cas ERROR: Invalid signature detected.")
+            logger.error("🔑 lm-cas ERROR: Invalid signature detected.")
             self._update_local_license_status(is_active=False, status_msg='Invalid Signature')
             return False
-    
-        print("🔑 lm-cas License verified and valid.")
+
+        # 6. الترخيص لهذا الجهاز (بصمة من فحص فعلي، وليس من الملف المحفوظ فقط)
+        current_machine_id = self.get_current_machine_id(verified=True)
+        if license_data.get('machine_id') != current_machine_id:
+            logger.error("🔑 lm-cas ERROR: Machine ID mismatch.")
+            self._update_local_license_status(is_active=False, status_msg='ID Mismatch')
+            return False
+
+        self._store_verification(self._verification_state(license_bytes, current_machine_id), license_info)
+        logger.info("🔑 lm-cas License verified and valid.")
         return True
 
 
 
 
     def activate_from_file(self) -> bool:
-        print("\n\n🔑 lm-af attempting activation from license file...")
+        logger.debug("🔑 lm-af attempting activation from license file...")
         """
         محاولة التفعيل من ملف license.json
         """
         # 0. التحقق من وجود المفتاح العام
         if not self.public_key:
-            print("🔑 lm-af ERROR: Public key not loaded, cannot verify license.")
+            logger.error("🔑 lm-af ERROR: Public key not loaded, cannot verify license.")
             return False 
 
         # 1. قراءة بيانات الترخيص من الملف
-        license_data = self._read_license_file()
+        license_bytes = self._read_license_bytes()
+        license_data = self._parse_license(license_bytes) if license_bytes is not None else None
         if not license_data:
             self._log_audit('LICENSE_FAILED', 'License file not found or invalid JSON.')
-            print("🔑 lm-af License file not found or invalid.")
+            logger.error("🔑 lm-af License file not found or invalid.")
             return False
 
         # 2. التحقق من التوقيع الرقمي (سلامة الملف)
         if not self._verify_signature(license_data):
             self._update_local_license_status(is_active=False, status_msg='Invalid Signature')
             self._log_audit('LICENSE_FAILED', 'Digital signature validation failed (File compromised).')
-            print("🔑 lm-af Digital signature validation failed.")
+            logger.error("🔑 lm-af Digital signature validation failed.")
             return False
 
-        # 3. التحقق من تطابق Machine ID
-        current_machine_id = self.get_current_machine_id()
+        # 3. التحقق من تطابق Machine ID (فحص فعلي للجهاز، لا نثق بملف البصمة وحده)
+        current_machine_id = self.get_current_machine_id(verified=True)
         if license_data.get('machine_id') != current_machine_id:
             self._update_local_license_status(is_active=False, status_msg='ID Mismatch')
             self._log_audit('LICENSE_FAILED', f'Machine ID mismatch. License ID: {license_data.get("machine_id")}')
-            print("🔑 lm-af Machine ID mismatch.")
+            logger.error("🔑 lm-af Machine ID mismatch.")
             return False
 
         # 4. التحقق من تاريخ الانتهاء (Expires At)
-        print("🔑 lm-af license check", license_data.get('expires_at'))
-        print("🔑 lm-af license check",datetime.now())
+        logger.debug("🔑 lm-af license check expires_at=%s now=%s", license_data.get('expires_at'), datetime.now())
 
         if license_data.get('expires_at'):
-            print("🔑 lm-af license check", license_data.get('expires_at'))
             if datetime.strptime(license_data.get('expires_at'), '%Y-%m-%dT%H:%M:%S.%f').date() < date.today():
                 self._log_audit('LICENSE_FAILED', 'License expired upon verification.')
-                print("🔑 lm-af License expired.")
+                logger.warning("🔑 lm-af License expired.")
 
                 
         # 5. النجاح: تحديث حالة التفعيل في قاعدة البيانات
@@ -177,46 +233,149 @@ class LicenseManager:
             expires_at=license_data.get('expires_at')
         )
         self._log_audit('LICENSE_SUCCESS', f"Program activated successfully with key: {license_data.get('license_key')}")
+        self._store_verification(self._verification_state(license_bytes, current_machine_id), self.db.get_license_info() or {})
         
         return True
 
 # --- الدوال المساعدة ---
 
-    def get_current_machine_id(self) -> str:
-        """يولد بصمة الجهاز ويخزنها محلياً إذا كانت غير موجودة، ثم يعيد الـ Hash."""
+    def on_revoked(self, callback: Callable[[], None]):
+        """callback() يُستدعى (من خيط الفحص الخلفي) إذا أصبح الترخيص غير صالح بعد اكتشاف تغير بصمة الجهاز"""
+        self._revoked_listeners.append(callback)
+
+    def close(self):
+        """إلغاء الاشتراك في تغير البصمة (وإلا يبقى هذا المدير حياً ما دام مزود البصمة المشترك حياً)"""
+        self.fingerprint.remove_listener(self._on_fingerprint_change)
+        self._revoked_listeners.clear()
+
+    def _on_fingerprint_change(self, fingerprint: Dict[str, str]):
+        """lm-fc: البصمة المحفوظة لم تكن لهذا الجهاز؛ إعادة التحقق من الترخيص المفعل بالبصمة الفعلية"""
+        self._device_info_synced = None
+        license_info = self.db.get_license_info()
+        if not license_info or license_info.get('is_active') != 1:
+            return
+        if self.check_activation_status():
+            return
+        logger.error("🔑 lm-fc License no longer valid for this machine (%s...).", fingerprint['machine_id_hash'][:10])
+        self._log_audit('LICENSE_FAILED', 'Machine fingerprint changed, license re-checked and rejected.')
+        for callback in list(self._revoked_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error("🔑 lm-fc license revoked callback failed: %s", e)
+
+    def get_current_machine_id(self, verified: bool = False) -> str:
+        """يعيد Hash بصمة الجهاز (محسوبة مرة واحدة لكل عملية) ويخزنها محلياً إذا تغيرت.
+        Args:
+            verified (bool): بصمة مؤكدة بفحص فعلي للجهاز (للتفعيل والتحقق)، وليس من الملف المحفوظ فقط.
+        Returns:
+            str: sha256 البصمة.
+        """
         
-        # 1. توليد مكونات البصمة
-        data = generate_machine_id_hash() # دالة وهمية، يجب أن تنفذ في machine_fingerprint.py
+        # 1. مكونات البصمة من المزود (ذاكرة/ملف؛ الفحص الفعلي في machine_fingerprint.py)
+        data = self.fingerprint.get(verified)
+        if data['machine_id_hash'] == self._device_info_synced:
+            return data['machine_id_hash']
 
-        # 2. تخزين المعلومات في جدول Device_Info
-        self.db.set_device_info({
+        # 2. تخزين المعلومات في جدول Device_Info (فقط إذا اختلفت عن المخزنة: قراءة بدل كتابة في كل تشغيل)
+        device_info = {
             'machine_id_hash': data['machine_id_hash'],
             'bios_uuid': data['bios_uuid'],
             'disk_serial': data['disk_serial'],
             'mac_address': data['mac_address'],
-        })
+        }
+        stored = self.db.get_device_info()
+        if not stored or any(stored.get(key) != value for key, value in device_info.items()):
+            logger.debug("🔑 lm-gcmid Device info changed, updating Device_Info.")
+            self.db.set_device_info(device_info)
+        self._device_info_synced = data['machine_id_hash']
 
         return data['machine_id_hash']
 
     def _read_license_file(self) -> Optional[Dict]:
-        print("\n\n🔑 lm-rlf reading license file...")
         """قراءة ملف license.json محلياً"""
+        license_bytes = self._read_license_bytes()
+        return self._parse_license(license_bytes) if license_bytes is not None else None
+
+    def _read_license_bytes(self) -> Optional[bytes]:
+        logger.debug("🔑 lm-rlf reading license file...")
+        """محتوى license.json كما هو (للبصمة وللتحليل)"""
         try:
-            with open(LICENSE_FILE_PATH, 'r') as f:
-                print("🔑 lm-rlf License file found at:", LICENSE_FILE_PATH)
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            print(f"🔑 lm-rlf License file ERROR: Could not read or parse {LICENSE_FILE_PATH}")
+            with open(LICENSE_FILE_PATH, 'rb') as f:
+                logger.debug("🔑 lm-rlf License file found at: %s", LICENSE_FILE_PATH)
+                return f.read()
+        except OSError:
+            logger.error("🔑 lm-rlf License file ERROR: Could not read %s", LICENSE_FILE_PATH)
             return None
 
+    def _parse_license(self, license_bytes: bytes) -> Optional[Dict]:
+        try:
+            return json.loads(license_bytes)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.error("🔑 lm-rlf License file ERROR: Could not parse %s", LICENSE_FILE_PATH)
+            return None
+
+# --- ذاكرة التحقق (lm-vc) ---
+
+    def _verification_state(self, license_bytes: bytes, machine_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        ما يجب أن يبقى كما هو لتبقى نتيجة التحقق صالحة.
+
+        Returns:
+            Dict[str, str]: {'license_file_hash': sha256, 'public_key_fingerprint': sha256, 'verified_machine_id': hash}
+        """
+        return {
+            'license_file_hash': hashlib.sha256(license_bytes).hexdigest(),
+            'public_key_fingerprint': hashlib.sha256(self._public_key_pem or b'').hexdigest(),
+            'verified_machine_id': machine_id or self.get_current_machine_id(),
+        }
+
+    def _receipt(self, state: Dict[str, str], verified_at: str, license_info: Dict) -> str:
+        """
+        وصل HMAC-SHA256 يربط نتيجة التحقق بالحالة وبمفتاح الترخيص وتاريخ انتهائه،
+        فتعديل أي عمود من هذه في قاعدة البيانات يلغي النتيجة المحفوظة ويفرض تحققاً كاملاً.
+        """
+        key = hashlib.sha256((self._public_key_pem or b'') + state['verified_machine_id'].encode('utf-8')).digest()
+        message = '|'.join([state['license_file_hash'], state['public_key_fingerprint'], state['verified_machine_id'],
+                            verified_at, str(license_info.get('license_key')), str(license_info.get('expires_at'))])
+        return hmac.new(key, message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def _cached_verification_valid(self, license_info: Dict, state: Dict[str, str]) -> bool:
+        """هل نتيجة التحقق المحفوظة في Licenses صالحة للحالة الحالية؟"""
+        if self.verify_interval <= 0 or not license_info.get('verification_receipt'):
+            return False
+        if any(license_info.get(key) != value for key, value in state.items()):
+            logger.debug("🔑 lm-vc License file, public key or machine changed since last verification.")
+            return False
+        try:
+            age = (datetime.now() - datetime.fromisoformat(license_info['verified_at'])).total_seconds()
+        except (TypeError, ValueError):
+            return False
+        # عمر سالب = تم إرجاع ساعة النظام؛ لا نثق بالنتيجة
+        if not 0 <= age <= self.verify_interval:
+            return False
+        return hmac.compare_digest(self._receipt(state, license_info['verified_at'], license_info),
+                                   license_info['verification_receipt'])
+
+    def _store_verification(self, state: Dict[str, str], license_info: Dict):
+        """حفظ نتيجة تحقق كامل ناجح مع وصلها"""
+        verified_at = datetime.now().isoformat()
+        self.db.update_license_info({
+            **state,
+            'verified_at': verified_at,
+            'verification_receipt': self._receipt(state, verified_at, license_info),
+            'last_check_date': verified_at,
+        })
+        logger.debug("🔑 lm-vc Verification stored (valid for %s s).", self.verify_interval)
+
     def _verify_signature(self, license_data: Dict) -> bool:
-        print("\n\n🔑 lm-vs verifying digital signature...")
+        logger.debug("🔑 lm-vs verifying digital signature...")
         """
         التحقق من صحة التوقيع الرقمي باستخدام المفتاح العام.
         """
         signature = license_data.pop('signature', "empty")
         if not signature:
-            print("🔑 lm-vs Signature missing in license data.")
+            logger.error("🔑 lm-vs Signature missing in license data.")
             return False
 
         # إعادة بناء البيانات الموقعة (بدون حقل signature)
@@ -232,11 +391,11 @@ class LicenseManager:
                 ),
                 hashes.SHA256()
             )
-            print("🔑 lm-vs Signature verified successfully.")
+            logger.debug("🔑 lm-vs Signature verified successfully.")
             return True
         except Exception as e:
             # يحدث خطأ هنا إذا كان التوقيع غير صالح
-            print(f"🔑 lm-vs Verification Error: {e}")
+            logger.error("🔑 lm-vs Verification Error: %s", e)
             return False
         
     def _update_local_license_status(self, is_active: bool, status_msg: str, **kwargs):
@@ -248,8 +407,9 @@ class LicenseManager:
         }
         data.update(kwargs) # إضافة المفتاح وتاريخ الإصدار والانتهاء عند التفعيل الناجح
         self.db.set_license_info(data)
-        print("data:", data)
-        print("🔑 lm-uls License status updated:", self.db.get_license_info())
+        if logger.isEnabledFor(logging.DEBUG):
+            # قراءة إضافية من DB فقط في وضع التصحيح
+            logger.debug("🔑 lm-uls License status updated: %s", self.db.get_license_info())
 
     def _log_audit(self, action_type: str, details: str, user_id: Optional[int] = None):
         """تسجيل الإجراءات الهامة في جدول Audit_Logs"""
@@ -0,0 +1,51 @@
+import logging
+import os
+import sys
+from typing import Optional
+
+"""
+إعداد التسجيل (logging) للتطبيق. كل نظام فرعي له logger باسمه (logging.getLogger('DBM')):
+DBM   = Database Manager (مع DBM.query لتفاصيل كل استعلام، و DBM.analytics لمؤشرات لوحة التحكم)
+lm    = License Manager
+TraM  = Translation Manager
+CSS   = Client Search Service
+ThC   = Theme Compiler (كائنات Flet المترجمة من الثيم)
+StP   = Startup Pipeline (توقيت مراحل بدء التطبيق على مستوى INFO)
+views = الواجهات
+app   = main.py
+
+المستوى الافتراضي WARNING: لا يُطبع شيء مع كل استعلام.
+وضع التصحيح (debug) يعيد التفاصيل القديمة: configure_logging(debug=True) أو متغير البيئة RNDV_DEBUG=1.
+"""
+
+DEBUG_ENV_VAR = 'RNDV_DEBUG'
+LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+DATE_FORMAT = '%H:%M:%S'
+
+
+def debug_enabled() -> bool:
+    """هل تم تفعيل وضع التصحيح عبر متغير البيئة؟"""
+    return os.environ.get(DEBUG_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def configure_logging(debug: Optional[bool] = None, level: Optional[int] = None) -> None:
+    """
+    تهيئة مخرجات التسجيل مرة واحدة عند بدء التطبيق.
+
+    Args:
+        debug (Optional[bool]): True لإظهار كل التفاصيل (مستوى DEBUG). None = حسب RNDV_DEBUG.
+        level (Optional[int]): مستوى صريح (يتجاوز debug)، e.g. logging.INFO.
+    Returns: None
+    """
+    if debug is None:
+        debug = debug_enabled()
+    if level is None:
+        level = logging.DEBUG if debug else logging.WARNING
+
+    root = logging.getLogger()
+    if not any(getattr(h, '_rndv_handler', False) for h in root.handlers):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+        handler._rndv_handler = True
+        root.addHandler(handler)
+    root.setLevel(level)
@@ -1,42 +1,223 @@
 # محتوى مقترح لملف utils/machine_fingerprint.py
-from ast import Dict
+import json
+import logging
+import os
 import platform
 import hashlib
+import threading
 import uuid
 from datetime import datetime
+from typing import Callable, Dict, List, Optional
 # قد تحتاج إلى مكتبات إضافية مثل 'wmi' لنظام Windows أو 'psutil'
 
+"""
+MF = Machine Fingerprint: بصمة الجهاز لمدير الترخيص.
+- generate_machine_id_hash() تفحص الجهاز فعلياً (مكلفة نسبياً) ولا تُستدعى عند الاستيراد.
+- FingerprintProvider تحسب البصمة مرة واحدة لكل عملية: من الملف المحفوظ إن وجد (بعد التأكد من أن
+  الـ Hash يطابق المكونات)، وإلا بالفحص مباشرة. عند القراءة من الملف يُعاد الفحص في خيط خلفي،
+  وإذا اختلفت النتيجة تُحدث الذاكرة والملف وتُستدعى on_change.
+- الملف لا يثبت شيئاً: نسخة من config/machine_fingerprint.json لجهاز آخر تبقى متسقة (الـ Hash يطابق مكوناتها).
+  قرارات الترخيص تستخدم get(verified=True)، التي تنتظر الفحص الفعلي أو تنفذه إذا كانت البصمة من الملف.
+"""
+
+logger = logging.getLogger('lm')
+
+DEFAULT_CACHE_PATH = os.path.join('config', 'machine_fingerprint.json')
+COMPONENT_KEYS = ('bios_uuid', 'disk_serial', 'mac_address', 'current_year')
+
+Fingerprint = Dict[str, str]
+
+
+def _fingerprint_hash(components: Fingerprint) -> str:
+    """SHA256 للمكونات (أو لاسم الجهاز إذا فشل جمعها، كما في generate_machine_id_hash)"""
+    if components.get('bios_uuid') == 'N/A':
+        return hashlib.sha256(platform.node().encode('utf-8')).hexdigest()
+    raw_fingerprint = '|'.join(str(components[key]) for key in COMPONENT_KEYS)
+    return hashlib.sha256(raw_fingerprint.encode('utf-8')).hexdigest()
+
+
 def generate_machine_id_hash() -> Dict[str, str]:
     """
     يجمع خصائص الجهاز ويُنشئ بصمة SHA256 النهائية.
     """
-    
+
     # 1. جمع الخصائص
     try:
         # مثال على الحصول على البيانات
         disk_serial = "D-12345-ABC" # يجب استبدالها باستدعاء مكتبة النظام الحقيقي
-        bios_uuid = platform.node() + "-" + str(uuid.getnode()) 
+        bios_uuid = platform.node() + "-" + str(uuid.getnode())
         mac_address = hex(uuid.getnode())
         current_year = int(datetime.now().year)+50
-        # 2. دمج الخصائص
-        raw_fingerprint = f"{bios_uuid}|{disk_serial}|{mac_address}|{current_year}"
-
-        # 3. حساب الـ SHA256
-        machine_id_hash = hashlib.sha256(raw_fingerprint.encode('utf-8')).hexdigest()
-
     except Exception as e:
         # في حالة فشل أي استدعاء لنظام التشغيل، نعتمد على شيء أساسي
-        machine_id_hash = hashlib.sha256(platform.node().encode('utf-8')).hexdigest()
         disk_serial = "N/A"
         bios_uuid = "N/A"
         mac_address = "N/A"
         current_year = "N/A"
 
-
-    return {
-        'machine_id_hash': machine_id_hash,
+    components = {
         'bios_uuid': bios_uuid,
         'disk_serial': disk_serial,
         'mac_address': mac_address,
         'current_year': str(current_year)
     }
+    # 2. دمج الخصائص وحساب الـ SHA256
+    return {'machine_id_hash': _fingerprint_hash(components), **components}
+
+
+class FingerprintProvider:
+    """
+    بصمة الجهاز محسوبة مرة واحدة لكل عملية، مع ملف محلي وتحديث في الخلفية.
+
+    Example:
+        provider = FingerprintProvider()
+        provider.machine_id_hash()     # أول مرة: من الملف (بدون فحص) أو فحص مباشر
+        provider.get()                 # {'machine_id_hash': ..., 'bios_uuid': ..., ...}
+    """
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 probe: Callable[[], Fingerprint] = generate_machine_id_hash,
+                 background_refresh: bool = True):
+        """
+        Args:
+            cache_path (Optional[str]): ملف حفظ المكونات (None = بدون ملف).
+            probe (Callable): دالة الفحص الفعلي للجهاز.
+            background_refresh (bool): إعادة الفحص في خيط خلفي عند القراءة من الملف.
+        """
+        self.cache_path = cache_path
+        self._probe = probe
+        self._background_refresh = background_refresh
+        self._fingerprint: Optional[Fingerprint] = None
+        self._verified = False  # هل أكد فحص فعلي البصمة الحالية؟ (False إذا كانت من الملف)
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Fingerprint], None]] = []
+
+    def get(self, verified: bool = False) -> Fingerprint:
+        """
+        Args:
+            verified (bool): بصمة مؤكدة بفحص فعلي في هذه العملية (لقرارات الترخيص)، وليس من الملف فقط.
+        Returns:
+            Fingerprint: {'machine_id_hash': 'sha256', 'bios_uuid': ..., 'disk_serial': ..., 'mac_address': ..., 'current_year': ...}
+        """
+        if verified and not self._verified:
+            return self._verify()
+        fingerprint = self._fingerprint
+        if fingerprint is not None:
+            return dict(fingerprint)
+        with self._lock:
+            if self._fingerprint is None:
+                cached = self._load()
+                if cached is not None:
+                    self._fingerprint = cached
+                    if self._background_refresh:
+                        self._start_refresh()
+                else:
+                    self._fingerprint = self._probe()
+                    self._verified = True
+                    self._save(self._fingerprint)
+            return dict(self._fingerprint)
+
+    def machine_id_hash(self, verified: bool = False) -> str:
+        return self.get(verified)['machine_id_hash']
+
+    def on_change(self, callback: Callable[[Fingerprint], None]):
+        """callback(fingerprint) يُستدعى من الخيط الخلفي إذا اختلف الفحص عن البصمة المحفوظة"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Fingerprint], None]):
+        """إلغاء تسجيل on_change (المزود الافتراضي مشترك للعملية ويحتفظ بكل callback مسجل)"""
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def refresh(self) -> Fingerprint:
+        """فحص الجهاز الآن وتحديث الذاكرة والملف إذا تغيرت البصمة"""
+        fresh = self._probe()
+        with self._lock:
+            previous = self._fingerprint
+            self._fingerprint = fresh
+            self._verified = True
+            if previous != fresh:
+                self._save(fresh)
+        changed = previous is not None and previous != fresh
+        if changed:
+            logger.warning("🔑 MF Machine fingerprint changed since it was cached, cache updated.")
+            for callback in list(self._listeners):
+                try:
+                    callback(dict(fresh))
+                except Exception as e:
+                    logger.error("🔑 MF fingerprint change callback failed: %s", e)
+        return dict(fresh)
+
+    def wait_for_refresh(self, timeout: Optional[float] = None):
+        """انتظار الفحص الخلفي (e.g. في الاختبارات)"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _verify(self) -> Fingerprint:
+        """انتظار الفحص الخلفي إن كان جارياً، وإلا الفحص الآن"""
+        thread = self._refresh_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        if self._verified:
+            return dict(self._fingerprint)
+        return self.refresh()
+
+    def _start_refresh(self):
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("🔑 MF background fingerprint refresh failed: %s", e)
+
+        self._refresh_thread = threading.Thread(target=run, name='fingerprint-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def _load(self) -> Optional[Fingerprint]:
+        """المكونات المحفوظة إذا كان الملف سليماً والـ Hash يطابقها"""
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            fingerprint = {key: str(data[key]) for key in ('machine_id_hash',) + COMPONENT_KEYS}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("⚠️ MF Ignoring unreadable fingerprint cache %s: %s", self.cache_path, e)
+            return None
+        if fingerprint['machine_id_hash'] != _fingerprint_hash(fingerprint):
+            logger.warning("⚠️ MF Fingerprint cache %s does not match its components, ignored.", self.cache_path)
+            return None
+        return fingerprint
+
+    def _save(self, fingerprint: Fingerprint):
+        if not self.cache_path:
+            return
+        try:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({**fingerprint, 'saved_at': datetime.now().isoformat()}, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            logger.warning("⚠️ MF Could not write fingerprint cache %s: %s", self.cache_path, e)
+
+
+_default_provider: Optional[FingerprintProvider] = None
+_default_lock = threading.Lock()
+
+
+def default_provider() -> FingerprintProvider:
+    """المزود المشترك للعملية (يُنشأ عند أول استخدام، بدون أي فحص)"""
+    global _default_provider
+    if _default_provider is None:
+        with _default_lock:
+            if _default_provider is None:
+                _default_provider = FingerprintProvider()
+    return _default_provider
@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+"""
+StP = Startup Pipeline: تشغيل مراحل بدء التطبيق المستقلة بالتوازي على مجموعة خيوط.
+- كل مرحلة دالة بدون معاملات مع قائمة مراحل تعتمد عليها (after)؛ تبدأ بمجرد انتهاء اعتمادياتها.
+- فشل مرحلة يفشل كل ما يعتمد عليها (بنفس الاستثناء) دون تشغيلها.
+- الواجهة لا تنتظر: main تعرض شاشة البداية فوراً وتملأ الواجهات من on_done مع اكتمال المراحل.
+- أول واجهة تنتظر المراحل الضرورية فقط؛ المراحل الاختيارية تُقرأ بـ result_or مع بديل إذا فشلت أو تأخرت.
+- لكل مرحلة توقيت (البداية والنهاية والمدة بالمللي ثانية منذ إنشاء الـ pipeline)، مع علامات مثل
+  first_paint و interactive، لمتابعة زمن الوصول للواجهة بين الإصدارات (report()).
+- write_report() تحفظ التوقيتات في ملف JSON مهما كان مستوى السجل (الافتراضي WARNING يخفي log_report).
+"""
+
+logger = logging.getLogger('StP')
+
+DEFAULT_STARTUP_WORKERS = 4
+
+PhaseCallback = Callable[[str, Any, Optional[BaseException]], None]
+
+
+class StartupPipeline:
+    """
+    منسق مراحل البدء.
+
+    Example:
+        startup = StartupPipeline()
+        startup.add('database', lambda: DatabaseManager(DB_PATH))
+        startup.add('translations', lambda: TranslationManager(startup.result('database')), after=['database'])
+        startup.on_done('translations', lambda name, tr, error: show_login(tr))
+        startup.mark('first_paint')
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_STARTUP_WORKERS,
+                 on_phase_done: Optional[PhaseCallback] = None):
+        """
+        Args:
+            max_workers (int): عدد الخيوط.
+            on_phase_done (Optional[PhaseCallback]): تُستدعى (من خيط العمل) بعد كل مرحلة: (الاسم، النتيجة، الخطأ).
+        """
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='startup')
+        self._futures: Dict[str, Future] = {}
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._marks: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._on_phase_done = on_phase_done
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    # --- المراحل ---
+
+    def add(self, name: str, function: Callable[[], Any], after: Iterable[str] = ()) -> Future:
+        """
+        إضافة مرحلة؛ تبدأ عند انتهاء كل المراحل في after (أو فوراً).
+
+        Args:
+            name (str): اسم المرحلة، e.g. 'database'.
+            function (Callable[[], Any]): عمل المرحلة؛ نتائج الاعتماديات متاحة عبر result(name).
+            after (Iterable[str]): أسماء مراحل مضافة مسبقاً.
+        Returns:
+            Future: نتيجة المرحلة.
+        """
+        after = list(after)
+        with self._lock:
+            if name in self._futures:
+                raise ValueError(f"startup phase {name!r} already added")
+            missing = [dependency for dependency in after if dependency not in self._futures]
+            if missing:
+                raise ValueError(f"startup phase {name!r} depends on unknown phases {missing}")
+            future: Future = Future()
+            self._futures[name] = future
+            self._timings[name] = {'after': after, 'queued_ms': None, 'start_ms': None, 'end_ms': None,
+                                   'duration_ms': None, 'error': None}
+            dependencies = [self._futures[dependency] for dependency in after]
+
+        remaining = [len(dependencies)]
+        remaining_lock = threading.Lock()
+
+        def dependency_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                self._submit(name, function, dependencies)
+
+        if not dependencies:
+            self._submit(name, function, dependencies)
+        for dependency in dependencies:
+            dependency.add_done_callback(dependency_done)
+        return future
+
+    def _submit(self, name: str, function: Callable[[], Any], dependencies: List[Future]):
+        self._timings[name]['queued_ms'] = self._now_ms()
+        failed = next((dependency.exception() for dependency in dependencies if dependency.exception()), None)
+        if failed is not None:
+            self._finish(name, None, failed, ran=False)
+            return
+        self._executor.submit(self._run, name, function)
+
+    def _run(self, name: str, function: Callable[[], Any]):
+        self._timings[name]['start_ms'] = self._now_ms()
+        try:
+            result, error = function(), None
+        except BaseException as e:
+            result, error = None, e
+            logger.error("❌ StP phase %s failed: %s", name, e)
+        self._finish(name, result, error, ran=True)
+
+    def _finish(self, name: str, result: Any, error: Optional[BaseException], ran: bool):
+        timing = self._timings[name]
+        timing['end_ms'] = self._now_ms()
+        if ran:
+            timing['duration_ms'] = timing['end_ms'] - timing['start_ms']
+        if error is not None:
+            timing['error'] = f"{type(error).__name__}: {error}" if ran else f"skipped ({error})"
+        logger.debug("StP phase %s done in %s ms", name,
+                     f"{timing['duration_ms']:.1f}" if timing['duration_ms'] is not None else '-')
+        # التوقيت والإشعار قبل set_result: من ينتظر النتيجة يرى التوقيت كاملاً
+        if self._on_phase_done is not None:
+            try:
+                self._on_phase_done(name, result, error)
+            except Exception as e:
+                logger.error("❌ StP on_phase_done callback failed for %s: %s", name, e)
+        future = self._futures[name]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        """نتيجة مرحلة (تنتظر انتهاءها؛ ترفع استثناءها إن فشلت)"""
+        return self._futures[name].result(timeout)
+
+    def result_or(self, name: str, default: Any = None) -> Any:
+        """
+        نتيجة مرحلة اختيارية بدون انتظار: default إذا فشلت أو لم تنتهِ بعد.
+
+        Args:
+            name (str): e.g. 'styles'
+            default (Any): البديل، e.g. ThemeCompiler غير مترجم.
+        Returns:
+            Any: نتيجة المرحلة أو default.
+        """
+        future = self._futures[name]
+        if not future.done() or future.exception() is not None:
+            logger.warning("⚠️ StP optional phase %s not available (%s), using fallback", name,
+                           self._timings[name]['error'] or 'still running')
+            return default
+        return future.result()
+
+    def on_done(self, name: str, callback: PhaseCallback):
+        """callback(name, result, error) عند انتهاء المرحلة (فوراً إذا كانت قد انتهت)"""
+        def done(future: Future):
+            error = future.exception()
+            try:
+                callback(name, None if error is not None else future.result(), error)
+            except Exception as e:
+                logger.error("❌ StP on_done callback failed for %s: %s", name, e)
+        self._futures[name].add_done_callback(done)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """انتظار كل المراحل المضافة. Returns: True إذا انتهت كلها خلال timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in list(self._futures.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(remaining)
+            except TimeoutError:
+                return False
+            except Exception:
+                pass
+        return True
+
+    def shutdown(self):
+        """إنهاء خيوط العمل (بعد اكتمال المراحل)"""
+        self._executor.shutdown(wait=False)
+
+    # --- التوقيت ---
+
+    def mark(self, name: str) -> float:
+        """تسجيل علامة زمنية (e.g. 'first_paint'، 'interactive'). Returns: الزمن بالمللي ثانية منذ البداية"""
+        self._marks[name] = self._now_ms()
+        logger.info("⏱️ StP %s at %.1f ms", name, self._marks[name])
+        return self._marks[name]
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: {'phases': {'database': {'after': [], 'start_ms': 0.4, 'end_ms': 85.2, 'duration_ms': 84.8,
+                'error': None, ...}, ...}, 'marks': {'first_paint': 12.3, 'interactive': 240.1}}
+        """
+        return {'phases': {name: dict(timing) for name, timing in self._timings.items()},
+                'marks': dict(self._marks)}
+
+    def write_report(self, path: str) -> bool:
+        """
+        حفظ report() في ملف JSON (يُستبدل في كل تشغيل).
+
+        Args:
+            path (str): e.g. 'config/startup_timings.json'
+        Returns:
+            bool: True إذا تم الحفظ.
+        """
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'saved_at': datetime.now().isoformat(), **self.report()}, f, indent=2)
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            logger.warning("⚠️ StP Could not write startup timings %s: %s", path, e)
+            return False
+
+    def log_report(self, level: int = logging.INFO):
+        """جدول التوقيتات في السجل (مرحلة واحدة لكل سطر)"""
+        if not logger.isEnabledFor(level):
+            return
+        lines = [f"{'phase':<14}{'start_ms':>10}{'end_ms':>10}{'ms':>10}  after"]
+        for name, timing in self._timings.items():
+            def fmt(value):
+                return f"{value:.1f}" if value is not None else '-'
+            lines.append(f"{name:<14}{fmt(timing['start_ms']):>10}{fmt(timing['end_ms']):>10}"
+                         f"{fmt(timing['duration_ms']):>10}  {','.join(timing['after']) or '-'}"
+                         f"{'  ' + timing['error'] if timing['error'] else ''}")
+        for name, at in self._marks.items():
+            lines.append(f"{name:<14}{at:>10.1f}")
+        logger.log(level, "⏱️ StP startup timings:\n%s", '\n'.join(lines))
@@ -0,0 +1,52 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional
+
+"""
+TN = Text Normalizer: توحيد النصوص للبحث (Arabic + French).
+- إزالة التشكيل والعلامات (الحركات العربية، é -> e، ç -> c) عبر NFKD.
+- توحيد أشكال الألف والياء والتاء المربوطة: أ إ آ ٱ -> ا، ى -> ي، ة -> ه، وحذف التطويل (ـ).
+- تحويل الأرقام العربية الهندية إلى أرقام لاتينية (لأرقام الهواتف).
+- أحرف صغيرة (casefold).
+نفس الدالة تُستخدم عند الفهرسة (Clients_fts) وعند البحث، فيتطابق "أحمد" مع "احمد" و "Hélène" مع "helene".
+"""
+
+_CHAR_MAP = str.maketrans({
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    'ـ': None,  # التطويل
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # ٠-٩
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # ۰-۹
+})
+_TOKEN_RE = re.compile(r'\w+')
+
+
+@lru_cache(maxsize=4096)
+def fold_text(text: Optional[str]) -> Optional[str]:
+    """
+    توحيد نص للبحث.
+
+    Args:
+        text (Optional[str]): e.g. "أحمد  Hélène"
+    Returns:
+        Optional[str]: e.g. "احمد  helene" (None يبقى None)
+    """
+    if text is None:
+        return None
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', stripped.translate(_CHAR_MAP)).casefold()
+
+
+def search_tokens(text: Optional[str]) -> List[str]:
+    """
+    كلمات البحث بعد التوحيد.
+
+    Args:
+        text (Optional[str]): e.g. "  Ahmed  0666"
+    Returns:
+        List[str]: e.g. ['ahmed', '0666']
+    """
+    return _TOKEN_RE.findall(fold_text(text) or '')
@@ -0,0 +1,376 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+
+import flet as ft
+
+from db.database_manager import DatabaseManager
+
+"""
+ThC = Theme Compiler: تحويل قيم الثيم النصية إلى كائنات Flet جاهزة مرة واحدة لكل ثيم.
+- قيم theme_details نصوص بصيغة CSS ('8px', '#2E86AB', '0px 2px 4px rgba(...)', '0.3s', 'ease-out').
+- compile() يحولها إلى ButtonStyle / TextStyle / BoxShadow / Animation / Padding ويحفظ النتيجة
+  بمفتاح (theme_id, theme_cache.version): إعادة بناء الواجهة أو تغيير اللغة لا تحلل أي نص.
+- أي كتابة على الثيمات تزيد theme_cache.version، فالاستدعاء التالي يعيد الترجمة تلقائياً.
+- الكائنات المترجمة مشتركة بين الواجهات: لا تعدلها، أنشئ نسخة إذا احتجت تغيير خاصية.
+"""
+
+logger = logging.getLogger('ThC')
+
+DEFAULT_COMPILED_THEMES = 4
+
+FONT_WEIGHTS = {
+    'thin': 100, 'extralight': 200, 'light': 300, 'regular': 400, 'normal': 400,
+    'medium': 500, 'semibold': 600, 'bold': 700, 'extrabold': 800, 'black': 900,
+}
+
+ANIMATION_CURVES = {
+    'linear': 'LINEAR', 'ease': 'EASE', 'ease-in': 'EASE_IN', 'ease-out': 'EASE_OUT',
+    'ease-in-out': 'EASE_IN_OUT',
+}
+
+_LENGTH_RE = re.compile(r'^(-?\d+(?:\.\d+)?)(px)?$')
+_DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)(ms|s)$')
+_RGBA_RE = re.compile(r'^rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*(?:,\s*(\d*\.?\d+)\s*)?\)$')
+
+Shadow = Tuple[float, float, float, float, Optional[Tuple[str, Optional[float]]]]
+
+
+# --- تحليل القيم النصية (بدون Flet) ---
+
+def parse_length(value: Optional[str]) -> Optional[float]:
+    """
+    Args:
+        value (Optional[str]): e.g. '8px' أو '1.5px' أو '16'
+    Returns:
+        Optional[float]: e.g. 8.0، أو None إذا لم تكن القيمة طولاً.
+    """
+    match = _LENGTH_RE.match((value or '').strip().lower())
+    return float(match.group(1)) if match else None
+
+
+def parse_duration_ms(value: Optional[str]) -> Optional[int]:
+    """
+    Args:
+        value (Optional[str]): e.g. '0.3s' أو '200ms'
+    Returns:
+        Optional[int]: المدة بالمللي ثانية، e.g. 300.
+    """
+    match = _DURATION_RE.match((value or '').strip().lower())
+    if not match:
+        return None
+    number = float(match.group(1))
+    return int(round(number * 1000 if match.group(2) == 's' else number))
+
+
+def parse_color(value: Optional[str]) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    Args:
+        value (Optional[str]): e.g. '#2E86AB' أو 'rgba(46, 134, 171, 0.2)' أو 'transparent'
+    Returns:
+        Optional[Tuple[str, Optional[float]]]: (اللون، الشفافية أو None)،
+            e.g. ('#2E86AB', None) أو ('#2E86AB', 0.2)؛ None إذا كانت القيمة فارغة.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    match = _RGBA_RE.match(value.lower())
+    if match:
+        red, green, blue = (min(int(part), 255) for part in match.groups()[:3])
+        opacity = float(match.group(4)) if match.group(4) is not None else None
+        return f"#{red:02X}{green:02X}{blue:02X}", opacity
+    return (value.upper() if value.startswith('#') else value.lower()), None
+
+
+def _split_css(value: str) -> List[str]:
+    """تقسيم بالمسافات خارج الأقواس: '0px 2px rgba(1, 2, 3, 0.2)' -> ['0px', '2px', 'rgba(1, 2, 3, 0.2)']"""
+    parts, depth, current = [], 0, ''
+    for char in value:
+        depth += (char == '(') - (char == ')')
+        if char.isspace() and depth == 0:
+            if current:
+                parts.append(current)
+            current = ''
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def parse_shadow(value: Optional[str]) -> Optional[Shadow]:
+    """
+    Args:
+        value (Optional[str]): صيغة box-shadow: 'x y blur [spread] color'، e.g. '0px 2px 4px rgba(46, 134, 171, 0.2)'
+    Returns:
+        Optional[Shadow]: (x, y, blur, spread, (color, opacity))، e.g. (0.0, 2.0, 4.0, 0.0, ('#2E86AB', 0.2))؛
+            اللون None إذا لم يُذكر، والنتيجة None لـ 'none' أو صيغة غير معروفة.
+    """
+    parts = _split_css((value or '').strip())
+    color = None
+    if parts and parse_length(parts[-1]) is None:
+        color = parse_color(parts.pop())
+    lengths = [parse_length(part) for part in parts]
+    if not 2 <= len(lengths) <= 4 or None in lengths:
+        return None
+    x, y, blur, spread = (lengths + [0.0, 0.0])[:4]
+    return x, y, blur, spread, color
+
+
+def parse_border(value: Optional[str]) -> Optional[Tuple[float, Optional[Tuple[str, Optional[float]]]]]:
+    """
+    Args:
+        value (Optional[str]): e.g. '1px solid #E9ECEF'
+    Returns:
+        Optional[Tuple]: (العرض، (اللون، الشفافية))، e.g. (1.0, ('#E9ECEF', None))؛ None لـ 'none'.
+    """
+    width, color = None, None
+    for part in _split_css((value or '').strip()):
+        length = parse_length(part)
+        if length is not None and width is None:
+            width = length
+        elif part.lower() not in ('solid', 'dashed', 'dotted', 'none'):
+            color = parse_color(part)
+    if width is None and color is None:
+        return None
+    return (width if width is not None else 1.0), color
+
+
+def parse_font_weight(value: Optional[str]) -> Optional[int]:
+    """
+    Args:
+        value (Optional[str]): e.g. 'Bold' أو 'SemiBold' أو '600'
+    Returns:
+        Optional[int]: e.g. 700
+    """
+    value = (value or '').strip().lower().replace('-', '').replace(' ', '')
+    if value.isdigit():
+        return min(max(int(value) // 100 * 100, 100), 900)
+    return FONT_WEIGHTS.get(value)
+
+
+# --- التحويل إلى كائنات Flet ---
+
+def _color(parsed: Optional[Tuple[str, Optional[float]]]) -> Optional[str]:
+    """(اللون، الشفافية) -> لون Flet، e.g. ('#2E86AB', 0.2) -> '#2E86AB,0.2'"""
+    if parsed is None:
+        return None
+    color, opacity = parsed
+    return ft.Colors.with_opacity(opacity, color) if opacity is not None else color
+
+
+def _shadow(value: Optional[str]) -> Optional[ft.BoxShadow]:
+    parsed = parse_shadow(value)
+    if parsed is None:
+        return None
+    x, y, blur, spread, color = parsed
+    return ft.BoxShadow(spread_radius=spread, blur_radius=blur, color=_color(color), offset=ft.Offset(x, y))
+
+
+def _weight(value: Optional[str]) -> Optional[ft.FontWeight]:
+    weight = parse_font_weight(value)
+    return getattr(ft.FontWeight, f"W_{weight}") if weight else None
+
+
+class CompiledTheme:
+    """
+    كائنات Flet جاهزة لثيم واحد (للقراءة فقط).
+
+    Example:
+        theme = app.styles.compile()
+        ft.ElevatedButton(text, style=theme.button_style('primary'))
+        ft.Text(title, style=theme.text_style('main_title', app.tr.get_language()))
+        ft.Container(content, padding=theme.padding('medium'), shadow=theme.shadow('primary_button'),
+                     animate=theme.animation())
+    """
+
+    __slots__ = ('theme_id', 'version', 'colors', 'text_styles', 'button_styles', 'shadows',
+                 'animations', 'spacing', 'paddings', 'icon_sizes', 'input_styles')
+
+    def __init__(self, theme_id: Optional[int], version: int):
+        self.theme_id = theme_id
+        self.version = version
+        self.colors: Dict[str, str] = {}
+        self.text_styles: Dict[Tuple[str, Optional[str]], ft.TextStyle] = {}
+        self.button_styles: Dict[str, ft.ButtonStyle] = {}
+        self.shadows: Dict[str, ft.BoxShadow] = {}
+        self.animations: Dict[str, ft.Animation] = {}
+        self.spacing: Dict[str, float] = {}
+        self.paddings: Dict[str, ft.Padding] = {}
+        self.icon_sizes: Dict[str, float] = {}
+        self.input_styles: Dict[str, Dict[str, Any]] = {}
+
+    def color(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        """e.g. color('blue_trust') -> '#2E86AB'"""
+        return self.colors.get(name, default)
+
+    def text_style(self, font_type: str, language: Optional[str]) -> Optional[ft.TextStyle]:
+        """
+        Args:
+            font_type (str): اسم الفئة الفرعية أو العنصر، e.g. 'main_title' أو 'arabic_main_title'.
+            language (Optional[str]): e.g. 'ar'
+        Returns:
+            Optional[ft.TextStyle]: نفس الكائن في كل استدعاء (تغيير اللغة = قراءة مفتاح آخر).
+        """
+        return self.text_styles.get((font_type, language))
+
+    def button_style(self, name: str = 'primary') -> Optional[ft.ButtonStyle]:
+        """e.g. button_style('primary') أو button_style('secondary_button')"""
+        return self.button_styles.get(name)
+
+    def shadow(self, name: str) -> Optional[ft.BoxShadow]:
+        """e.g. shadow('primary_button') أو shadow('input_focus')"""
+        return self.shadows.get(name)
+
+    def animation(self, name: str = 'default') -> Optional[ft.Animation]:
+        return self.animations.get(name)
+
+    def padding(self, name: str = 'medium') -> Optional[ft.Padding]:
+        """e.g. padding('small') -> Padding(8, 8, 8, 8)"""
+        return self.paddings.get(name)
+
+    def input_style(self, name: str = 'input_field') -> Dict[str, Any]:
+        """معاملات ft.TextField الجاهزة، e.g. ft.TextField(label=..., **theme.input_style())"""
+        return self.input_styles.get(name, {})
+
+
+class ThemeCompiler:
+    """
+    ترجمة الثيم الحالي إلى CompiledTheme مع حفظ النتيجة حسب (theme_id, version).
+
+    Example:
+        compiler = ThemeCompiler(db)
+        theme = compiler.compile()      # أول مرة: تحليل كل القيم
+        theme = compiler.compile()      # نفس الكائن حتى تعديل الثيم أو تبديله
+    """
+
+    def __init__(self, db_manager: DatabaseManager, maxsize: int = DEFAULT_COMPILED_THEMES):
+        """
+        Args:
+            db_manager (DatabaseManager): مصدر فهرس الثيم (get_theme_index) ورقم الإصدار (theme_cache.version).
+            maxsize (int): عدد الثيمات المترجمة المحفوظة (e.g. للتنقل بين ثيمين في المعاينة).
+        """
+        self._db = db_manager
+        self.maxsize = maxsize
+        self._compiled: 'OrderedDict[Tuple[Optional[int], int], CompiledTheme]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self) -> CompiledTheme:
+        """
+        Returns:
+            CompiledTheme: كائنات الثيم الحالي (محفوظة حتى تتغير theme_id أو theme_cache.version).
+        """
+        # الإصدار يُقرأ قبل الفهرس: كتابة بينهما تعني مفتاحاً قديماً فيُعاد البناء في المرة القادمة فقط
+        version = self._db.theme_cache.version
+        index = self._db.get_theme_index()
+        key = (index.theme_id, version)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None:
+                self._compiled.move_to_end(key)
+                return compiled
+
+        compiled = self._build(index, version)
+        with self._lock:
+            self._compiled[key] = compiled
+            while len(self._compiled) > self.maxsize:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def invalidate(self):
+        """مسح الثيمات المترجمة (غير ضروري بعد الكتابة عبر DatabaseManager؛ الإصدار يكفي)"""
+        with self._lock:
+            self._compiled.clear()
+
+    def _build(self, index, version: int) -> CompiledTheme:
+        theme = CompiledTheme(index.theme_id, version)
+
+        for _, element, _, properties in index.elements('color'):
+            theme.colors.setdefault(element, _color(parse_color(next(iter(properties.values()), None))))
+
+        for subcategory, element, language, properties in index.elements('typography'):
+            style = ft.TextStyle(font_family=properties.get('font_family') or None,
+                                 size=parse_length(properties.get('font_size')),
+                                 weight=_weight(properties.get('font_weight')))
+            for name in (element, subcategory):
+                if name:
+                    theme.text_styles.setdefault((name, language), style)
+
+        for _, element, _, properties in index.elements('icon'):
+            if 'size' in properties:
+                theme.icon_sizes[element] = parse_length(properties['size'])
+            if 'color' in properties:
+                theme.colors.setdefault(element, _color(parse_color(properties['color'])))
+
+        for category in ('button', 'form'):
+            for _, element, _, properties in index.elements(category):
+                shadow = _shadow(properties.get('box_shadow'))
+                if shadow is not None:
+                    theme.shadows[element] = shadow
+
+        self._build_buttons(index, theme)
+        self._build_inputs(index, theme)
+
+        for _, element, _, properties in index.elements('animation'):
+            duration = parse_duration_ms(properties.get('duration'))
+            if duration is not None:
+                curve = ANIMATION_CURVES.get((properties.get('timing_function') or '').strip().lower(), 'LINEAR')
+                theme.animations[element] = ft.Animation(duration, getattr(ft.AnimationCurve, curve))
+
+        for _, element, _, properties in index.elements('spacing'):
+            size = parse_length(properties.get('size'))
+            if size is not None:
+                theme.spacing[element] = size
+                theme.paddings[element] = ft.Padding(left=size, top=size, right=size, bottom=size)
+
+        logger.debug("🎨 ThC 1 -- theme %s (version %s) compiled: %d text styles, %d button styles",
+                     index.theme_id, version, len(theme.text_styles), len(theme.button_styles))
+        return theme
+
+    @staticmethod
+    def _build_buttons(index, theme: CompiledTheme):
+        """ButtonStyle لكل زر، مع ظل التمرير (button_hover) كحالة HOVERED"""
+        hover = theme.shadows.get('button_hover')
+        for subcategory, element, _, properties in index.elements('button'):
+            if subcategory == 'hover':
+                continue
+            shadow = theme.shadows.get(element)
+            elevation, shadow_color = None, None
+            if shadow is not None or hover is not None:
+                base = shadow.offset.y if shadow is not None else 0
+                elevation = {ft.ControlState.DEFAULT: base,
+                             ft.ControlState.HOVERED: hover.offset.y if hover is not None else base}
+                shadow_color = (shadow or hover).color
+            border = parse_border(properties.get('border'))
+            radius = parse_length(properties.get('border_radius'))
+            style = ft.ButtonStyle(
+                color=_color(parse_color(properties.get('text_color'))),
+                bgcolor=_color(parse_color(properties.get('background'))),
+                elevation=elevation,
+                shadow_color=shadow_color,
+                side=ft.BorderSide(border[0], _color(border[1])) if border else None,
+                shape=ft.RoundedRectangleBorder(radius=radius) if radius is not None else None,
+            )
+            for name in (element, subcategory):
+                if name:
+                    theme.button_styles.setdefault(name, style)
+
+    @staticmethod
+    def _build_inputs(index, theme: CompiledTheme):
+        """معاملات TextField: الحقل العادي مع لون وعرض الإطار عند التركيز (input_focus)"""
+        focus = parse_border(index.element('form', 'input_focus').get('border'))
+        for _, element, _, properties in index.elements('form'):
+            if element == 'input_focus':
+                continue
+            border = parse_border(properties.get('border'))
+            style = {
+                'bgcolor': _color(parse_color(properties.get('background'))),
+                'border_radius': parse_length(properties.get('border_radius')),
+                'border_width': border[0] if border else None,
+                'border_color': _color(border[1]) if border else None,
+                'focused_border_width': focus[0] if focus else None,
+                'focused_border_color': _color(focus[1]) if focus else None,
+            }
+            theme.input_styles[element] = {key: value for key, value in style.items() if value is not None}
@@ -1,6 +1,10 @@
-from typing import Dict, Optional
-from db.database_manager import DatabaseManager 
-from config.settings import DEFAULT_LANGUAGE 
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple, Any
+from db.database_manager import DatabaseManager
+from config.settings import DEFAULT_LANGUAGE
 
 
 """
@@ -8,43 +12,135 @@ TraM-load   Translation Manager loads_translations
 TranM-set   Translation Manager set_language.
 TranM-get   Translation Manager get_text.
 TraM-get_all   Translation Manager get_all_translations.
+TraM-save   Translation Manager حفظ اللغة في Settings (في الخلفية).
+
+- عند التحميل تُبنى جداول مسطحة لكل لغة {key: text}؛ النص الناقص يُملأ مسبقاً من سلسلة
+  FALLBACK_CHAINS (e.g. fr -> en، والعربية بدون بديل)، فـ get_text قراءة واحدة من dict.
+- set_language تبدل مرجع الجدول فقط، وحفظ اللغة في قاعدة البيانات يتم في خيط خلفي.
+- self.missing (Counter) يعد المفاتيح المطلوبة غير الموجودة لتقرير التغطية (coverage()).
 """
+logger = logging.getLogger('TraM')
+
+LANGUAGES = ('ar', 'fr', 'en')
+
+# اللغة -> اللغات البديلة بالترتيب عند غياب النص؛ بعدها يُستخدم default_text
+# العربية بدون بديل: الواجهات تمرر default_text بالعربية (e.g. get_text('username_label', "اسم المستخدم"))
+# وهو أنسب من النص الإنجليزي.
+FALLBACK_CHAINS: Dict[str, Tuple[str, ...]] = {
+    'ar': (),
+    'fr': ('en',),
+    'en': ('fr',),
+}
+
+
+def compile_tables(translations: Dict[str, Dict[str, str]],
+                   chains: Dict[str, Tuple[str, ...]] = FALLBACK_CHAINS
+                   ) -> Tuple[Dict[str, Dict[str, str]], Dict[str, Set[str]]]:
+    """
+    تحويل {key: {ar, fr, en}} إلى جدول مسطح لكل لغة مع تطبيق سلاسل البدائل.
+
+    Args:
+        translations (Dict[str, Dict[str, str]]): {'save': {'ar': 'حفظ', 'fr': None, 'en': 'Save'}}
+        chains (Dict[str, Tuple[str, ...]]): سلاسل البدائل لكل لغة.
+    Returns:
+        Tuple: (الجداول، المفاتيح المأخوذة من لغة بديلة)
+            e.g. ({'fr': {'save': 'Save'}, ...}, {'fr': {'save'}, ...})
+    """
+    tables: Dict[str, Dict[str, str]] = {language: {} for language in LANGUAGES}
+    fallbacks: Dict[str, Set[str]] = {language: set() for language in LANGUAGES}
+    for key, texts in translations.items():
+        for language in LANGUAGES:
+            text = texts.get(language)
+            if text:
+                tables[language][key] = text
+                continue
+            text = next((texts.get(other) for other in chains.get(language, ()) if texts.get(other)), None)
+            if text:
+                tables[language][key] = text
+                fallbacks[language].add(key)
+    return tables, fallbacks
+
+
 class TranslationManager:
     """
     مسؤول عن تحميل وإدارة نصوص الترجمة.
     """
-    
+
     def __init__(self, db_manager: DatabaseManager):
         self._db = db_manager
         self._translations: Dict[str, Dict[str, str]] = {}
+        self._tables: Dict[str, Dict[str, str]] = {language: {} for language in LANGUAGES}
+        self._fallbacks: Dict[str, Set[str]] = {language: set() for language in LANGUAGES}
         self._current_language = DEFAULT_LANGUAGE
-        
+        self._table: Dict[str, str] = {}
+        self.missing: Counter = Counter()  # (language, key) -> عدد الطلبات
+
+        # حفظ اللغة في Settings بخيط واحد (بالترتيب)؛ آخر لغة محفوظة لتجنب الكتابة المكررة
+        self._saved_language: Optional[str] = None
+        self._save_lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._last_save: Optional[Future] = None
+
         # 1. تحميل الترجمات من DB
         self.load_translations()
-        
+
         # 2. تعيين اللغة من الإعدادات المخزنة (بعد تهيئة DB)
         settings = self._db.get_settings()
         if settings and settings.get('language'):
             self._current_language = settings['language']
+            self._saved_language = settings['language']
+        self._table = self._tables.get(self._current_language, {})
 
     def load_translations(self):
-        """تحميل جميع نصوص الترجمة من قاعدة البيانات."""
+        """تحميل جميع نصوص الترجمة من قاعدة البيانات وبناء جداول اللغات."""
         try:
-            self._translations = self._db.get_translations()
+            translations = self._db.get_translations()
         except Exception as e:
-            print(f"TraM-load ❌ Error loading translations from DB: {e}")
-            self._translations = {}
+            logger.error("TraM-load ❌ Error loading translations from DB: %s", e)
+            translations = {}
+        self._translations = translations
+        self._tables, self._fallbacks = compile_tables(translations)
+        self._table = self._tables.get(self._current_language, {})
+        logger.debug("TraM-load ✅ %d keys compiled for %s", len(translations), ', '.join(LANGUAGES))
 
     def set_language(self, lang_code: str):
-        """تغيير اللغة الحالية للتطبيق وحفظها في قاعدة البيانات.
+        """تغيير اللغة الحالية للتطبيق (فوراً) وحفظها في قاعدة البيانات (في الخلفية).
         Args:
             lang_code (str): رمز اللغة الجديد (مثل 'ar'، 'fr'، 'en').
         Returns: None
         """
-        if lang_code in ['ar', 'fr', 'en']:
+        if lang_code in LANGUAGES:
+            self._table = self._tables[lang_code]
             self._current_language = lang_code
-            # تحديث اللغة في جدول Settings
-            self._db.update_settings({'language': lang_code})
+            # تحديث اللغة في جدول Settings دون انتظار القرص
+            if lang_code != self._saved_language:
+                with self._save_lock:
+                    if self._writer is None:
+                        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tram-save')
+                    self._last_save = self._writer.submit(self._save_language)
+
+    def _save_language(self):
+        """كتابة اللغة الحالية فقط (عدة تبديلات سريعة = كتابة واحدة)"""
+        language = self._current_language
+        if language == self._saved_language:
+            return
+        if self._db.update_settings({'language': language}):
+            self._saved_language = language
+        else:
+            logger.error("TraM-save ❌ Failed to save language %r to Settings", language)
+
+    def flush(self, timeout: Optional[float] = None):
+        """انتظار آخر عملية حفظ للغة (e.g. قبل إغلاق التطبيق)"""
+        future = self._last_save
+        if future is not None:
+            future.result(timeout)
+
+    def close(self):
+        """إنهاء خيط الحفظ بعد إكمال الكتابة المعلقة"""
+        with self._save_lock:
+            if self._writer is not None:
+                self._writer.shutdown(wait=True)
+                self._writer = None
 
     def get_language(self) -> str:
         """إرجاع اللغة الحالية.
@@ -60,23 +156,56 @@ class TranslationManager:
 
         Args:
             key (str): مفتاح النص المطلوب ترجمته.
-            default_text (str): النص الافتراضي إذا لم يتم العثور على الترجمة.
+            default_text (str): النص الافتراضي إذا لم يتم العثور على الترجمة (ولا في اللغات البديلة).
         Returns:
             str: النص المترجم أو النص الافتراضي إذا لم تتوفر الترجمة
         """
-        key_translations = self._translations.get(key, {})
-        text = key_translations.get(self._current_language)
-        
-        if text:
+        text = self._table.get(key)
+        if text is not None:
             return text
-        
+        self.missing[(self._current_language, key)] += 1
         return default_text
+
     def get_all_translations(self) -> Dict[str, Dict[str, str]]:
         """إرجاع جميع الترجمات المحملة.
         Args: None
         Returns:
             Dict[str, Dict[str, str]]: قاموس يحتوي على جميع الترجمات.
         """
-        print("TraM-get_all ✅ Returning all translations.")
-        print(self._translations)
-        return self._translations
\ No newline at end of file
+        logger.debug("TraM-get_all ✅ Returning all translations: %s", self._translations)
+        return self._translations
+
+    def missing_keys(self, language: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, str, int]]:
+        """المفاتيح المطلوبة غير الموجودة، الأكثر طلباً أولاً.
+        Args:
+            language (Optional[str]): لغة واحدة أو None لكل اللغات.
+            limit (Optional[int]): الحد الأقصى للنتائج.
+        Returns:
+            List[Tuple[str, str, int]]: [('fr', 'new_button', 12), ...]
+        """
+        counts = Counter(dict(self.missing))  # نسخة: get_text قد يضيف مفاتيح من خيط آخر
+        items = [(lang, key, count) for (lang, key), count in counts.most_common()
+                 if language is None or lang == language]
+        return items[:limit] if limit is not None else items
+
+    def coverage(self) -> Dict[str, Dict[str, Any]]:
+        """تقرير التغطية لكل لغة.
+        Args: None
+        Returns:
+            Dict[str, Dict[str, Any]]: {'fr': {'keys': 120, 'translated': 115, 'fallback': 3,
+                'missing_requested': 2, 'ratio': 0.9583}, ...}
+        """
+        total = len(self._translations)
+        requested = list(dict(self.missing))
+        report = {}
+        for language in LANGUAGES:
+            fallback = len(self._fallbacks[language])
+            translated = len(self._tables[language]) - fallback
+            report[language] = {
+                'keys': total,
+                'translated': translated,
+                'fallback': fallback,
+                'missing_requested': sum(1 for lang, _ in requested if lang == language),
+                'ratio': round(translated / total, 4) if total else None,
+            }
+        return report
@@ -1 +1,87 @@
+import flet as ft
+from typing import Dict, List
+import logging
 
+logger = logging.getLogger('views')
+
+
+class ClientsView(ft.Container):
+    """
+    واجهة العملاء: بحث أثناء الكتابة عبر app_state.client_search (utils/client_search_service.py).
+    الاستعلام يعمل في خيط البحث، وخيط الواجهة يرسل النص فقط ويعود فوراً.
+    """
+
+    def __init__(self, app_state):
+        super().__init__()
+        self.app = app_state
+        self.tr = app_state.tr
+        self.search_service = app_state.client_search
+        # كائنات Flet الجاهزة من الثيم الحالي، مع القيم القديمة كبديل
+        self.styles = app_state.compiled_theme()
+
+        self.width = 500
+        self.padding = self.styles.padding('large') or 30
+        self.bgcolor = self.styles.color('pure_white', self.app.theme.get('Surface_Cards', ft.Colors.WHITE))
+        self.border_radius = 10
+
+        # حقل البحث وقائمة النتائج
+        self.search_field = ft.TextField(
+            label=self.tr.get_text('search_clients', "البحث عن عميل (الاسم، الهاتف، البريد)"),
+            prefix_icon=ft.Icons.SEARCH,
+            on_change=self._on_search_change,
+            autofocus=True,
+            width=440
+        )
+        self.results_list = ft.ListView(height=360, spacing=2)
+        self.status_text = ft.Text("", size=12, color=self.styles.color('charcoal_black', ft.Colors.GREY_700))
+        self.content = self._build_ui()
+
+    def _on_search_change(self, e: ft.ControlEvent):
+        """
+        مع كل ضغطة مفتاح: إرسال النص إلى خدمة البحث (debounce في خيط العمل).
+        """
+        term = (e.control.value or '').strip()
+        if not term:
+            self.search_service.cancel()
+            self._show_results(term, [])
+            return
+        self.search_service.search(term, self._show_results)
+
+    def _show_results(self, term: str, results: List[Dict]):
+        """
+        عرض النتائج (تُستدعى من خيط البحث، فقط لآخر نص مكتوب).
+        """
+        self.results_list.controls = [
+            ft.ListTile(
+                leading=ft.Icon(ft.Icons.PERSON),
+                title=ft.Text(client.get('full_name') or ''),
+                subtitle=ft.Text(' · '.join(filter(None, (client.get('phone_number'), client.get('email'))))),
+                dense=True,
+            )
+            for client in results
+        ]
+        if term and not results:
+            self.status_text.value = self.tr.get_text('no_clients_found', "لا يوجد عملاء مطابقون.")
+        else:
+            self.status_text.value = ""
+        try:
+            self.update()
+        except Exception as ex:
+            # الواجهة أُغلقت أو استُبدلت قبل وصول النتائج
+            logger.debug("Client search results not shown for %r: %s", term, ex)
+
+    def _build_ui(self):
+        """بناء تخطيط واجهة المستخدم Flet."""
+        title_style = self.styles.text_style('main_title', self.tr.get_language())
+        return ft.Column(
+            controls=[
+                ft.Text(self.tr.get_text('clients_title', "العملاء"), style=title_style,
+                        size=None if title_style else 24, weight=None if title_style else ft.FontWeight.BOLD),
+                ft.Divider(height=20),
+                self.search_field,
+                self.status_text,
+                self.results_list,
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            spacing=15
+        )
@@ -16,7 +16,7 @@ class LicenseView(ft.Container):
         self.app = app_state
         self.tr = app_state.tr
         self.on_activation_success = on_success
-        self.current_machine_id = self.app.license.get_current_machine_id() # الحصول على ID الجهاز
+        self.current_machine_id = self.app.license.get_current_machine_id(verified=True) # ID الجهاز (فحص فعلي، لطلب الترخيص)
         
         self.width = 500
         self.padding = 30
@@ -4,6 +4,9 @@ from typing import Callable, Any
 #from main import AppState # استيراد AppState الذي يحمل المديرات
 from typing import Dict
 import datetime
+import logging
+
+logger = logging.getLogger('views')
 
 class LoginView(ft.Container):
     """
@@ -17,39 +20,26 @@ class LoginView(ft.Container):
         self.db = app_state.db
         self.on_login_success = on_login_success
         
+        # كائنات Flet الجاهزة من الثيم الحالي (AppState.compiled_theme)، مع القيم القديمة كبديل
+        self.styles = self.app.compiled_theme()
+        self.language = self.tr.get_language()
+
         self.width = 400
-        self.padding = 30
+        self.padding = self.styles.padding('large') or 30
         self.theme = self.db.get_current_theme()
         self.translation = self.db.get_translations()
         self.theme_category =  None
         category = ("calendar","color","spacing","button","form","animation","typography","icon")
-        print("\n\n======================================")
-        print("---------- the theme data -----------")
-        print("======================================")
-        print("{")
-        for key in self.theme:
-            print(f"\"{key}\":", self.theme[key])
-        print("}")
-        print("\n\n======================================")
-        print("------- the translation data -------")
-        print("======================================")
-        print("{")
-        for i in self.translation:
-            print(f"\"{i}\":", self.translation[i])
-        print("}")
-
-        print("\n\n======================================")
-        print("------- the category theme -------")
-        print("======================================")
-        print("{")
-        for i in category:
-            print(f"==== {i} =====")
-            print(f"\"{i}\":", self.db.get_theme_by_category(i))
-        print("}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # تفريغ بيانات التنسيق والترجمة في وضع التصحيح فقط (يتطلب استعلامات إضافية)
+            logger.debug("the theme data: %s", self.theme)
+            logger.debug("the translation data: %s", self.translation)
+            for i in category:
+                logger.debug("the category theme %s: %s", i, self.db.get_theme_by_category(i))
 
 
 
-        self.bgcolor = self.app.theme.get('Surface_Cards', ft.Colors.WHITE)
+        self.bgcolor = self.styles.color('pure_white', self.app.theme.get('Surface_Cards', ft.Colors.WHITE))
         self.border_radius = 10
         
         
@@ -69,7 +59,7 @@ class LoginView(ft.Container):
             on_submit=self._attempt_login, # يمكن تسجيل الدخول بالضغط على Enter
             width=300
         )
-        self.error_message = ft.Text("", color=self.app.theme.get('Error', ft.Colors.RED_500))
+        self.error_message = ft.Text("", color=self.styles.color('danger_red', self.app.theme.get('Error', ft.Colors.RED_500)))
         self.content = self._build_ui()
     def _attempt_login(self, e: ft.ControlEvent):
         """
@@ -104,17 +94,17 @@ class LoginView(ft.Container):
                     commit=True
                 )
                 self.on_login_success(dict(user_record)) # استدعاء الدالة في main.py
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] User '{username}' logged in successfully.")
+                logger.info("User '%s' logged in successfully.", username)
                 return
             else:
                 # 4. فشل: كلمة المرور خاطئة
                 self.error_message.value = self.tr.get_text('wrong_password', "كلمة المرور خاطئة.")
-                print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Failed login attempt for user '{username}': Wrong password.")
+                logger.warning("Failed login attempt for user '%s': Wrong password.", username)
 
         else:
             # 5. فشل: اسم المستخدم غير موجود
             self.error_message.value = self.tr.get_text('user_not_found', "اسم المستخدم غير موجود.")
-            print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] Failed login attempt: User '{username}' not found.")
+            logger.warning("Failed login attempt: User '%s' not found.", username)
             
         # تحديث الواجهة لعرض رسالة الخطأ
         self.password_field.value = ""
@@ -124,16 +114,20 @@ class LoginView(ft.Container):
         """بناء تخطيط واجهة المستخدم Flet."""
         
         # إنشاء زر تسجيل الدخول
+        button_style = self.styles.button_style('primary')
         login_button = ft.ElevatedButton(
             text=self.tr.get_text('login_button', "تسجيل الدخول"),
             on_click=self._attempt_login,
-            color=self.app.theme.get('Primary'),
+            style=button_style,
+            color=None if button_style else self.app.theme.get('Primary'),
             width=300
         )
+        title_style = self.styles.text_style('main_title', self.language)
         
         return ft.Column(
             controls=[
-                ft.Text(self.tr.get_text('app_title', "إدارة المواعيد"), size=24, weight=ft.FontWeight.BOLD),
+                ft.Text(self.tr.get_text('app_title', "إدارة المواعيد"), style=title_style,
+                        size=None if title_style else 24, weight=None if title_style else ft.FontWeight.BOLD),
                 ft.Divider(height=20),
                 self.username_field,
                 self.password_field,